@@ -11,6 +11,9 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    from app.json_provider import FastJSONProvider
+    app.json = FastJSONProvider(app)
+
     # 更宽松的CORS配置用于调试
     CORS(app, resources={
         r"/*": {
@@ -28,12 +31,31 @@ def create_app(config_class=Config):
     # Note: MCP client is automatically provided by Cline at runtime
     # and can be accessed via current_app.mcp
 
-    from app.routes import auth_bp, user_bp, admin_bp, job_bp
+    from app.metrics import init_metrics
+    init_metrics(app)
+
+    from app.services import password_service
+    password_service.init_app(app)
+
+    from app.services import upstream_guard
+    upstream_guard.init_app(app)
+
+    from app.services.task_queue import task_queue
+    task_queue.init_app(app)
+
+    from app.routes import auth_bp, user_bp, admin_bp, job_bp, task_bp
     # 添加全局API前缀
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(user_bp, url_prefix='/api/user')
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
     app.register_blueprint(job_bp, url_prefix='/api/job')
+    app.register_blueprint(task_bp, url_prefix='/api/task')
+
+    from app.compression import init_compression
+    init_compression(app)
+
+    from app.cli import register_commands
+    register_commands(app)
 
     return app
 
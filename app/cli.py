@@ -0,0 +1,34 @@
+import json
+import click
+from app.services import search_service, skill_index, vector_index
+from app.services.job_service import ingest_jds, parse_batch_payload
+
+def register_commands(app):
+    @app.cli.command('rebuild-skill-index')
+    def rebuild_skill_index():
+        """重建职位技能倒排索引"""
+        count = skill_index.rebuild_index()
+        click.echo(f'Indexed {count} jobs')
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index():
+        """重建职位全文检索索引"""
+        count = search_service.rebuild_index()
+        click.echo(f'Indexed {count} jobs')
+
+    @app.cli.command('rebuild-vector-index')
+    def rebuild_vector_index():
+        """重新嵌入全部职位并替换向量索引"""
+        count = vector_index.rebuild_index()
+        click.echo(f'Indexed {count} jobs')
+
+    @app.cli.command('ingest-jds')
+    @click.argument('path', type=click.File('rb'))
+    @click.option('--workers', type=int, default=None, help='并行解析的线程数')
+    @click.option('--report', type=click.File('w'), default=None, help='逐条结果输出文件 (JSON)')
+    def ingest_jds_command(path, workers, report):
+        """从 JSON 数组或 NDJSON 文件批量导入 JD"""
+        result = ingest_jds(parse_batch_payload(path.read()), max_workers=workers)
+        if report:
+            json.dump(result, report, ensure_ascii=False, indent=2)
+        click.echo(json.dumps(result['summary'], ensure_ascii=False))
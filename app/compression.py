@@ -0,0 +1,113 @@
+"""
+Response compression.
+
+Compresses responses with brotli (when the ``brotli`` package is installed)
+or gzip, picked from the client's Accept-Encoding. Only responses whose
+mimetype is in ``COMPRESS_MIMETYPES`` and whose body is at least
+``COMPRESS_MIN_SIZE`` bytes are compressed. Streamed responses (e.g. the SSE
+match stream) are compressed incrementally and flushed after every chunk so
+events still reach the client as they are produced.
+"""
+
+import gzip
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+class _GzipStream:
+    def __init__(self, level):
+        # wbits=31: gzip container
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def _choose_encoding(config):
+    accepted = request.accept_encodings
+    for encoding in config['COMPRESS_ALGORITHMS']:
+        if encoding == 'br' and brotli is None:
+            continue
+        if accepted[encoding] > 0:
+            return encoding
+    return None
+
+
+def _compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESS_BR_LEVEL'])
+    return gzip.compress(data, compresslevel=config['COMPRESS_LEVEL'], mtime=0)
+
+
+def _compress_stream(chunks, encoding, config):
+    if encoding == 'br':
+        stream = _BrotliStream(config['COMPRESS_BR_LEVEL'])
+    else:
+        stream = _GzipStream(config['COMPRESS_LEVEL'])
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = stream.compress(chunk)
+            if data:
+                yield data
+        yield stream.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def init_compression(app):
+    config = app.config
+
+    @app.after_request
+    def compress_response(response):
+        if not config['COMPRESS_ENABLED']:
+            return response
+        if response.mimetype not in config['COMPRESS_MIMETYPES']:
+            return response
+        response.vary.add('Accept-Encoding')
+        if (response.status_code < 200 or response.status_code in (204, 304)
+                or response.direct_passthrough or 'Content-Encoding' in response.headers):
+            return response
+
+        encoding = _choose_encoding(config)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = _compress_stream(response.response, encoding, config)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < config['COMPRESS_MIN_SIZE']:
+                return response
+            response.set_data(_compress(data, encoding, config))
+
+        response.headers['Content-Encoding'] = encoding
+        # The encoded bytes differ from the identity body, so a strong ETag no longer holds
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
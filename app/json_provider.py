@@ -0,0 +1,74 @@
+"""
+JSON provider for API responses.
+
+Uses orjson when it is installed (``JSON_BACKEND=auto`` or ``orjson``) and
+falls back to the standard library otherwise. Both paths serialize
+``datetime``/``date`` as ISO 8601 and, by default, emit UTF-8 without
+``\\uXXXX`` escapes (``JSON_ENSURE_ASCII=false``), which keeps Chinese text
+at one character per character instead of six.
+"""
+
+import json
+import time
+from datetime import date, datetime
+
+from flask.json.provider import DefaultJSONProvider
+
+from app.metrics import add_timing
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(o):
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    def __init__(self, app):
+        super().__init__(app)
+        self.ensure_ascii = app.config.get('JSON_ENSURE_ASCII', False)
+        self.sort_keys = app.config.get('JSON_SORT_KEYS', True)
+        backend = app.config.get('JSON_BACKEND', 'auto')
+        if backend == 'orjson' and orjson is None:
+            raise RuntimeError('JSON_BACKEND=orjson but orjson is not installed')
+        # orjson always writes UTF-8, so it cannot honour ensure_ascii
+        self.backend = 'orjson' if backend != 'stdlib' and orjson is not None and not self.ensure_ascii else 'stdlib'
+
+    def _orjson_options(self, indent=False):
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        if self.backend == 'orjson' and not kwargs:
+            return orjson.dumps(obj, default=_default, option=self._orjson_options()).decode('utf-8')
+        kwargs.setdefault('default', _default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.backend == 'orjson' and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        start = time.perf_counter()
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        if self.backend == 'orjson':
+            body = orjson.dumps(obj, default=_default, option=self._orjson_options(indent))
+        elif indent:
+            body = self.dumps(obj, indent=2)
+        else:
+            body = self.dumps(obj, separators=(',', ':'))
+        add_timing('json', time.perf_counter() - start)
+        return self._app.response_class(body + (b'\n' if isinstance(body, bytes) else '\n'), mimetype=self.mimetype)
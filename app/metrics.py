@@ -0,0 +1,323 @@
+"""
+Request, database and LLM instrumentation.
+
+``init_metrics`` installs request timing hooks and a Prometheus text
+endpoint (``/metrics``). Each request collects a ``RequestTimings``: the
+time spent in SQL (via engine-level cursor events), in LLM upstream calls
+(recorded by ``DevMCPClient.use_tool``) and in JSON encoding. These are
+added to process-wide counters/histograms and, when SERVER_TIMING_ENABLED,
+echoed back in a ``Server-Timing`` header. Streamed responses are recorded
+when the body has been sent and carry no ``Server-Timing`` header, since
+their headers go out before the work is done.
+
+``/metrics`` only answers when METRICS_ENABLED, and only to scrapers that
+present METRICS_TOKEN as a bearer token or connect from METRICS_ALLOWED_IPS.
+
+Metrics live in a per-app ``MetricsRegistry`` (``app.extensions['metrics']``)
+and are per process; with several workers, scrape each one.
+"""
+
+import hmac
+import inspect
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from flask import abort, current_app, g, has_app_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    labels = list(labels)
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(list(zip(self.labelnames, key)), value))
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _render_sample(self, labels, value):
+        return [f'{self.name}{_format_labels(labels)} {_format_value(value)}']
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    value = Counter.value
+    _render_sample = Counter._render_sample
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][i] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state['count'] if state else 0
+
+    def _render_sample(self, labels, state):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, state['counts']):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{_format_labels(labels + [("le", _format_value(bound))])} {cumulative}')
+        lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(state["sum"])}')
+        lines.append(f'{self.name}_count{_format_labels(labels)} {state["count"]}')
+        return lines
+
+
+class MetricsRegistry:
+    """Get-or-create registry of named metrics, rendered in Prometheus text format"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _get(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._get(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._get(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        return '\n'.join(line for metric in metrics for line in metric.render()) + '\n'
+
+
+class RequestTimings:
+    """Time spent per component while serving one request; shared with worker threads"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, name: str, seconds: float, count: int = 1):
+        with self._lock:
+            self.durations[name] = self.durations.get(name, 0.0) + seconds
+            self.counts[name] = self.counts.get(name, 0) + count
+
+
+def get_registry() -> Optional[MetricsRegistry]:
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('metrics')
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """Timings of the request being served, to hand to worker threads via bind_timings()"""
+    if not has_app_context():
+        return None
+    return g.get('request_timings')
+
+
+def bind_timings(timings: Optional[RequestTimings]):
+    """Attribute work done in the current (worker) app context to a request's timings"""
+    if timings is not None:
+        g.request_timings = timings
+
+
+def add_timing(name: str, seconds: float, count: int = 1):
+    timings = current_timings()
+    if timings is not None:
+        timings.add(name, seconds, count)
+
+
+def record_llm_call(model: str, latency: float, status, prompt_tokens: int = 0, completion_tokens: int = 0):
+    """Called by the LLM client after every upstream call (successful or not)"""
+    add_timing('llm', latency)
+    registry = get_registry()
+    if registry is None:
+        return
+    registry.counter('llm_requests_total', 'LLM upstream calls', ('model', 'status')).inc(
+        model=model, status=status)
+    registry.histogram('llm_request_duration_seconds', 'LLM upstream call latency', ('model',),
+                       buckets=LLM_BUCKETS).observe(latency, model=model)
+    registry.counter('llm_prompt_tokens_total', 'Prompt tokens sent to the LLM', ('model',)).inc(
+        prompt_tokens, model=model)
+    registry.counter('llm_completion_tokens_total', 'Completion tokens returned by the LLM', ('model',)).inc(
+        completion_tokens, model=model)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('query_start')
+    if starts:
+        add_timing('db', time.perf_counter() - starts.pop())
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(context):
+    starts = context.connection.info.get('query_start') if context.connection is not None else None
+    if starts:
+        add_timing('db', time.perf_counter() - starts.pop())
+
+
+def _endpoint_label() -> str:
+    # The URL rule rather than the path keeps label cardinality bounded
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def _server_timing(timings: RequestTimings, total: float) -> str:
+    parts = [f'app;dur={total * 1000:.2f}']
+    for name in ('db', 'llm', 'json'):
+        if name in timings.durations:
+            desc = f';desc="{timings.counts[name]} calls"' if name != 'json' else ''
+            parts.append(f'{name};dur={timings.durations[name] * 1000:.2f}{desc}')
+    return ', '.join(parts)
+
+
+def _scrape_allowed(config) -> bool:
+    token = config['METRICS_TOKEN']
+    if token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return True
+    return request.remote_addr in config['METRICS_ALLOWED_IPS']
+
+
+def init_metrics(app):
+    registry = app.extensions.setdefault('metrics', MetricsRegistry())
+    config = app.config
+
+    requests_total = registry.counter('http_requests_total', 'HTTP requests served',
+                                      ('method', 'endpoint', 'status'))
+    request_duration = registry.histogram('http_request_duration_seconds', 'HTTP request latency',
+                                          ('method', 'endpoint'))
+    db_queries = registry.counter('db_queries_total', 'SQL statements executed while serving requests',
+                                  ('endpoint',))
+    db_duration = registry.counter('db_query_duration_seconds_total',
+                                   'Time spent in SQL statements while serving requests', ('endpoint',))
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+        g.request_timings = RequestTimings()
+
+    def observe(method, endpoint, status, start, timings):
+        total = time.perf_counter() - start
+        requests_total.inc(method=method, endpoint=endpoint, status=status)
+        request_duration.observe(total, method=method, endpoint=endpoint)
+        db_queries.inc(timings.counts.get('db', 0), endpoint=endpoint)
+        db_duration.inc(timings.durations.get('db', 0.0), endpoint=endpoint)
+        return total
+
+    @app.after_request
+    def record_request(response):
+        start = g.get('request_start')
+        timings = g.get('request_timings')
+        if start is None or timings is None:
+            return response
+        labels = (request.method, _endpoint_label(), response.status_code)
+
+        # HTTPException pages are also 'streamed' (a ClosingIterator over a body that is
+        # already built); only generator bodies still do work after this hook
+        if response.is_streamed and inspect.isgenerator(response.response):
+            # The body (e.g. the SSE match stream) is produced after this hook and
+            # keeps adding LLM/DB time to g.request_timings, so record once it has
+            # been sent. Headers are already out by then: no Server-Timing here.
+            response.call_on_close(lambda: observe(*labels, start, timings))
+            return response
+
+        g.pop('request_start')
+        g.pop('request_timings')
+        total = observe(*labels, start, timings)
+        if config['SERVER_TIMING_ENABLED']:
+            response.headers['Server-Timing'] = _server_timing(timings, total)
+        return response
+
+    def metrics():
+        if not config['METRICS_ENABLED']:
+            abort(404)
+        if not _scrape_allowed(config):
+            return jsonify({'status': 'error', 'message': 'Metrics access denied'}), 403
+        return app.response_class(registry.render(), content_type=CONTENT_TYPE)
+
+    app.add_url_rule('/metrics', 'metrics', metrics, methods=['GET'])
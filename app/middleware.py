@@ -1,41 +1,168 @@
 from functools import wraps
-from flask import request, jsonify, g, current_app
+from collections import OrderedDict, namedtuple
+import threading
+import time
+from flask import request, jsonify, g, current_app, abort, make_response
+from werkzeug.local import LocalProxy
 import jwt
 from datetime import datetime, timedelta, UTC
 from app.models import User
 from app import db
 from config import Config
 
+# Slim identity used for authentication/authorization; the full User row is
+# only loaded when a view actually touches g.current_user. from_claims marks a
+# principal built from token claims (JWT_TRUST_CLAIMS) rather than the database.
+Principal = namedtuple('Principal', ['id', 'is_admin', 'email', 'from_claims'], defaults=(False,))
+
+class PrincipalCache:
+    """Thread-safe LRU of user id -> Principal with a per-entry TTL"""
+    def __init__(self, max_size=10000, ttl=60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        # user id -> time of last invalidation; token claims issued before it are not trusted
+        self._revoked = OrderedDict()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return principal
+
+    def set(self, principal):
+        with self._lock:
+            self._entries[principal.id] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._revoked[user_id] = time.time()
+            self._revoked.move_to_end(user_id)
+            while len(self._revoked) > self.max_size:
+                self._revoked.popitem(last=False)
+
+    def claims_trusted(self, user_id, issued_at):
+        with self._lock:
+            revoked_at = self._revoked.get(user_id)
+        return revoked_at is None or (issued_at is not None and issued_at > revoked_at)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._revoked.clear()
+
+def get_principal_cache():
+    """Per-app principal cache, created on first use"""
+    cache = current_app.extensions.get('principal_cache')
+    if cache is None:
+        cache = current_app.extensions.setdefault('principal_cache', PrincipalCache(
+            max_size=current_app.config['AUTH_PRINCIPAL_CACHE_SIZE'],
+            ttl=current_app.config['AUTH_PRINCIPAL_CACHE_TTL']
+        ))
+    return cache
+
+def invalidate_principal(user_id):
+    """Drop the cached principal after a change to the user's email or admin status"""
+    get_principal_cache().invalidate(user_id)
+
 def get_token_from_header():
     auth_header = request.headers.get('Authorization')
     if not auth_header or not auth_header.startswith('Bearer '):
         return None
     return auth_header.split(' ')[1]
 
-def generate_token(user_id):
-    expiration = datetime.now(UTC) + timedelta(hours=Config.get_jwt_expiration())
-    return jwt.encode(
-        {'user_id': user_id, 'exp': expiration},
-        Config.JWT_SECRET_KEY,
-        algorithm='HS256'
-    )
+def generate_token(user_id, is_admin=None, email=None):
+    now = datetime.now(UTC)
+    payload = {'user_id': user_id, 'iat': now, 'exp': now + timedelta(hours=Config.get_jwt_expiration())}
+    if is_admin is not None:
+        payload['is_admin'] = bool(is_admin)
+    if email is not None:
+        payload['email'] = email
+    return jwt.encode(payload, Config.JWT_SECRET_KEY, algorithm='HS256')
+
+def _load_principal(payload):
+    """Resolve the token payload to a Principal, hitting the database only on a cache miss"""
+    cache = get_principal_cache()
+    user_id = payload['user_id']
+    principal = cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    if (current_app.config['JWT_TRUST_CLAIMS'] and 'is_admin' in payload
+            and cache.claims_trusted(user_id, payload.get('iat'))):
+        principal = Principal(user_id, payload['is_admin'], payload.get('email'), from_claims=True)
+    else:
+        principal = _principal_from_db(user_id)
+        if principal is None:
+            return None
+    cache.set(principal)
+    return principal
+
+def _principal_from_db(user_id):
+    row = db.session.query(User.id, User.is_admin, User.email).filter(User.id == user_id).first()
+    if row is None:
+        return None
+    return Principal(row.id, bool(row.is_admin), row.email)
+
+def verified_principal():
+    """
+    g.principal for authorization decisions. Claims-based principals are re-read from
+    the database: a revocation is only recorded in the worker that handled it, so an
+    is_admin claim may be stale in every other worker until the token expires.
+    """
+    principal = g.principal
+    if principal.from_claims:
+        principal = _principal_from_db(principal.id)
+        if principal is None:
+            abort(make_response(jsonify({'status': 'error', 'message': 'User not found'}), 401))
+        get_principal_cache().set(principal)
+        g.principal = principal
+    return principal
+
+def _lazy_user(user_id):
+    """Proxy that loads the full User row on first attribute access"""
+    loaded = []
+
+    def load():
+        if not loaded:
+            user = db.session.get(User, user_id)
+            if user is None:
+                # The user was deleted while its principal was still cached
+                invalidate_principal(user_id)
+                abort(make_response(jsonify({'status': 'error', 'message': 'User not found'}), 401))
+            loaded.append(user)
+        return loaded[0]
+
+    return LocalProxy(load)
 
 def jwt_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         token = get_token_from_header()
-        
+
         if not token:
             current_app.logger.error('Missing token in request')
             return jsonify({'status': 'error', 'message': 'Missing token'}), 401
-        
+
         try:
             payload = jwt.decode(token, Config.JWT_SECRET_KEY, algorithms=['HS256'])
-            user = db.session.get(User, payload['user_id'])
-            if not user:
+            principal = _load_principal(payload)
+            if not principal:
                 current_app.logger.error(f'User not found for token payload: {payload}')
                 return jsonify({'status': 'error', 'message': 'User not found'}), 401
-            g.current_user = user
+            g.principal = principal
+            g.current_user = _lazy_user(principal.id)
         except jwt.ExpiredSignatureError:
             current_app.logger.error('Token has expired')
             return jsonify({'status': 'error', 'message': 'Token has expired'}), 401
@@ -45,16 +172,16 @@ def jwt_required(f):
         except Exception as e:
             current_app.logger.error(f'Unexpected error in jwt_required: {str(e)}')
             return jsonify({'status': 'error', 'message': 'Authentication error'}), 401
-            
+
         return f(*args, **kwargs)
     return decorated_function
 
 def admin_required(f):
     @wraps(f)
-    @jwt_required  # 先验证 JWT 并设置 g.current_user
+    @jwt_required  # 先验证 JWT 并设置 g.principal / g.current_user
     def decorated_function(*args, **kwargs):
-        if not g.current_user.is_admin:
-            current_app.logger.error(f'Non-admin user attempted to access admin endpoint: {g.current_user.email}')
+        if not verified_principal().is_admin:
+            current_app.logger.error(f'Non-admin user attempted to access admin endpoint: {g.principal.email}')
             return jsonify({'status': 'error', 'message': 'Admin privileges required'}), 403
         return f(*args, **kwargs)
     return decorated_function
@@ -1,31 +1,42 @@
 from datetime import datetime, UTC
-import bcrypt
+from sqlalchemy.dialects.postgresql import JSONB
 from app import db
+from app.services import password_service
 import json
 
+# Native JSON column: JSONB on PostgreSQL, JSON (text storage) elsewhere.
+# Values are decoded once when the row is loaded and kept on the instance.
+JSONType = db.JSON().with_variant(JSONB(), 'postgresql')
+
 class User(db.Model):
+    __table_args__ = (
+        # Keyset pagination of the admin user list
+        db.Index('ix_user_created_at_id', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
     name = db.Column(db.String(64))
     resume_text = db.Column(db.Text)
-    resume_parsed_data = db.Column(db.Text)  # Stored as JSON string
+    resume_parsed_data = db.Column(JSONType)
     is_admin = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
 
     def set_password(self, password):
-        salt = bcrypt.gensalt()
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+        self.password_hash = password_service.hash_password(password)
 
     def check_password(self, password):
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        return password_service.verify_password(password, self.password_hash)
+
+    def password_needs_rehash(self):
+        return password_service.needs_rehash(self.password_hash)
 
     def set_resume_parsed_data(self, data):
-        self.resume_parsed_data = json.dumps(data)
+        self.resume_parsed_data = data
 
     def get_resume_parsed_data(self):
-        return json.loads(self.resume_parsed_data) if self.resume_parsed_data else None
+        return self.resume_parsed_data or None
 
     def to_dict(self):
         return {
@@ -35,41 +46,135 @@ class User(db.Model):
             'resume_text': self.resume_text,
             'resume_parsed_data': self.get_resume_parsed_data(),
             'is_admin': self.is_admin,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 class Job(db.Model):
+    __table_args__ = (
+        # Keyset pagination of the job list
+        db.Index('ix_job_created_at_id', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     job_title = db.Column(db.String(120), nullable=False, index=True)
     company_name = db.Column(db.String(120), nullable=False)
     location = db.Column(db.String(120), nullable=False, index=True)
-    responsibilities = db.Column(db.Text, nullable=False)  # Stored as JSON string
-    requirements = db.Column(db.Text, nullable=False)      # Stored as JSON string
+    responsibilities = db.Column(JSONType, nullable=False)
+    requirements = db.Column(JSONType, nullable=False)
     raw_jd_text = db.Column(db.Text, nullable=False)
+    # SHA-256 of the whitespace-normalized JD text, used to skip duplicate imports
+    raw_jd_hash = db.Column(db.String(64), index=True)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
 
     def set_responsibilities(self, responsibilities_list):
-        self.responsibilities = json.dumps(responsibilities_list)
+        self.responsibilities = list(responsibilities_list)
 
     def get_responsibilities(self):
-        return json.loads(self.responsibilities) if self.responsibilities else []
+        return self.responsibilities or []
 
     def set_requirements(self, requirements_list):
-        self.requirements = json.dumps(requirements_list)
+        self.requirements = list(requirements_list)
 
     def get_requirements(self):
-        return json.loads(self.requirements) if self.requirements else []
+        return self.requirements or []
 
-    def to_dict(self):
-        return {
+    def to_dict(self, include_raw_jd_text=True):
+        data = {
             'id': self.id,
             'job_title': self.job_title,
             'company_name': self.company_name,
             'location': self.location,
             'responsibilities': self.get_responsibilities(),
             'requirements': self.get_requirements(),
-            'raw_jd_text': self.raw_jd_text,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
+        }
+        if include_raw_jd_text:
+            data['raw_jd_text'] = self.raw_jd_text
+        return data
+
+    def to_prompt_dict(self):
+        """Compact projection used as LLM input (no raw JD text or timestamps)"""
+        return {
+            'id': self.id,
+            'job_title': self.job_title,
+            'company_name': self.company_name,
+            'location': self.location,
+            'responsibilities': self.get_responsibilities(),
+            'requirements': self.get_requirements()
+        }
+
+class JobTerm(db.Model):
+    """Inverted index entry mapping a normalized term to a job"""
+    __tablename__ = 'job_term'
+    job_id = db.Column(db.Integer, db.ForeignKey('job.id', ondelete='CASCADE'), primary_key=True)
+    term = db.Column(db.String(64), primary_key=True, index=True)
+
+class LLMCacheEntry(db.Model):
+    """Cached LLM parse result, keyed by a hash of the normalized input and prompt settings"""
+    __tablename__ = 'llm_cache'
+    key = db.Column(db.String(64), primary_key=True)
+    kind = db.Column(db.String(32), nullable=False)
+    value = db.Column(db.Text, nullable=False)  # Stored as JSON string
+    hit_count = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC))
+    last_accessed_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC), index=True)
+
+class BackgroundTask(db.Model):
+    """Persisted background job so queued work survives restarts"""
+    __tablename__ = 'background_task'
+    id = db.Column(db.String(36), primary_key=True)
+    kind = db.Column(db.String(32), nullable=False)
+    status = db.Column(db.String(16), nullable=False, default='pending', index=True)
+    payload = db.Column(db.Text, nullable=False)  # Stored as JSON string
+    result = db.Column(db.Text)                   # Stored as JSON string
+    error = db.Column(db.Text)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), index=True)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
+    finished_at = db.Column(db.DateTime)
+
+    def get_payload(self):
+        return json.loads(self.payload) if self.payload else {}
+
+    def get_result(self):
+        return json.loads(self.result) if self.result else None
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'result': self.get_result(),
+            'error': self.error,
+            'attempts': self.attempts,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+            'finished_at': self.finished_at
         }
+
+class JobMatch(db.Model):
+    """Persisted LLM match result for a user's resume version against a job version"""
+    __tablename__ = 'job_match'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'resume_version', 'job_id', name='uq_job_match_user_resume_job'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
+    job_id = db.Column(db.Integer, db.ForeignKey('job.id', ondelete='CASCADE'), nullable=False, index=True)
+    resume_version = db.Column(db.String(64), nullable=False)
+    job_version = db.Column(db.DateTime)  # Job.updated_at at match time
+    match_score = db.Column(db.Float)     # NULL: evaluated but not recommended
+    recommendation = db.Column(db.Text)   # Stored as JSON string
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC))
+
+    def get_recommendation(self):
+        return json.loads(self.recommendation) if self.recommendation else None
+
+class CacheVersion(db.Model):
+    """Monotonic per-table version used for HTTP validators of list endpoints"""
+    __tablename__ = 'cache_version'
+    name = db.Column(db.String(32), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC))
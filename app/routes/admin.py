@@ -1,23 +1,50 @@
-from flask import Blueprint, jsonify, g
-from app.middleware import jwt_required, admin_required
+from flask import Blueprint, request, jsonify, g
+from app.middleware import admin_required, invalidate_principal
 from app.models import User
 from app import db
+from app.serializers import USER_LIST_COLUMNS, user_list_item
+from app.services import llm_cache
+from app.services.json_filters import json_array_contains
+from app.services.pagination import cached_count, get_page_size, keyset_page
+from app.mcp_client import get_mcp_client
 
 bp = Blueprint('admin', __name__, url_prefix='/admin')
 
+TECH_STACK_PATH = ('technical_analysis', 'tech_stack')
+
 @bp.route('/users', methods=['GET'])
-@jwt_required
 @admin_required
 def list_users():
-    """List all users (admin only)"""
-    users = User.query.all()
+    """List users page by page, newest first (admin only)"""
+    per_page = get_page_size(request.args, default=50)
+    query = db.session.query(*USER_LIST_COLUMNS)
+    tech_stack = request.args.get('tech_stack', '').strip()
+    if tech_stack:
+        # 按简历解析结果中的技术栈过滤，在数据库端完成
+        query = query.filter(json_array_contains(User.resume_parsed_data, TECH_STACK_PATH, tech_stack))
+    try:
+        rows, next_cursor = keyset_page(query, [User.created_at, User.id], per_page, request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+    pagination = {
+        'per_page': per_page,
+        'next_cursor': next_cursor,
+        'has_next': next_cursor is not None
+    }
+    if request.args.get('include_total', 'false').lower() in ('1', 'true'):
+        pagination['total'] = cached_count(query)
+
     return jsonify({
         'status': 'ok',
-        'users': [user.to_dict() for user in users]
+        'users': [user_list_item(row) for row in rows],
+        'pagination': pagination
     })
 
 @bp.route('/users/<int:user_id>', methods=['GET'])
-@jwt_required
 @admin_required
 def get_user(user_id):
     """Get specific user details (admin only)"""
@@ -28,11 +55,10 @@ def get_user(user_id):
     })
 
 @bp.route('/users/<int:user_id>/toggle-admin', methods=['POST'])
-@jwt_required
 @admin_required
 def toggle_admin_status(user_id):
     """Toggle admin status of a user (admin only)"""
-    if user_id == g.current_user.id:
+    if user_id == g.principal.id:
         return jsonify({
             'status': 'error',
             'message': 'Cannot modify your own admin status'
@@ -41,9 +67,46 @@ def toggle_admin_status(user_id):
     user = User.query.get_or_404(user_id)
     user.is_admin = not user.is_admin
     db.session.commit()
+    invalidate_principal(user.id)
     
     return jsonify({
         'status': 'ok',
         'message': f'Admin status {"enabled" if user.is_admin else "disabled"} for user {user.email}',
         'user': user.to_dict()
     })
+
+@bp.route('/llm_cache', methods=['GET'])
+@admin_required
+def get_llm_cache_stats():
+    """LLM parse cache statistics (admin only)"""
+    return jsonify({
+        'status': 'ok',
+        'stats': llm_cache.stats()
+    })
+
+@bp.route('/llm_cache', methods=['DELETE'])
+@admin_required
+def clear_llm_cache():
+    """Drop all cached LLM parse results (admin only)"""
+    llm_cache.clear()
+    return jsonify({
+        'status': 'ok',
+        'message': 'LLM cache cleared'
+    })
+
+@bp.route('/llm_client', methods=['GET'])
+@admin_required
+def get_llm_client_metrics():
+    """Per-call latency and retry metrics of the LLM client (admin only)"""
+    client = get_mcp_client()
+    if not hasattr(client, 'metrics'):
+        return jsonify({
+            'status': 'error',
+            'message': 'Metrics are not available for this client'
+        }), 404
+    guard = getattr(client, 'guard', None)
+    return jsonify({
+        'status': 'ok',
+        'metrics': client.metrics.snapshot(),
+        'guard': guard.snapshot() if guard is not None else None
+    })
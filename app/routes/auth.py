@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from app.models import User
 from app import db
 from app.middleware import generate_token
+from app.services.password_service import PasswordHasherBusy
 import re
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
@@ -46,7 +47,13 @@ def register():
         }), 400
 
     user = User(email=email, name=name)
-    user.set_password(password)
+    try:
+        user.set_password(password)
+    except PasswordHasherBusy:
+        return jsonify({
+            'status': 'error',
+            'message': 'Server busy, please retry'
+        }), 503
     
     db.session.add(user)
     db.session.commit()
@@ -68,13 +75,24 @@ def login():
 
     user = User.query.filter_by(email=data['email']).first()
     
-    if not user or not user.check_password(data['password']):
+    try:
+        if not user or not user.check_password(data['password']):
+            return jsonify({
+                'status': 'error',
+                'message': 'Invalid credentials'
+            }), 401
+
+        # cost 配置变化后，用本次登录的明文按新 cost 重新哈希
+        if user.password_needs_rehash():
+            user.set_password(data['password'])
+            db.session.commit()
+    except PasswordHasherBusy:
         return jsonify({
             'status': 'error',
-            'message': 'Invalid credentials'
-        }), 401
+            'message': 'Server busy, please retry'
+        }), 503
 
-    token = generate_token(user.id)
+    token = generate_token(user.id, is_admin=user.is_admin, email=user.email)
     
     return jsonify({
         'status': 'ok',
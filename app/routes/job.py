@@ -1,8 +1,15 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, g, abort
 from app import db
 from app.models import Job
 from app.middleware import admin_required, jwt_required
-from app.services.ai_service import parse_job_description
+from app.services.job_service import create_job_from_text, ingest_jds, parse_batch_payload
+from app.services.skill_index import job_ids_select, query_terms
+from app.services import http_cache
+from app.services.search_service import search_jobs
+from app.serializers import JOB_LIST_COLUMNS, job_list_item
+from app.services.pagination import cached_count, get_page_size, keyset_page, offset_page
+from app.services.task_queue import task_queue
+from app.services.upstream_guard import UpstreamUnavailable
 from datetime import datetime, UTC
 import json
 
@@ -23,21 +30,23 @@ def create_job():
     if not data or 'raw_jd_text' not in data:
         return jsonify({'error': 'Missing raw_jd_text'}), 400
 
-    try:
-        # 使用 AI 服务解析 JD
-        parsed_data = parse_job_description(data['raw_jd_text'])
-
-        job = Job(
-            job_title=parsed_data['job_title'],
-            company_name=parsed_data['company_name'],
-            location=parsed_data['location'],
-            raw_jd_text=data['raw_jd_text']
+    if request.args.get('async', 'false').lower() in ('1', 'true'):
+        # 后台解析，立即返回任务 ID
+        task = task_queue.enqueue(
+            'parse_job_description',
+            {'raw_jd_text': data['raw_jd_text']},
+            user_id=g.principal.id
         )
-        job.set_responsibilities(parsed_data['responsibilities'])
-        job.set_requirements(parsed_data['requirements'])
+        return jsonify({
+            'status': 'ok',
+            'message': 'Job parsing queued',
+            'task': task.to_dict()
+        }), 202
 
-        db.session.add(job)
-        db.session.commit()
+    try:
+        # 使用 AI 服务解析 JD
+        job = create_job_from_text(data['raw_jd_text'])
+        http_cache.get_list_cache().clear()
 
         return jsonify({
             'status': 'ok',
@@ -46,6 +55,9 @@ def create_job():
             'job': job.to_dict()
         }), 201
 
+    except UpstreamUnavailable:
+        db.session.rollback()
+        raise
     except ValueError as e:
         current_app.logger.error(f"Value Error in create_job: {str(e)}")
         return jsonify({'error': str(e)}), 400
@@ -54,20 +66,74 @@ def create_job():
         db.session.rollback()
         return jsonify({'error': 'Internal server error'}), 500
 
+@bp.route('/admin/batch_create_jobs', methods=['POST'])
+@admin_required
+def batch_create_jobs():
+    """批量导入 JD，请求体为 JSON 数组/对象或 NDJSON，也可以上传文件字段 file"""
+    upload = request.files.get('file')
+    body = upload.read() if upload else request.get_data()
+
+    try:
+        raw_jd_texts = parse_batch_payload(body)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    if not raw_jd_texts:
+        return jsonify({'status': 'error', 'message': 'No job descriptions provided'}), 400
+
+    if request.args.get('async', 'false').lower() in ('1', 'true'):
+        task = task_queue.enqueue(
+            'ingest_jds',
+            {'raw_jd_texts': raw_jd_texts},
+            user_id=g.principal.id
+        )
+        return jsonify({
+            'status': 'ok',
+            'message': 'Batch ingestion queued',
+            'task': task.to_dict()
+        }), 202
+
+    report = ingest_jds(raw_jd_texts)
+    http_cache.get_list_cache().clear()
+    return jsonify({
+        'status': 'ok',
+        'summary': report['summary'],
+        'results': report['results']
+    })
+
 @bp.route('/', methods=['GET'])
 def list_jobs():
+    # 表版本未变化时直接返回 304 或进程内缓存的响应
+    version, last_modified = http_cache.get_version()
+    return http_cache.cached_list_response(http_cache.list_etag(version), last_modified, build_job_list)
+
+def build_job_list():
     # Get query parameters
+    q = request.args.get('q', '').strip()
     job_title = request.args.get('job_title', '')
     location = request.args.get('location', '')
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    skill = request.args.get('skill', '')
 
-    # Build query
-    query = Job.query
+    # Build query (only the columns the list renders)
+    query = Job.query.with_entities(*JOB_LIST_COLUMNS)
+    if q:
+        # 全文检索，按相关度排序
+        query = search_jobs(query, q)
     if job_title:
         query = query.filter(Job.job_title.ilike(f'%{job_title}%'))
     if location:
         query = query.filter(Job.location.ilike(f'%{location}%'))
+    if skill:
+        # 多个技能用逗号分隔，职位需同时满足
+        terms = query_terms(skill.split(','))
+        if terms:
+            query = query.filter(Job.id.in_(job_ids_select(terms, match_all=True)))
+
+    if 'cursor' in request.args:
+        return list_jobs_by_cursor(query, ranked=bool(q))
+
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 10, type=int)
 
     # Execute query with pagination
     pagination = query.order_by(Job.created_at.desc()).paginate(
@@ -76,16 +142,7 @@ def list_jobs():
     
     return jsonify({
         'status': 'ok',
-        'jobs': [
-            {
-                'id': job.id,
-                'job_title': job.job_title,
-                'company_name': job.company_name,
-                'location': job.location,
-                'created_at': job.created_at.isoformat()
-            }
-            for job in pagination.items
-        ],
+        'jobs': [job_list_item(job) for job in pagination.items],
         'pagination': {
             'total': pagination.total,
             'pages': pagination.pages,
@@ -96,10 +153,50 @@ def list_jobs():
         }
     })
 
-@bp.route('/<int:job_id>', methods=['GET'])
-def get_job(job_id):
-    job = Job.query.get_or_404(job_id)
+def list_jobs_by_cursor(query, ranked):
+    """
+    游标分页: 按 (created_at, id) 降序 keyset 翻页；
+    全文检索结果保持相关度排序，游标记录偏移量
+    """
+    per_page = get_page_size(request.args)
+    cursor = request.args.get('cursor')
+    try:
+        if ranked:
+            jobs, next_cursor = offset_page(query.order_by(Job.created_at.desc(), Job.id.desc()), per_page, cursor)
+        else:
+            jobs, next_cursor = keyset_page(query, [Job.created_at, Job.id], per_page, cursor)
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+    pagination = {
+        'per_page': per_page,
+        'next_cursor': next_cursor,
+        'has_next': next_cursor is not None
+    }
+    if request.args.get('include_total', 'false').lower() in ('1', 'true'):
+        pagination['total'] = cached_count(query)
+
     return jsonify({
         'status': 'ok',
-        'job': job.to_dict()
+        'jobs': [job_list_item(job) for job in jobs],
+        'pagination': pagination
     })
+
+@bp.route('/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    # 先只查询 updated_at，命中缓存校验时不加载和序列化整行
+    row = db.session.query(Job.updated_at).filter(Job.id == job_id).first()
+    if row is None:
+        abort(404)
+    updated_at = row.updated_at
+
+    def build():
+        return jsonify({
+            'status': 'ok',
+            'job': db.session.get(Job, job_id).to_dict()
+        })
+
+    return http_cache.conditional_response(http_cache.job_etag(job_id, updated_at), updated_at, build)
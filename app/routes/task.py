@@ -0,0 +1,22 @@
+from flask import Blueprint, jsonify, g
+from app.middleware import jwt_required, verified_principal
+from app.models import BackgroundTask
+from app import db
+
+bp = Blueprint('task', __name__, url_prefix='/task')
+
+@bp.route('/<task_id>', methods=['GET'])
+@jwt_required
+def get_task(task_id):
+    """查询后台任务状态（任务提交者或管理员可见）"""
+    task = db.session.get(BackgroundTask, task_id)
+    if not task or (task.user_id != g.principal.id and not verified_principal().is_admin):
+        return jsonify({
+            'status': 'error',
+            'message': 'Task not found'
+        }), 404
+
+    return jsonify({
+        'status': 'ok',
+        'task': task.to_dict()
+    })
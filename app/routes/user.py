@@ -1,12 +1,114 @@
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, request, jsonify, g, current_app, Response, stream_with_context
 from app.models import User, Job
 from app import db
-from app.middleware import jwt_required
-from app.services.ai_service import parse_resume, match_jobs
+from app.middleware import jwt_required, invalidate_principal
+from app.serializers import DEFER_RAW_JD_TEXT, job_details
+from app.services import bm25_service, match_store, vector_index
+from app.services.ai_service import (parse_resume, match_jobs_with_ids, iter_match_job_chunks, chunk_error,
+                                     raise_chunk_errors)
+from app.services.ranking_service import extract_resume_profile, rank_jobs, to_recommendations
+from app.services.skill_index import job_ids_select, query_terms, selective_terms
+from app.services.task_queue import task_queue
+from app.services.upstream_guard import UpstreamUnavailable
 from sqlalchemy import or_
 
 bp = Blueprint('user', __name__)
 
+def candidate_jobs(resume_parsed_data, desired_position, desired_location):
+    """
+    通过技能倒排索引选出与简历或期望职位有交集的职位。
+    高频词元没有区分度，不参与召回；其余词元至少命中 MATCH_CANDIDATE_MIN_TERM_HITS 个（不超过词元数）。
+    """
+    profile = extract_resume_profile(resume_parsed_data)
+    terms = selective_terms(query_terms(profile['skills'] + profile['suitable_positions'] + [desired_position]),
+                            current_app.config['MATCH_CANDIDATE_MAX_TERM_DF'])
+    conditions = [Job.location == desired_location]
+    if terms:
+        min_hits = min(current_app.config['MATCH_CANDIDATE_MIN_TERM_HITS'], len(terms))
+        conditions.append(Job.id.in_(job_ids_select(terms, min_hits=min_hits)))
+    return Job.query.options(DEFER_RAW_JD_TEXT).filter(or_(*conditions)).all()
+
+def vector_candidate_jobs(resume_text, resume_parsed_data, desired_position):
+    """通过向量索引按语义召回与简历和期望职位最相近的职位"""
+    profile = extract_resume_profile(resume_parsed_data)
+    text = '\n'.join([desired_position, *profile['suitable_positions'], *profile['skills'], resume_text or ''])
+    hits = vector_index.search_jobs(text, current_app.config['VECTOR_CANDIDATES'])
+    if not hits:
+        return []
+    return Job.query.options(DEFER_RAW_JD_TEXT).filter(Job.id.in_([job_id for job_id, _ in hits])).all()
+
+def attach_job_details(recommendations, job_dict):
+    """为推荐项附加职位的完整信息"""
+    for rec in recommendations:
+        job_id = rec['job_id']
+        if job_id in job_dict:
+            rec['job_details'] = job_dict[job_id]
+    return recommendations
+
+def bm25_match(resume_parsed_data, desired_position, desired_location):
+    """BM25 引擎: 对全部职位按文本相关度排序，不调用大模型"""
+    query = bm25_service.build_query(g.current_user.resume_text, resume_parsed_data, desired_position,
+                                     desired_location)
+    hits = bm25_service.get_index().search(query, current_app.config['MATCH_TOP_K'])
+    jobs = Job.query.options(DEFER_RAW_JD_TEXT).filter(Job.id.in_([job_id for job_id, _ in hits])).all()
+    jobs_by_id = {job.id: job for job in jobs}
+    recommendations = bm25_service.to_recommendations(hits, jobs_by_id, resume_parsed_data, query)
+    return attach_job_details(recommendations, job_details(jobs))
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {current_app.json.dumps(data)}\n\n"
+
+def run_llm_match(resume_parsed_data, desired_position, desired_location, pending_jobs, chunked, on_result):
+    """
+    对待匹配职位调用大模型，每得到一批结果就调用 on_result(job_ids, recommendations)。
+    分块模式下只有全部分块都失败时才抛出异常（全部因上游不可用失败时为 UpstreamUnavailable）。
+    """
+    prompt_jobs = [job.to_prompt_dict() for job in pending_jobs]
+    if not chunked:
+        recommendations, job_ids = match_jobs_with_ids(resume_parsed_data, desired_position, desired_location,
+                                                       prompt_jobs)
+        on_result(job_ids, recommendations)
+        return
+
+    errors = []
+    succeeded = False
+    for result in iter_match_job_chunks(resume_parsed_data, desired_position, desired_location, prompt_jobs):
+        if result['error']:
+            errors.append(chunk_error(result))
+        else:
+            succeeded = True
+            on_result(result['job_ids'], result['recommendations'])
+    if not succeeded:
+        raise_chunk_errors(errors)
+
+def stream_match_results(resume_parsed_data, desired_position, desired_location, pending_jobs, job_dict,
+                         stored, save):
+    """
+    以 Server-Sent Events 推送每个分块的匹配结果，最后推送合并排序后的完整结果
+    （包括已保存的结果）
+    """
+    def generate():
+        chunk_results = []
+        if pending_jobs:
+            prompt_jobs = [job.to_prompt_dict() for job in pending_jobs]
+            for result in iter_match_job_chunks(resume_parsed_data, desired_position, desired_location,
+                                                prompt_jobs):
+                if not result['error']:
+                    save(result['job_ids'], result['recommendations'])
+                attach_job_details(result['recommendations'], job_dict)
+                chunk_results.extend(result['recommendations'])
+                yield sse_event('chunk', result)
+        yield sse_event('done', {
+            'status': 'ok',
+            'recommendations': attach_job_details(match_store.merge_matches(stored, chunk_results), job_dict)
+        })
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @bp.route('/profile', methods=['GET'])
 @jwt_required
 def get_profile():
@@ -30,6 +132,7 @@ def update_profile():
         g.current_user.name = data['name']
         
     db.session.commit()
+    invalidate_principal(g.principal.id)
     
     return jsonify({
         'status': 'ok',
@@ -55,11 +158,30 @@ def update_resume():
         }), 400
 
     g.current_user.resume_text = data['resume_text']
+
+    if request.args.get('async', 'false').lower() in ('1', 'true'):
+        # 先保存简历文本，解析交给后台任务
+        # 简历变更后旧的匹配结果不再有效
+        match_store.clear_user_matches(g.principal.id)
+        db.session.commit()
+        task = task_queue.enqueue(
+            'parse_resume',
+            {'user_id': g.principal.id, 'resume_text': data['resume_text']},
+            user_id=g.principal.id
+        )
+        return jsonify({
+            'status': 'ok',
+            'message': 'Resume saved, parsing queued',
+            'task': task.to_dict()
+        }), 202
     
     try:
         # 解析简历文本
         parsed_data = parse_resume(data['resume_text'])
         g.current_user.set_resume_parsed_data(parsed_data)
+        # 解析完成后再删除旧匹配结果: 删除会开启写事务，在 SQLite 上先删除会在整个大模型调用期间
+        # 持有写锁，阻塞其他请求的写入
+        match_store.clear_user_matches(g.principal.id)
         db.session.commit()
         
         return jsonify({
@@ -67,6 +189,10 @@ def update_resume():
             'message': 'Resume updated and parsed successfully',
             'parsed_data': parsed_data
         })
+    except UpstreamUnavailable:
+        # 交给全局错误处理返回 503
+        db.session.rollback()
+        raise
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -93,6 +219,8 @@ def parse_current_resume():
             'status': 'ok',
             'parsed_data': parsed_data
         })
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         return jsonify({
             'status': 'error',
@@ -106,12 +234,45 @@ def match_jobs_route():
     # 获取查询参数
     desired_position = request.args.get('desired_position')
     desired_location = request.args.get('desired_location')
+    mode = request.args.get('mode', 'llm')
+    engine = request.args.get('engine', 'rules')
+    retrieval = request.args.get('retrieval', 'index')
+    chunked = request.args.get('chunked', 'false').lower() in ('1', 'true')
+    stream = request.args.get('stream', 'false').lower() in ('1', 'true')
+    refresh = request.args.get('refresh', 'false').lower() in ('1', 'true')
     
     if not desired_position or not desired_location:
         return jsonify({
             'status': 'error',
             'message': 'Both desired_position and desired_location are required'
         }), 400
+
+    if mode not in ('llm', 'local'):
+        return jsonify({
+            'status': 'error',
+            'message': 'mode must be one of: llm, local'
+        }), 400
+
+    if engine not in ('rules', 'bm25'):
+        return jsonify({
+            'status': 'error',
+            'message': 'engine must be one of: rules, bm25'
+        }), 400
+
+    if retrieval not in ('index', 'vector'):
+        return jsonify({
+            'status': 'error',
+            'message': 'retrieval must be one of: index, vector'
+        }), 400
+
+    if retrieval == 'vector':
+        try:
+            vector_index.get_index()
+        except RuntimeError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 501
     
     # 检查是否有简历数据
     if not g.current_user.resume_text:
@@ -119,6 +280,21 @@ def match_jobs_route():
             'status': 'error',
             'message': 'Please upload your resume first'
         }), 400
+
+    if engine == 'bm25':
+        # 本地 BM25 引擎不需要大模型，有解析结果时用其中的技术栈加权
+        try:
+            return jsonify({
+                'status': 'ok',
+                'engine': engine,
+                'recommendations': bm25_match(g.current_user.get_resume_parsed_data(), desired_position,
+                                              desired_location)
+            })
+        except bm25_service.BM25Unavailable as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 501
     
     # 确保有解析后的简历数据
     resume_parsed_data = g.current_user.get_resume_parsed_data()
@@ -127,6 +303,8 @@ def match_jobs_route():
             resume_parsed_data = parse_resume(g.current_user.resume_text)
             g.current_user.set_resume_parsed_data(resume_parsed_data)
             db.session.commit()
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
             return jsonify({
                 'status': 'error',
@@ -134,41 +312,78 @@ def match_jobs_route():
             }), 500
     
     try:
-        # 初步筛选职位
-        jobs = Job.query.filter(
-            or_(
-                Job.job_title.ilike(f'%{desired_position}%'),
-                Job.location == desired_location
-            )
-        ).limit(20).all()
+        # 候选职位: 技能倒排索引（默认）或向量索引语义召回
+        if retrieval == 'vector':
+            candidates = vector_candidate_jobs(g.current_user.resume_text, resume_parsed_data, desired_position)
+        else:
+            candidates = candidate_jobs(resume_parsed_data, desired_position, desired_location)
+
+        # 本地预排序，只把前 K 个职位交给大模型
+        ranked = rank_jobs(
+            resume_parsed_data,
+            desired_position,
+            desired_location,
+            candidates,
+            weights=current_app.config['MATCH_RANK_WEIGHTS'],
+            top_k=current_app.config['MATCH_TOP_K']
+        )
         
-        if not jobs:
+        if not ranked:
             return jsonify({
                 'status': 'ok',
                 'recommendations': [],
                 'message': 'No matching jobs found'
             })
         
-        # 调用职位匹配
-        recommendations = match_jobs(
-            resume_parsed_data,
-            desired_position,
-            desired_location,
-            [job.to_dict() for job in jobs]
-        )
-        
+        jobs = [item.job for item in ranked]
+        job_dict = job_details(jobs)
+        if mode == 'local':
+            recommendations = to_recommendations(ranked)
+            return jsonify({
+                'status': 'ok',
+                'mode': mode,
+                'recommendations': attach_job_details(recommendations, job_dict)
+            })
+
+        # 已保存且职位未更新的结果直接复用，只把新增或更新过的职位交给大模型
+        user_id = g.principal.id
+        version = match_store.resume_version(resume_parsed_data, desired_position, desired_location)
+        stored = {} if refresh else match_store.load_matches(user_id, version, job_dict)
+        pending_jobs = [job for job in jobs if job.id not in stored]
+        jobs_by_id = {job.id: job for job in pending_jobs}
+
+        def save(job_ids, recs):
+            match_store.save_matches(user_id, version, [jobs_by_id[i] for i in job_ids if i in jobs_by_id],
+                                     recs, job_ids)
+
+        if stream:
+            # 分块并发匹配，每块完成后立即推送
+            return stream_match_results(resume_parsed_data, desired_position, desired_location,
+                                        pending_jobs, job_dict, stored, save)
+
+        new_recommendations = []
+        if pending_jobs:
+            def on_result(job_ids, recs):
+                save(job_ids, recs)
+                new_recommendations.extend(recs)
+
+            run_llm_match(resume_parsed_data, desired_position, desired_location, pending_jobs,
+                          chunked, on_result)
+        recommendations = match_store.merge_matches(stored, new_recommendations)
+
         # 获取推荐职位的完整信息
-        job_dict = {job.id: job.to_dict() for job in jobs}
-        for rec in recommendations:
-            job_id = rec['job_id']
-            if job_id in job_dict:
-                rec['job_details'] = job_dict[job_id]
+        attach_job_details(recommendations, job_dict)
         
         return jsonify({
             'status': 'ok',
-            'recommendations': recommendations
+            'mode': mode,
+            'recommendations': recommendations,
+            'matched_jobs': len(pending_jobs),
+            'reused_jobs': len(stored)
         })
         
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         return jsonify({
             'status': 'error',
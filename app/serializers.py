@@ -0,0 +1,62 @@
+"""
+Per-view serializers.
+
+List views select only the columns they render (``*_COLUMNS``) with
+``with_entities`` and serialize the resulting rows, so large text columns
+are never read and no JSON columns are decoded for list pages.
+"""
+
+from sqlalchemy.orm import defer
+
+from app import db
+from app.models import Job, User
+
+JOB_LIST_COLUMNS = (Job.id, Job.job_title, Job.company_name, Job.location, Job.created_at)
+
+USER_LIST_COLUMNS = (
+    User.id,
+    User.email,
+    User.name,
+    User.is_admin,
+    User.created_at,
+    User.resume_text.isnot(None).label('has_resume')
+)
+
+# Loader option for views that need full jobs except the raw JD text
+DEFER_RAW_JD_TEXT = defer(Job.raw_jd_text)
+
+
+def job_list_item(row):
+    return {
+        'id': row.id,
+        'job_title': row.job_title,
+        'company_name': row.company_name,
+        'location': row.location,
+        'created_at': row.created_at
+    }
+
+
+def user_list_item(row):
+    return {
+        'id': row.id,
+        'email': row.email,
+        'name': row.name,
+        'is_admin': bool(row.is_admin),
+        'has_resume': bool(row.has_resume),
+        'created_at': row.created_at
+    }
+
+
+def job_details(jobs):
+    """
+    Full job dicts keyed by id for jobs loaded with DEFER_RAW_JD_TEXT;
+    the raw JD texts are fetched in one query instead of one per job.
+    """
+    jobs = list(jobs)
+    raw_texts = dict(
+        db.session.query(Job.id, Job.raw_jd_text).filter(Job.id.in_([job.id for job in jobs]))
+    ) if jobs else {}
+    return {
+        job.id: dict(job.to_dict(include_raw_jd_text=False), raw_jd_text=raw_texts.get(job.id))
+        for job in jobs
+    }
@@ -1,16 +1,24 @@
+import asyncio
 import json
-from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
 from flask import current_app
-from app.mcp_client import get_mcp_client
+from app.mcp_client import get_async_mcp_client, get_mcp_client
+from app.metrics import bind_timings, current_timings
+from app.services import llm_cache, single_flight
+from app.services.prompt_budget import compact_resume_data, estimate_tokens, fit_jobs_to_budget
+from app.services.upstream_guard import UpstreamUnavailable
 
-def parse_job_description(raw_jd_text: str) -> Dict[str, Any]:
-    """
-    使用 SiliconFlow API 解析职位描述文本，提取结构化信息
-    """
-    messages = [
-        {
-            "role": "system",
-            "content": """你是一个专业的职位信息提取助手。请从职位描述文本中提取以下关键信息并以JSON格式返回:
+# 提示词版本，修改提示词时需同步更新以使旧缓存失效
+JD_PROMPT_VERSION = 'jd-v1'
+RESUME_PROMPT_VERSION = 'resume-v1'
+MATCH_PROMPT_VERSION = 'match-v1'
+TEMPERATURE = 0.7
+
+def _cache_key(text: str, prompt_version: str) -> str:
+    return llm_cache.make_key(text, prompt_version, current_app.config['LLM_MODEL'], TEMPERATURE)
+
+JD_SYSTEM_PROMPT = """你是一个专业的职位信息提取助手。请从职位描述文本中提取以下关键信息并以JSON格式返回:
 {
     "job_title": "职位名称",
     "company_name": "公司名称",
@@ -20,51 +28,8 @@ def parse_job_description(raw_jd_text: str) -> Dict[str, Any]:
 }
 
 请确保每个字段都有值。如果某些信息在文本中未明确提供，请根据上下文合理推断。"""
-        },
-        {
-            "role": "user",
-            "content": raw_jd_text
-        }
-    ]
-
-    try:
-        mcp = get_mcp_client()
-        response = mcp.use_tool(
-            server_name="siliconflow",
-            tool_name="json_mode",
-            arguments={
-                "messages": messages,
-                "response_format": {"type": "json_object"},
-                "temperature": 0.7
-            }
-        )
-        
-        # 解析响应
-        parsed_data = json.loads(response.get("content", "{}"))
-        
-        # 确保所有必需字段都存在
-        required_fields = ['job_title', 'company_name', 'location', 'responsibilities', 'requirements']
-        for field in required_fields:
-            if field not in parsed_data:
-                raise ValueError(f"Missing required field: {field}")
-        
-        return parsed_data
-
-    except Exception as e:
-        current_app.logger.error(f"Error parsing job description: {str(e)}")
-        raise ValueError(f"Failed to parse job description: {str(e)}")
 
-def parse_resume(resume_text: str) -> Dict[str, Any]:
-    """
-    使用 SiliconFlow API 深入解析简历文本，分析用户能力和潜力
-    """
-    if not resume_text:
-        raise ValueError("Resume text cannot be empty")
-
-    messages = [
-        {
-            "role": "system",
-            "content": """你是一位资深的人才评估专家。请对简历进行深入分析，并以以下JSON格式返回分析结果:
+RESUME_SYSTEM_PROMPT = """你是一位资深的人才评估专家。请对简历进行深入分析，并以以下JSON格式返回分析结果:
 {
     "technical_analysis": {
         "tech_stack": ["技术1", "技术2", ...],
@@ -95,59 +60,140 @@ def parse_resume(resume_text: str) -> Dict[str, Any]:
         "challenges": "可能面临的挑战"
     }
 }"""
+
+# 简历解析结果必须包含的部分，缺失时填充默认值
+RESUME_SECTIONS = [
+    'technical_analysis', 
+    'experience_analysis', 
+    'education_analysis', 
+    'core_competencies', 
+    'career_analysis'
+]
+
+def _json_mode_arguments(messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    return {
+        "messages": messages,
+        "response_format": {"type": "json_object"},
+        "temperature": TEMPERATURE
+    }
+
+def _system_user_messages(system_prompt: str, text: str) -> List[Dict[str, str]]:
+    return [
+        {
+            "role": "system",
+            "content": system_prompt
         },
         {
             "role": "user",
-            "content": resume_text
+            "content": text
         }
     ]
 
+def _parse_jd_response(response: Dict[str, Any]) -> Dict[str, Any]:
+    # 解析响应
+    parsed_data = json.loads(response.get("content", "{}"))
+    
+    # 确保所有必需字段都存在
+    required_fields = ['job_title', 'company_name', 'location', 'responsibilities', 'requirements']
+    for field in required_fields:
+        if field not in parsed_data:
+            raise ValueError(f"Missing required field: {field}")
+    return parsed_data
+
+def _parse_resume_response(response: Dict[str, Any]) -> Dict[str, Any]:
+    # 解析响应
+    parsed_data = json.loads(response.get("content", "{}"))
+    
+    # 如果缺少任何部分，提供默认值
+    for section in RESUME_SECTIONS:
+        if section not in parsed_data:
+            parsed_data[section] = {"note": "无法从简历中提取相关信息"}
+    return parsed_data
+
+def _cached_parse(kind: str, label: str, text: str, prompt_version: str, system_prompt: str,
+                  parse_response: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+    """带结果缓存的单次解析调用，kind 为缓存条目类型，label 用于日志和错误信息"""
+    cache_key = _cache_key(text, prompt_version)
+    cached = llm_cache.lookup(cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        mcp = get_mcp_client()
-        response = mcp.use_tool(
+        # 相同参数的在途调用合并为一次上游请求
+        response = single_flight.use_tool(
+            get_mcp_client(),
             server_name="siliconflow",
             tool_name="json_mode",
-            arguments={
-                "messages": messages,
-                "response_format": {"type": "json_object"},
-                "temperature": 0.7
-            }
+            arguments=_json_mode_arguments(_system_user_messages(system_prompt, text))
         )
-        
-        # 解析响应
-        parsed_data = json.loads(response.get("content", "{}"))
-        
-        # 验证关键字段
-        required_sections = [
-            'technical_analysis', 
-            'experience_analysis', 
-            'education_analysis', 
-            'core_competencies', 
-            'career_analysis'
-        ]
-        
-        # 如果缺少任何部分，提供默认值
-        for section in required_sections:
-            if section not in parsed_data:
-                parsed_data[section] = {"note": "无法从简历中提取相关信息"}
-        
-        return parsed_data
+        parsed_data = parse_response(response)
+    except UpstreamUnavailable:
+        # 熔断/限流不包装为 ValueError，由接口返回 503
+        raise
+    except Exception as e:
+        current_app.logger.error(f"Error parsing {label}: {str(e)}")
+        raise ValueError(f"Failed to parse {label}: {str(e)}")
+
+    # 缓存写入失败只记录警告，不影响已经拿到的解析结果
+    llm_cache.store(cache_key, kind, parsed_data)
+    return parsed_data
 
+async def _cached_parse_async(kind: str, label: str, text: str, prompt_version: str, system_prompt: str,
+                              parse_response: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+    """_cached_parse 的异步版本"""
+    cache_key = _cache_key(text, prompt_version)
+    cached = llm_cache.lookup(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        mcp = get_async_mcp_client()
+        response = await mcp.use_tool_async(
+            server_name="siliconflow",
+            tool_name="json_mode",
+            arguments=_json_mode_arguments(_system_user_messages(system_prompt, text))
+        )
+        parsed_data = parse_response(response)
+    except UpstreamUnavailable:
+        # 熔断/限流不包装为 ValueError，由接口返回 503
+        raise
     except Exception as e:
-        current_app.logger.error(f"Error parsing resume: {str(e)}")
-        raise ValueError(f"Failed to parse resume: {str(e)}")
+        current_app.logger.error(f"Error parsing {label}: {str(e)}")
+        raise ValueError(f"Failed to parse {label}: {str(e)}")
 
-def match_jobs(resume_data: Dict[str, Any], desired_position: str, desired_location: str, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # 缓存写入失败只记录警告，不影响已经拿到的解析结果
+    llm_cache.store(cache_key, kind, parsed_data)
+    return parsed_data
+
+def parse_job_description(raw_jd_text: str) -> Dict[str, Any]:
     """
-    使用 SiliconFlow API 进行深度职位匹配分析
+    使用 SiliconFlow API 解析职位描述文本，提取结构化信息
     """
-    if not resume_data or not jobs:
-        raise ValueError("Resume data and jobs list cannot be empty")
+    return _cached_parse('job_description', 'job description', raw_jd_text, JD_PROMPT_VERSION,
+                         JD_SYSTEM_PROMPT, _parse_jd_response)
 
-    messages = [
-        {
-            "role": "system",
-            "content": """你是一位专业的职业发展顾问。请基于候选人的简历分析和职位要求进行智能匹配分析，并以JSON数组格式返回结果。每个匹配项应包含:
+async def parse_job_description_async(raw_jd_text: str) -> Dict[str, Any]:
+    """parse_job_description 的异步版本"""
+    return await _cached_parse_async('job_description', 'job description', raw_jd_text, JD_PROMPT_VERSION,
+                                     JD_SYSTEM_PROMPT, _parse_jd_response)
+
+def parse_resume(resume_text: str) -> Dict[str, Any]:
+    """
+    使用 SiliconFlow API 深入解析简历文本，分析用户能力和潜力
+    """
+    if not resume_text:
+        raise ValueError("Resume text cannot be empty")
+    return _cached_parse('resume', 'resume', resume_text, RESUME_PROMPT_VERSION,
+                         RESUME_SYSTEM_PROMPT, _parse_resume_response)
+
+async def parse_resume_async(resume_text: str) -> Dict[str, Any]:
+    """parse_resume 的异步版本"""
+    if not resume_text:
+        raise ValueError("Resume text cannot be empty")
+    return await _cached_parse_async('resume', 'resume', resume_text, RESUME_PROMPT_VERSION,
+                                     RESUME_SYSTEM_PROMPT, _parse_resume_response)
+
+MATCH_SYSTEM_PROMPT = """你是一位专业的职业发展顾问。请基于候选人的简历分析和职位要求进行智能匹配分析，并以JSON数组格式返回结果。每个匹配项应包含:
 {
     "job_id": 职位ID,
     "match_score": 匹配度评分(0-100),
@@ -162,6 +208,13 @@ def match_jobs(resume_data: Dict[str, Any], desired_position: str, desired_locat
 2. 发展潜力: 职位是否符合职业发展轨迹、快速适应和成长潜力、核心竞争力发挥
 3. 职业规划: 是否符合发展方向、成长空间、工作地点匹配度
 4. 综合评估: 优势和不足、需要提升的方面、入职后的发展建议"""
+
+def _build_match_messages(resume_data: Dict[str, Any], desired_position: str, desired_location: str,
+                          jobs: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    return [
+        {
+            "role": "system",
+            "content": MATCH_SYSTEM_PROMPT
         },
         {
             "role": "user",
@@ -174,47 +227,210 @@ def match_jobs(resume_data: Dict[str, Any], desired_position: str, desired_locat
         }
     ]
 
+def _normalize_recommendations(result: Any) -> List[Dict[str, Any]]:
+    """校验并规范化大模型返回的推荐列表，按匹配度降序排列"""
+    # 如果返回的是对象且包含recommendations字段，使用该字段
+    if isinstance(result, dict) and 'recommendations' in result:
+        result = result['recommendations']
+    # 如果返回的不是列表，返回空列表
+    elif not isinstance(result, list):
+        return []
+
+    # 验证和规范化每个推荐项
+    validated_recommendations = []
+    for item in result:
+        if not isinstance(item, dict) or 'job_id' not in item:
+            continue
+        # 大模型有时把 job_id 返回为字符串，统一转换为整数，无法转换的项丢弃
+        try:
+            job_id = int(item['job_id'])
+        except (TypeError, ValueError):
+            continue
+        validated_recommendations.append({
+            'job_id': job_id,
+            'match_score': item.get('match_score', 0),
+            'match_analysis': item.get('match_analysis', '未提供匹配分析'),
+            'advantages': item.get('advantages', []),
+            'challenges': item.get('challenges', []),
+            'suggestions': item.get('suggestions', [])
+        })
+
+    # 按匹配度排序
+    validated_recommendations.sort(key=lambda x: x['match_score'], reverse=True)
+
+    return validated_recommendations
+
+def match_jobs(resume_data: Dict[str, Any], desired_position: str, desired_location: str, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    使用 SiliconFlow API 进行深度职位匹配分析
+    """
+    recommendations, _ = match_jobs_with_ids(resume_data, desired_position, desired_location, jobs)
+    return recommendations
+
+def _prepare_match(resume_data: Dict[str, Any], desired_position: str, desired_location: str,
+                   jobs: List[Dict[str, Any]]) -> Tuple[List[Dict[str, str]], List[Dict[str, Any]], int]:
+    """精简简历并按 token 预算截断职位列表，返回 (messages, 实际发送的职位, 提示词 token 估算)"""
+    if not resume_data or not jobs:
+        raise ValueError("Resume data and jobs list cannot be empty")
+
+    resume_data = compact_resume_data(resume_data)
+    fixed_tokens = estimate_tokens(MATCH_SYSTEM_PROMPT) + estimate_tokens([resume_data, desired_position, desired_location])
+    budget = current_app.config['MATCH_PROMPT_TOKEN_BUDGET']
+    prompt_jobs, prompt_tokens = fit_jobs_to_budget(fixed_tokens, jobs, budget)
+    if len(prompt_jobs) < len(jobs):
+        current_app.logger.warning(
+            f"match_jobs prompt over budget ({budget} tokens), dropped {len(jobs) - len(prompt_jobs)} jobs"
+        )
+
+    messages = _build_match_messages(resume_data, desired_position, desired_location, prompt_jobs)
+    return messages, prompt_jobs, prompt_tokens
+
+def _parse_match_response(response: Dict[str, Any], prompt_jobs: List[Dict[str, Any]],
+                          prompt_tokens: int) -> Tuple[List[Dict[str, Any]], List[Any]]:
+    content = response.get("content", "[]")
+    current_app.logger.info(
+        f"match_jobs tokens (estimated): prompt={prompt_tokens}, response={estimate_tokens(content)}, jobs={len(prompt_jobs)}"
+    )
+
+    # 解析响应
+    result = json.loads(content)
+    return _normalize_recommendations(result), [job.get('id') for job in prompt_jobs]
+
+def match_jobs_with_ids(resume_data: Dict[str, Any], desired_position: str, desired_location: str,
+                        jobs: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Any]]:
+    """
+    同 match_jobs，额外返回实际发送给大模型的职位 ID
+    （超出 token 预算被丢弃的职位不在其中）
+    """
+    messages, prompt_jobs, prompt_tokens = _prepare_match(resume_data, desired_position, desired_location, jobs)
+
     try:
-        mcp = get_mcp_client()
-        response = mcp.use_tool(
+        # 相同参数的在途调用合并为一次上游请求
+        response = single_flight.use_tool(
+            get_mcp_client(),
             server_name="siliconflow",
             tool_name="json_mode",
-            arguments={
-                "messages": messages,
-                "response_format": {"type": "json_object"},
-                "temperature": 0.7
-            }
+            arguments=_json_mode_arguments(messages)
         )
-        
-        # 解析响应
-        result = json.loads(response.get("content", "[]"))
-        
-        # 如果返回的是对象且包含recommendations字段，使用该字段
-        if isinstance(result, dict) and 'recommendations' in result:
-            result = result['recommendations']
-        # 如果返回的不是列表，返回空列表
-        elif not isinstance(result, list):
-            return []
-        
-        # 验证和规范化每个推荐项
-        validated_recommendations = []
-        for item in result:
-            if isinstance(item, dict) and 'job_id' in item:
-                recommendation = {
-                    'job_id': item['job_id'],
-                    'match_score': item.get('match_score', 0),
-                    'match_analysis': item.get('match_analysis', '未提供匹配分析'),
-                    'advantages': item.get('advantages', []),
-                    'challenges': item.get('challenges', []),
-                    'suggestions': item.get('suggestions', [])
-                }
-                validated_recommendations.append(recommendation)
-        
-        # 按匹配度排序
-        validated_recommendations.sort(key=lambda x: x['match_score'], reverse=True)
-        
-        return validated_recommendations
+        return _parse_match_response(response, prompt_jobs, prompt_tokens)
 
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         current_app.logger.error(f"Error matching jobs: {str(e)}")
         raise ValueError(f"Failed to match jobs: {str(e)}")
+
+async def match_jobs_with_ids_async(resume_data: Dict[str, Any], desired_position: str, desired_location: str,
+                                    jobs: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Any]]:
+    """match_jobs_with_ids 的异步版本"""
+    messages, prompt_jobs, prompt_tokens = _prepare_match(resume_data, desired_position, desired_location, jobs)
+
+    try:
+        mcp = get_async_mcp_client()
+        response = await mcp.use_tool_async(
+            server_name="siliconflow",
+            tool_name="json_mode",
+            arguments=_json_mode_arguments(messages)
+        )
+        return _parse_match_response(response, prompt_jobs, prompt_tokens)
+
+    except UpstreamUnavailable:
+        raise
+    except Exception as e:
+        current_app.logger.error(f"Error matching jobs: {str(e)}")
+        raise ValueError(f"Failed to match jobs: {str(e)}")
+
+async def match_jobs_async(resume_data: Dict[str, Any], desired_position: str, desired_location: str,
+                           jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """match_jobs 的异步版本"""
+    recommendations, _ = await match_jobs_with_ids_async(resume_data, desired_position, desired_location, jobs)
+    return recommendations
+
+def _match_chunk_in_context(app, timings, resume_data, desired_position, desired_location, chunk):
+    with app.app_context():
+        # 工作线程中的大模型和数据库耗时计入发起请求的 Server-Timing
+        bind_timings(timings)
+        return match_jobs_with_ids(resume_data, desired_position, desired_location, chunk)
+
+def iter_match_job_chunks(resume_data: Dict[str, Any], desired_position: str, desired_location: str,
+                          jobs: List[Dict[str, Any]], chunk_size: Optional[int] = None,
+                          max_workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    将候选职位分块并发匹配，每完成一块就产出一次:
+    {"chunk": 块序号, "job_ids": [...], "recommendations": [...], "error": 错误信息或 None,
+     "retry_after": 上游不可用（熔断/限流）时建议的重试秒数，否则为 None}
+    成功时 job_ids 为实际发送给大模型的职位。单块失败不影响其他块。
+    """
+    if not resume_data or not jobs:
+        raise ValueError("Resume data and jobs list cannot be empty")
+
+    app = current_app._get_current_object()
+    chunk_size = chunk_size or app.config['MATCH_CHUNK_SIZE']
+    max_workers = max_workers or app.config['MATCH_CHUNK_WORKERS']
+    chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+    timings = current_timings()
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks)), thread_name_prefix='match-chunk') as executor:
+        futures = {
+            executor.submit(_match_chunk_in_context, app, timings, resume_data, desired_position, desired_location, chunk): index
+            for index, chunk in enumerate(chunks)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            job_ids = [job.get('id') for job in chunks[index]]
+            try:
+                recommendations, job_ids = future.result()
+                yield {'chunk': index, 'job_ids': job_ids, 'recommendations': recommendations, 'error': None,
+                       'retry_after': None}
+            except Exception as e:
+                current_app.logger.error(f"Error matching job chunk {index}: {str(e)}")
+                retry_after = e.retry_after if isinstance(e, UpstreamUnavailable) else None
+                yield {'chunk': index, 'job_ids': job_ids, 'recommendations': [], 'error': str(e),
+                       'retry_after': retry_after}
+
+def chunk_error(result: Dict[str, Any]) -> Exception:
+    if result['retry_after'] is not None:
+        return UpstreamUnavailable(result['error'], retry_after=result['retry_after'])
+    return ValueError(result['error'])
+
+def raise_chunk_errors(errors: List[Exception]):
+    """全部分块失败时抛出异常；都是因为上游不可用时保留 UpstreamUnavailable"""
+    if all(isinstance(e, UpstreamUnavailable) for e in errors):
+        raise errors[0]
+    raise ValueError(f"Failed to match jobs: {errors[0]}")
+
+def merge_recommendations(chunk_results: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """合并各块推荐结果并按匹配度重新排序"""
+    merged = [rec for recs in chunk_results for rec in recs]
+    merged.sort(key=lambda x: x['match_score'], reverse=True)
+    return merged
+
+def match_jobs_chunked(resume_data: Dict[str, Any], desired_position: str, desired_location: str,
+                       jobs: List[Dict[str, Any]], chunk_size: Optional[int] = None,
+                       max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """分块并发版本的 match_jobs，只有全部分块都失败时才抛出异常"""
+    results = list(iter_match_job_chunks(resume_data, desired_position, desired_location, jobs,
+                                         chunk_size=chunk_size, max_workers=max_workers))
+    if all(result['error'] for result in results):
+        raise_chunk_errors([chunk_error(result) for result in results])
+    return merge_recommendations([result['recommendations'] for result in results])
+
+async def match_jobs_chunked_async(resume_data: Dict[str, Any], desired_position: str, desired_location: str,
+                                   jobs: List[Dict[str, Any]], chunk_size: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    match_jobs_chunked 的异步版本: 所有分块在同一事件循环中并发请求，
+    不占用额外线程，并发数由异步客户端的全局上限控制
+    """
+    if not resume_data or not jobs:
+        raise ValueError("Resume data and jobs list cannot be empty")
+
+    chunk_size = chunk_size or current_app.config['MATCH_CHUNK_SIZE']
+    chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+    results = await asyncio.gather(
+        *(match_jobs_async(resume_data, desired_position, desired_location, chunk) for chunk in chunks),
+        return_exceptions=True
+    )
+    errors = [result for result in results if isinstance(result, Exception)]
+    if len(errors) == len(results):
+        raise_chunk_errors(errors)
+    return merge_recommendations([result for result in results if not isinstance(result, Exception)])
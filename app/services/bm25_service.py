@@ -0,0 +1,198 @@
+"""
+本地 BM25 匹配引擎，完全不调用大模型。
+
+职位文档为 职位名称 + 地点 + 任职要求 + 原始 JD，查询为简历原文 + 技术栈 + 期望职位和地点，
+分词复用 text_utils.tokenize（英文按词、中文按字二元组）。职位侧的 BM25 权重预先算好，
+存为 scipy 稀疏矩阵（职位 × 词元，按列存储），一次查询只取出查询词对应的列并加权求和。
+
+索引按进程缓存，以 http_cache 的 job 表版本号判断是否过期。职位增删改后由后台线程重建，
+重建完成前查询继续使用旧索引（新职位暂时检索不到，已删除的职位在回表时过滤），
+只有进程内还没有索引时才在请求中同步构建。
+需要 numpy 和 scipy（可选依赖），缺失时抛出 BM25Unavailable。
+"""
+
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from flask import current_app
+from sqlalchemy import select
+
+from app import db
+from app.models import Job
+from app.services import http_cache
+from app.services.ranking_service import extract_resume_profile
+from app.services.text_utils import term_set, tokenize
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # pragma: no cover - 可选依赖
+    np = None
+    sparse = None
+
+# 技术栈和期望职位中的词元在查询中的权重（简历原文中的词元为 1）
+PROFILE_TERM_WEIGHT = 2.0
+
+_build_lock = threading.Lock()
+_rebuild_lock = threading.Lock()
+
+
+class BM25Unavailable(RuntimeError):
+    """本地 BM25 引擎的可选依赖 numpy / scipy 未安装"""
+
+
+def job_document(job_title: str, location: str, requirements: Sequence[str], raw_jd_text: str) -> List[str]:
+    """职位文档的词元"""
+    parts = [job_title, location, *(r for r in requirements or [] if isinstance(r, str)), raw_jd_text]
+    return [token for part in parts if part for token in tokenize(part)]
+
+
+class BM25Index:
+    """职位 BM25 索引: weights[i, j] 为词元 j 对第 i 个职位的 BM25 得分贡献"""
+    def __init__(self, job_ids, vocabulary: Dict[str, int], weights, version=None):
+        self.job_ids = job_ids
+        self.vocabulary = vocabulary
+        self.weights = weights
+        self.version = version
+
+    @classmethod
+    def build(cls, documents: Sequence[Tuple[int, List[str]]], k1: float = 1.5, b: float = 0.75,
+              version=None) -> 'BM25Index':
+        """documents 为 [(job_id, 词元列表)]"""
+        if np is None:
+            raise BM25Unavailable('The bm25 engine requires numpy and scipy (pip install numpy scipy)')
+
+        vocabulary: Dict[str, int] = {}
+        rows, cols, freqs = [], [], []
+        lengths = np.zeros(len(documents), dtype=np.float32)
+        for row, (_, tokens) in enumerate(documents):
+            lengths[row] = len(tokens)
+            for term, freq in Counter(tokens).items():
+                rows.append(row)
+                cols.append(vocabulary.setdefault(term, len(vocabulary)))
+                freqs.append(freq)
+
+        rows = np.asarray(rows, dtype=np.int32)
+        cols = np.asarray(cols, dtype=np.int32)
+        tf = np.asarray(freqs, dtype=np.float32)
+        n = len(documents)
+        df = np.bincount(cols, minlength=len(vocabulary)).astype(np.float32)
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        avgdl = float(lengths.mean()) if n and lengths.mean() > 0 else 1.0
+        norm = k1 * (1 - b + b * lengths[rows] / avgdl)
+        data = idf[cols] * tf * (k1 + 1) / (tf + norm)
+
+        weights = sparse.csc_matrix((data, (rows, cols)), shape=(n, len(vocabulary)), dtype=np.float32)
+        job_ids = np.asarray([job_id for job_id, _ in documents], dtype=np.int64)
+        return cls(job_ids, vocabulary, weights, version)
+
+    def __len__(self) -> int:
+        return len(self.job_ids)
+
+    def score(self, query: Dict[str, float]):
+        """所有职位对查询 {词元: 权重} 的 BM25 得分"""
+        columns = [self.vocabulary[term] for term in query if term in self.vocabulary]
+        if not columns or not len(self):
+            return np.zeros(len(self), dtype=np.float32)
+        term_weights = np.asarray([query[term] for term in query if term in self.vocabulary], dtype=np.float32)
+        return np.asarray(self.weights[:, columns] @ term_weights).ravel()
+
+    def search(self, query: Dict[str, float], top_k: int) -> List[Tuple[int, float]]:
+        """得分最高的 top_k 个职位 [(job_id, score)]，得分为 0 的不返回；同分时按职位 ID 排序"""
+        scores = self.score(query)
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        order = sorted(candidates, key=lambda i: (-scores[i], self.job_ids[i]))
+        return [(int(self.job_ids[i]), float(scores[i])) for i in order]
+
+
+def build_query(resume_text: str, resume_data: Optional[Dict[str, Any]], desired_position: str,
+                desired_location: str) -> Dict[str, float]:
+    """简历原文中的词元权重为 1，技术栈、期望职位和地点中的词元额外加权"""
+    query: Dict[str, float] = {term: 1.0 for term in tokenize(resume_text or '')}
+    profile = extract_resume_profile(resume_data or {})
+    for term in term_set(profile['skills'] + [desired_position or '', desired_location or '']):
+        query[term] = query.get(term, 0.0) + PROFILE_TERM_WEIGHT
+    return query
+
+
+def _load_documents() -> List[Tuple[int, List[str]]]:
+    rows = db.session.execute(
+        select(Job.id, Job.job_title, Job.location, Job.requirements, Job.raw_jd_text).order_by(Job.id)
+    )
+    return [(row.id, job_document(row.job_title, row.location, row.requirements, row.raw_jd_text)) for row in rows]
+
+
+def _build(version) -> BM25Index:
+    config = current_app.config
+    return BM25Index.build(_load_documents(), k1=config['BM25_K1'], b=config['BM25_B'], version=version)
+
+
+def _rebuild(app):
+    with app.app_context():
+        try:
+            # 先读版本号再读职位，重建期间再有修改时新索引版本落后，下一次查询会再次触发重建
+            index = _build(http_cache.get_version())
+            app.extensions['bm25_index'] = index
+        except Exception as e:
+            app.logger.error(f"Failed to rebuild BM25 index: {str(e)}")
+
+
+def _schedule_rebuild():
+    """启动后台重建，已有重建线程在运行时不重复启动"""
+    app = current_app._get_current_object()
+    with _rebuild_lock:
+        thread = app.extensions.get('bm25_rebuild')
+        if thread is not None and thread.is_alive():
+            return
+        thread = threading.Thread(target=_rebuild, args=(app,), name='bm25-rebuild', daemon=True)
+        app.extensions['bm25_rebuild'] = thread
+        thread.start()
+
+
+def get_index() -> BM25Index:
+    """当前进程的 BM25 索引，job 表版本变化后在后台重建，重建完成前返回旧索引"""
+    index = current_app.extensions.get('bm25_index')
+    if index is None:
+        with _build_lock:
+            index = current_app.extensions.get('bm25_index')
+            if index is None:
+                index = _build(http_cache.get_version())
+                current_app.extensions['bm25_index'] = index
+        return index
+    if index.version != http_cache.get_version():
+        _schedule_rebuild()
+    return index
+
+
+def to_recommendations(hits: Sequence[Tuple[int, float]], jobs_by_id: Dict[int, Any],
+                       resume_data: Optional[Dict[str, Any]], query: Dict[str, float]) -> List[Dict[str, Any]]:
+    """
+    转换为与 ai_service.match_jobs 相同结构的推荐列表。
+    BM25 得分没有固定上限，match_score 为相对本次最高分的百分比，只用于同一次查询内的比较。
+    """
+    if not hits:
+        return []
+    best = hits[0][1]
+    skills = extract_resume_profile(resume_data or {})['skills']
+    recommendations = []
+    for job_id, score in hits:
+        job = jobs_by_id.get(job_id)
+        if job is None:
+            continue
+        requirements = job.get_requirements()
+        job_terms = term_set(requirements) | set(tokenize(job.job_title))
+        matched_terms = sorted(term for term in query if term in job_terms)
+        matched_skills = [skill for skill in skills if set(tokenize(skill)) and set(tokenize(skill)) <= job_terms]
+        missing_terms = sorted(t for t in term_set(requirements) if t.isascii() and not t.isdigit() and t not in query)
+        recommendations.append({
+            'job_id': job_id,
+            'match_score': round(score / best * 100),
+            'match_analysis': f"BM25 文本相关度 {score:.2f}，命中关键词: {', '.join(matched_terms[:10]) or '无'}",
+            'advantages': [f"掌握 {skill}" for skill in matched_skills],
+            'challenges': [f"缺少 {term} 相关经验" for term in missing_terms],
+            'suggestions': [f"补充 {term} 相关技能" for term in missing_terms[:3]],
+        })
+    return recommendations
@@ -0,0 +1,152 @@
+"""
+职位接口的 HTTP 缓存。
+
+- 单个职位以 updated_at 作为 ETag / Last-Modified
+- 职位列表以 cache_version 表中的 job 版本号作为表级版本，
+  Job 的增删改（ORM 事件和批量写入）在同一事务中递增版本号，多进程一致
+- 请求携带匹配的 If-None-Match / If-Modified-Since 时直接返回 304
+- 可选的进程内列表响应缓存，以 (表版本, 查询参数) 为键，版本变化后旧条目自然失效
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, UTC
+from typing import Callable, Optional, Tuple
+
+from flask import current_app, request
+from sqlalchemy import event, insert, select, update
+
+from app import db
+from app.models import CacheVersion, Job
+
+JOB_TABLE = 'job'
+
+_version_table = CacheVersion.__table__
+
+
+def _utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def bump_version(connection, name: str = JOB_TABLE):
+    """在调用方的事务中递增表版本"""
+    values = {'version': _version_table.c.version + 1, 'updated_at': _utcnow()}
+    result = connection.execute(update(_version_table).where(_version_table.c.name == name).values(**values))
+    if result.rowcount == 0:
+        connection.execute(insert(_version_table).values(name=name, version=1, updated_at=_utcnow()))
+
+
+def get_version(name: str = JOB_TABLE) -> Tuple[int, Optional[datetime]]:
+    row = db.session.execute(
+        select(_version_table.c.version, _version_table.c.updated_at).where(_version_table.c.name == name)
+    ).first()
+    return (row.version, row.updated_at) if row else (0, None)
+
+
+@event.listens_for(Job, 'after_insert')
+@event.listens_for(Job, 'after_update')
+@event.listens_for(Job, 'after_delete')
+def _bump_job_version(mapper, connection, job):
+    bump_version(connection, JOB_TABLE)
+
+
+def _not_modified(etag: str, last_modified: Optional[datetime]) -> bool:
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        # HTTP 日期只精确到秒
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def conditional_response(etag: str, last_modified: Optional[datetime], build: Callable):
+    """
+    命中 If-None-Match / If-Modified-Since 时返回 304，否则调用 build() 生成响应。
+    两种情况都带上 ETag、Last-Modified 和 Cache-Control。
+    ETag 为弱校验器，压缩后的响应体仍然有效。
+    """
+    if last_modified is not None:
+        last_modified = last_modified.replace(tzinfo=UTC)
+
+    if _not_modified(etag, last_modified):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.make_response(build())
+        if response.status_code != 200:
+            return response
+
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['JOB_CACHE_MAX_AGE']
+    return response
+
+
+def job_etag(job_id: int, updated_at: Optional[datetime]) -> str:
+    stamp = updated_at.strftime('%Y%m%d%H%M%S%f') if updated_at else '0'
+    return f'job-{job_id}-{stamp}'
+
+
+def list_etag(version: int) -> str:
+    """表版本和规范化后的查询参数共同决定列表内容"""
+    args = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    digest = hashlib.sha1(args.encode('utf-8')).hexdigest()[:16]
+    return f'jobs-{version}-{digest}'
+
+
+class ResponseCache:
+    """线程安全的 LRU，保存列表响应的 JSON 响应体"""
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def set(self, key, body: bytes):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def get_list_cache() -> ResponseCache:
+    cache = current_app.extensions.get('job_list_cache')
+    if cache is None:
+        cache = current_app.extensions.setdefault(
+            'job_list_cache', ResponseCache(current_app.config['JOB_LIST_CACHE_SIZE'])
+        )
+    return cache
+
+
+def cached_list_response(etag: str, last_modified: Optional[datetime], build: Callable):
+    """conditional_response 加上进程内响应缓存（仅缓存 200 响应）"""
+    cache = get_list_cache()
+
+    def build_cached():
+        body = cache.get(etag)
+        if body is not None:
+            return current_app.response_class(body, mimetype='application/json')
+        response = current_app.make_response(build())
+        if response.status_code == 200:
+            cache.set(etag, response.get_data())
+        return response
+
+    return conditional_response(etag, last_modified, build_cached)
@@ -0,0 +1,165 @@
+"""
+职位写入逻辑，供同步接口、后台任务和批量导入共用。
+"""
+
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+from flask import current_app
+
+from app import db
+from app.models import Job
+from app.services import http_cache, search_service, skill_index, vector_index
+from app.services.ai_service import parse_job_description
+from app.services.llm_cache import normalize_input
+
+
+def raw_jd_hash(raw_jd_text: str) -> str:
+    """合并空白后的 JD 文本的 SHA-256，仅有排版差异的 JD 视为同一条"""
+    return hashlib.sha256(normalize_input(raw_jd_text).encode('utf-8')).hexdigest()
+
+
+def build_job(raw_jd_text: str, parsed_data: Dict[str, Any]) -> Job:
+    """根据解析结果构造职位对象（不写入数据库）"""
+    job = Job(
+        job_title=parsed_data['job_title'],
+        company_name=parsed_data['company_name'],
+        location=parsed_data['location'],
+        raw_jd_text=raw_jd_text,
+        raw_jd_hash=raw_jd_hash(raw_jd_text)
+    )
+    job.set_responsibilities(parsed_data['responsibilities'])
+    job.set_requirements(parsed_data['requirements'])
+    return job
+
+
+def create_job_from_text(raw_jd_text: str) -> Job:
+    """解析 JD 文本并创建职位，同时写入技能索引"""
+    parsed_data = parse_job_description(raw_jd_text)
+    job = build_job(raw_jd_text, parsed_data)
+
+    db.session.add(job)
+    db.session.flush()
+    skill_index.index_job(job)
+    db.session.commit()
+    # 向量索引不在数据库事务中，提交后再追加
+    vector_index.index_jobs([job])
+    return job
+
+
+def parse_batch_payload(body: bytes) -> List[str]:
+    """
+    解析批量导入的请求体，支持:
+    - JSON 数组: ["JD1", "JD2"] 或 [{"raw_jd_text": "JD1"}, ...]
+    - JSON 对象: {"raw_jd_texts": [...]}
+    - NDJSON: 每行一个 JSON 字符串或 {"raw_jd_text": ...} 对象
+    """
+    text = body.decode('utf-8-sig').strip()
+    if not text:
+        return []
+
+    try:
+        data = json.loads(text)
+        if isinstance(data, dict):
+            data = data.get('raw_jd_texts', [])
+        items = data if isinstance(data, list) else [data]
+    except json.JSONDecodeError:
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    if len(items) > current_app.config['JD_BATCH_MAX_ITEMS']:
+        raise ValueError(f"Batch exceeds {current_app.config['JD_BATCH_MAX_ITEMS']} items")
+    return [item.get('raw_jd_text', '') if isinstance(item, dict) else item for item in items]
+
+
+def _existing_job_ids(hashes: List[str], chunk_size: int) -> Dict[str, int]:
+    """{raw_jd_hash: 已存在的职位 ID}"""
+    existing = {}
+    for start in range(0, len(hashes), chunk_size):
+        chunk = hashes[start:start + chunk_size]
+        rows = db.session.query(Job.id, Job.raw_jd_hash).filter(Job.raw_jd_hash.in_(chunk)).order_by(Job.id)
+        for job_id, jd_hash in rows:
+            existing.setdefault(jd_hash, job_id)
+    return existing
+
+
+def _parse_in_context(app, raw_jd_text: str):
+    with app.app_context():
+        try:
+            return parse_job_description(raw_jd_text), None
+        except Exception as e:
+            return None, str(e)
+
+
+def _insert_jobs(jobs: List[Job]):
+    db.session.bulk_save_objects(jobs, return_defaults=True)
+    # bulk_save_objects 不触发 ORM 事件，需要显式同步索引和列表缓存版本
+    skill_index.index_jobs(jobs)
+    search_service.index_jobs(jobs)
+    http_cache.bump_version(db.session.connection())
+    db.session.commit()
+    vector_index.index_jobs(jobs)
+
+
+def ingest_jds(raw_jd_texts: Iterable[Any], max_workers: Optional[int] = None,
+               chunk_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    批量导入 JD: 批内去重、跳过已存在的 JD、用有界线程池并行解析，
+    再按块批量写入。返回汇总及逐条结果（与输入顺序一致）。
+    """
+    app = current_app._get_current_object()
+    max_workers = max_workers or app.config['JD_BATCH_WORKERS']
+    chunk_size = chunk_size or app.config['JD_BATCH_CHUNK_SIZE']
+
+    texts = list(raw_jd_texts)
+    results: List[Dict[str, Any]] = [{'index': i} for i in range(len(texts))]
+
+    # 批内去重（按规范化文本）
+    first_seen: Dict[str, int] = {}
+    for i, text in enumerate(texts):
+        if not isinstance(text, str) or not text.strip():
+            results[i].update(status='invalid', error='Missing raw_jd_text')
+            continue
+        key = raw_jd_hash(text)
+        if key in first_seen:
+            results[i].update(status='duplicate', duplicate_of=first_seen[key])
+            continue
+        first_seen[key] = i
+
+    # 跳过数据库中已存在的相同 JD，与批内去重同样按规范化文本比较
+    existing = _existing_job_ids(list(first_seen), chunk_size)
+    to_parse = []
+    for key, i in first_seen.items():
+        if key in existing:
+            results[i].update(status='exists', job_id=existing[key])
+        else:
+            to_parse.append(i)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='jd-ingest') as executor:
+        parsed = list(executor.map(lambda i: _parse_in_context(app, texts[i]), to_parse))
+
+    pending: List[tuple] = []
+    for i, (parsed_data, error) in zip(to_parse, parsed):
+        if error:
+            results[i].update(status='failed', error=error)
+            continue
+        pending.append((i, build_job(texts[i], parsed_data)))
+
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+        try:
+            _insert_jobs([job for _, job in chunk])
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error inserting JD batch: {str(e)}")
+            for i, _ in chunk:
+                results[i].update(status='failed', error='Database error')
+            continue
+        for i, job in chunk:
+            results[i].update(status='created', job_id=job.id)
+
+    summary: Dict[str, int] = {'total': len(texts)}
+    for result in results:
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+    return {'summary': summary, 'results': results}
@@ -0,0 +1,35 @@
+"""
+JSON 列的服务端过滤条件。
+
+- PostgreSQL: 构造嵌套文档用 JSONB 的 @> 包含运算，可以使用 jsonb_path_ops GIN 索引
+- SQLite: 用 json_each 展开路径上的数组
+- 其他方言: 退化为对 JSON 文本的 LIKE 匹配
+"""
+
+import json
+from typing import Any, Sequence
+
+from sqlalchemy import Text, cast, func, literal, select, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app import db
+
+
+def _dialect_name() -> str:
+    return db.session.get_bind().dialect.name
+
+
+def json_array_contains(column, path: Sequence[str], value: Any):
+    """column 在 path 处的 JSON 数组包含 value，如 (['technical_analysis', 'tech_stack'], 'Python')"""
+    dialect = _dialect_name()
+    if dialect == 'postgresql':
+        document: Any = [value]
+        for key in reversed(path):
+            document = {key: document}
+        return type_coerce(column, JSONB).contains(document)
+
+    if dialect == 'sqlite':
+        elements = func.json_each(column, '$.' + '.'.join(path)).table_valued('value')
+        return select(literal(1)).select_from(elements).where(elements.c.value == value).exists()
+
+    return cast(column, Text).like(f'%{json.dumps(value)}%')
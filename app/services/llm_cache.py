@@ -0,0 +1,192 @@
+"""
+大模型解析结果缓存。
+
+以 (规范化输入文本, 提示词版本, 模型, temperature) 的 SHA-256 为键，
+把 parse_job_description / parse_resume 的结果持久化到 llm_cache 表。
+条目超过 LLM_CACHE_TTL 秒视为过期，总数超过 LLM_CACHE_MAX_ENTRIES 时
+按最近访问时间淘汰。
+
+读写使用独立的数据库连接，不会提交调用方会话中未完成的修改。SQLite 同一时刻只允许一个写事务，
+调用方会话已有未提交的写入时，独立连接的写入会一直等待本请求自己持有的写锁直到超时，
+因此这种情况下缓存写入（包括命中计数）推迟到调用方事务结束后执行。
+
+缓存只是加速手段: 读写失败（表被锁、等待超时、表不存在等）只记录警告，读取失败按未命中处理，
+不会让解析请求失败。
+"""
+
+import hashlib
+import json
+import re
+import threading
+from datetime import datetime, timedelta, UTC
+from typing import Any, Dict, Optional
+
+from flask import current_app
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import LLMCacheEntry
+
+_table = LLMCacheEntry.__table__
+# 支持 INSERT ... ON CONFLICT 的方言
+_UPSERT_DIALECTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+# session.info 中等待调用方事务结束后执行的缓存写入
+_DEFERRED_KEY = 'llm_cache_deferred_writes'
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+
+
+def _incr(name: str, amount: int = 1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def _utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def normalize_input(text: str) -> str:
+    """合并空白字符，使仅有排版差异的输入命中同一条缓存"""
+    return re.sub(r'\s+', ' ', text or '').strip()
+
+
+def make_key(text: str, prompt_version: str, model: str, temperature: float) -> str:
+    payload = json.dumps(
+        [normalize_input(text), prompt_version, model, temperature],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def is_enabled() -> bool:
+    return current_app.config.get('LLM_CACHE_ENABLED', True)
+
+
+def lookup(key: str) -> Optional[Dict[str, Any]]:
+    """读取缓存，未命中或已过期返回 None"""
+    if not is_enabled():
+        return None
+
+    cutoff = _utcnow() - timedelta(seconds=current_app.config['LLM_CACHE_TTL'])
+    try:
+        with db.engine.connect() as conn:
+            value = conn.execute(
+                select(_table.c.value).where(_table.c.key == key, _table.c.created_at >= cutoff)
+            ).scalar()
+        result = json.loads(value) if value is not None else None
+    except Exception as e:
+        current_app.logger.warning(f"LLM cache lookup failed: {str(e)}")
+        result = None
+    if result is None:
+        _incr('misses')
+        return None
+    _write(_touch, key, _utcnow())
+    _incr('hits')
+    return result
+
+
+def _touch(key: str, accessed_at: datetime):
+    with db.engine.begin() as conn:
+        conn.execute(
+            update(_table)
+            .where(_table.c.key == key)
+            .values(hit_count=_table.c.hit_count + 1, last_accessed_at=accessed_at)
+        )
+
+
+def store(key: str, kind: str, value: Dict[str, Any]):
+    """写入缓存并按 LRU 淘汰超出上限的条目"""
+    if not is_enabled():
+        return
+    _write(_store, key, kind, value)
+
+
+def _store(key: str, kind: str, value: Dict[str, Any]):
+    now = _utcnow()
+    row = {
+        'key': key,
+        'kind': kind,
+        'value': json.dumps(value, ensure_ascii=False),
+        'hit_count': 0,
+        'created_at': now,
+        'last_accessed_at': now
+    }
+    with db.engine.begin() as conn:
+        dialect_insert = _UPSERT_DIALECTS.get(conn.dialect.name)
+        if dialect_insert is None:
+            conn.execute(delete(_table).where(_table.c.key == key))
+            conn.execute(insert(_table).values(**row))
+        else:
+            # 并发写入同一个键时不会因主键冲突失败，以后写者为准
+            stmt = dialect_insert(_table).values(**row)
+            conn.execute(stmt.on_conflict_do_update(
+                index_elements=[_table.c.key],
+                set_={name: stmt.excluded[name] for name in row if name != 'key'}
+            ))
+        evicted = _evict(conn, current_app.config['LLM_CACHE_MAX_ENTRIES'])
+    _incr('writes')
+    if evicted:
+        _incr('evictions', evicted)
+
+
+def _session_holds_write_lock() -> bool:
+    """当前请求的会话是否已在 SQLite 上开始写事务"""
+    session = db.session()
+    if not session.in_transaction() or db.engine.dialect.name != 'sqlite':
+        return False
+    # pysqlite 在第一条写语句前才发出 BEGIN，in_transaction 即是否持有写锁
+    return session.connection().connection.dbapi_connection.in_transaction
+
+
+def _write(func, *args):
+    """立即执行缓存写入，调用方会话持有 SQLite 写锁时推迟到其事务结束后；失败只记录警告"""
+    try:
+        if _session_holds_write_lock():
+            app = current_app._get_current_object()
+            db.session().info.setdefault(_DEFERRED_KEY, []).append((app, func, args))
+        else:
+            func(*args)
+    except Exception as e:
+        current_app.logger.warning(f"LLM cache write failed: {str(e)}")
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _run_deferred_writes(session, transaction):
+    if transaction.parent is not None or _DEFERRED_KEY not in session.info:
+        return
+    for app, func, args in session.info.pop(_DEFERRED_KEY):
+        # 提交或回滚都会走到这里，缓存内容与调用方事务无关，照常写入；失败不影响调用方
+        with app.app_context():
+            try:
+                func(*args)
+            except Exception as e:
+                app.logger.warning(f"Deferred LLM cache write failed: {str(e)}")
+
+
+def _evict(conn, max_entries: int) -> int:
+    total = conn.execute(select(func.count()).select_from(_table)).scalar()
+    overflow = total - max_entries
+    if overflow <= 0:
+        return 0
+    oldest = select(_table.c.key).order_by(_table.c.last_accessed_at).limit(overflow)
+    keys = list(conn.execute(oldest).scalars())
+    conn.execute(delete(_table).where(_table.c.key.in_(keys)))
+    return len(keys)
+
+
+def clear():
+    with db.engine.begin() as conn:
+        conn.execute(delete(_table))
+
+
+def stats() -> Dict[str, Any]:
+    """返回本进程的命中统计和缓存条目数"""
+    with _stats_lock:
+        result = dict(_stats)
+    lookups = result['hits'] + result['misses']
+    result['hit_rate'] = round(result['hits'] / lookups, 4) if lookups else 0.0
+    with db.engine.connect() as conn:
+        result['entries'] = conn.execute(select(func.count()).select_from(_table)).scalar()
+    return result
@@ -0,0 +1,104 @@
+"""
+职位匹配结果持久化。
+
+以 (用户, 职位, 简历版本, 职位版本) 为键保存大模型的匹配结果:
+- 简历版本: 简历解析结果、期望职位、期望地点和匹配提示词版本的 SHA-256
+- 职位版本: 匹配时职位的 updated_at
+
+重复请求直接读取已保存的结果，只有新增或更新过的职位才需要重新调用大模型。
+大模型评估过但未推荐的职位保存为 match_score 为空的记录，避免每次重复发送。
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from flask import current_app
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import Job, JobMatch
+from app.services.ai_service import MATCH_PROMPT_VERSION
+
+
+def resume_version(resume_data: Dict[str, Any], desired_position: str, desired_location: str) -> str:
+    payload = json.dumps(
+        [resume_data, desired_position, desired_location, MATCH_PROMPT_VERSION,
+         current_app.config['LLM_MODEL']],
+        ensure_ascii=False,
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def load_matches(user_id: int, version: str, job_ids: Iterable[int]) -> Dict[int, Optional[Dict[str, Any]]]:
+    """
+    读取仍然有效（职位未更新）的匹配结果。
+    返回 {job_id: 推荐项}，评估过但未推荐的职位对应 None。
+    """
+    job_ids = list(job_ids)
+    if not job_ids:
+        return {}
+    rows = db.session.execute(
+        select(JobMatch.job_id, JobMatch.recommendation)
+        .join(Job, Job.id == JobMatch.job_id)
+        .where(
+            JobMatch.user_id == user_id,
+            JobMatch.resume_version == version,
+            JobMatch.job_id.in_(job_ids),
+            JobMatch.job_version.is_not_distinct_from(Job.updated_at)
+        )
+    )
+    return {job_id: json.loads(rec) if rec else None for job_id, rec in rows}
+
+
+def save_matches(user_id: int, version: str, jobs: List[Job],
+                 recommendations: List[Dict[str, Any]], evaluated_ids: Iterable[Any]):
+    """
+    保存一批匹配结果。evaluated_ids 为实际发送给大模型的职位，
+    其中没有出现在推荐列表里的职位记为未推荐。
+    """
+    evaluated = set(evaluated_ids)
+    by_job = {rec['job_id']: rec for rec in recommendations}
+    rows = [
+        {
+            'user_id': user_id,
+            'job_id': job.id,
+            'resume_version': version,
+            'job_version': job.updated_at,
+            'match_score': by_job[job.id]['match_score'] if job.id in by_job else None,
+            'recommendation': json.dumps(by_job[job.id], ensure_ascii=False) if job.id in by_job else None
+        }
+        for job in jobs
+        if job.id in evaluated or job.id in by_job
+    ]
+    if not rows:
+        return
+
+    try:
+        db.session.execute(delete(JobMatch).where(
+            JobMatch.user_id == user_id,
+            JobMatch.resume_version == version,
+            JobMatch.job_id.in_([row['job_id'] for row in rows])
+        ))
+        db.session.execute(JobMatch.__table__.insert(), rows)
+        db.session.commit()
+    except IntegrityError:
+        # 并发的相同请求已经写入，保留对方的结果即可
+        db.session.rollback()
+        current_app.logger.info(f"Job matches for user {user_id} already saved by a concurrent request")
+
+
+def merge_matches(stored: Dict[int, Optional[Dict[str, Any]]],
+                  recommendations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """合并已保存和新计算的推荐项，按匹配度降序排列"""
+    merged = [dict(rec) for rec in stored.values() if rec]
+    merged.extend(recommendations)
+    merged.sort(key=lambda x: x['match_score'], reverse=True)
+    return merged
+
+
+def clear_user_matches(user_id: int):
+    """删除用户的全部匹配结果（简历变更后旧结果不会再被命中）"""
+    db.session.execute(delete(JobMatch).where(JobMatch.user_id == user_id))
@@ -0,0 +1,139 @@
+"""
+游标（keyset）分页。
+
+按 (created_at, id) 降序排列，游标记录上一页最后一行的排序键，
+下一页通过 WHERE (created_at, id) < (游标值) 定位，不使用 OFFSET，
+借助 (created_at, id) 复合索引，任意深度的翻页代价都与第一页相同。
+游标是 base64 编码的 JSON，对客户端不透明。
+
+首列可以为 NULL（早期数据没有 created_at）: NULL 行在各数据库上统一排在最后，
+按其余列降序，单独查询，不影响非空部分走索引。
+
+总数是可选的，按查询语句缓存 PAGINATION_COUNT_TTL 秒，
+在缓存期内可能与实际行数略有出入。
+"""
+
+import base64
+import binascii
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from flask import current_app
+from sqlalchemy import tuple_
+
+_count_lock = threading.Lock()
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    raw = json.dumps(payload, separators=(',', ':'), default=lambda v: v.isoformat())
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    """解析游标，格式不正确时抛出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(payload, dict):
+        raise ValueError('Invalid cursor')
+    return payload
+
+
+def _parse_key(columns: Sequence, values: Any) -> List[Any]:
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError('Invalid cursor')
+    parsed = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        if value is None:
+            # 只有首列可以为 NULL
+            if i:
+                raise ValueError('Invalid cursor')
+        elif column.type.python_type is datetime:
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise ValueError('Invalid cursor')
+        parsed.append(value)
+    return parsed
+
+
+def keyset_page(query, columns: Sequence, limit: int, cursor: Optional[str] = None) -> Tuple[List[Any], Optional[str]]:
+    """
+    按 columns 降序取一页，返回 (本页行, 下一页游标)，没有下一页时游标为 None。
+    行可以是 ORM 对象或包含同名列的 Row。
+    """
+    lead, rest = columns[0], columns[1:]
+
+    def null_rows(count, after=None):
+        # 首列为 NULL 的行，排在所有非空行之后
+        null_query = query.filter(lead.is_(None))
+        if after:
+            null_query = null_query.filter(tuple_(*rest) < tuple_(*after))
+        return null_query.order_by(*[column.desc() for column in rest]).limit(count).all()
+
+    key = _parse_key(columns, decode_cursor(cursor).get('k')) if cursor else None
+    if key is not None and key[0] is None:
+        rows = null_rows(limit + 1, key[1:])
+    else:
+        page_query = query.filter(lead.isnot(None))
+        if key is not None:
+            page_query = page_query.filter(tuple_(*columns) < tuple_(*key))
+        rows = page_query.order_by(*[column.desc() for column in columns]).limit(limit + 1).all()
+        if len(rows) <= limit:
+            rows += null_rows(limit + 1 - len(rows))
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor({'k': [getattr(rows[-1], column.key) for column in columns]})
+    return rows, next_cursor
+
+
+def offset_page(query, limit: int, cursor: Optional[str] = None) -> Tuple[List[Any], Optional[str]]:
+    """
+    保持查询已有排序（如检索相关度）的分页，游标记录偏移量。
+    用于无法按 keyset 定位的排序方式。
+    """
+    offset = 0
+    if cursor:
+        offset = decode_cursor(cursor).get('o')
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError('Invalid cursor')
+    rows = query.offset(offset).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor({'o': offset + limit})
+    return rows, next_cursor
+
+
+def cached_count(query) -> int:
+    """按查询语句缓存的总行数"""
+    statement = query.order_by(None).statement.compile()
+    key = (str(statement), repr(sorted(statement.params.items())))
+    ttl = current_app.config['PAGINATION_COUNT_TTL']
+    cache = current_app.extensions.setdefault('pagination_counts', {})
+
+    now = time.monotonic()
+    with _count_lock:
+        entry = cache.get(key)
+    if entry is not None and entry[1] > now:
+        return entry[0]
+
+    total = query.order_by(None).count()
+    with _count_lock:
+        cache[key] = (total, now + ttl)
+        # 只保留最近的若干个查询
+        while len(cache) > current_app.config['PAGINATION_COUNT_CACHE_SIZE']:
+            cache.pop(next(iter(cache)))
+    return total
+
+
+def get_page_size(args, default: int = 10) -> int:
+    return max(1, min(args.get('per_page', default, type=int), current_app.config['PAGINATION_MAX_PER_PAGE']))
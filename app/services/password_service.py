@@ -0,0 +1,117 @@
+"""
+密码哈希服务。
+
+- bcrypt 的 cost 由 BCRYPT_ROUNDS 指定；未指定时在首次哈希时按 BCRYPT_TARGET_MS 自动校准，
+  不低于 BCRYPT_MIN_ROUNDS（默认 12，即 bcrypt.gensalt() 的默认值）。
+  校准推迟到首次使用，flask 命令行、测试等不哈希密码的场景不会多花一次计时哈希
+- 哈希和校验在有界线程池中执行（bcrypt 计算期间会释放 GIL），
+  登录高峰时请求排队等待，不会占满所有工作线程的 CPU
+- 登录成功时按当前 cost 重新哈希过时的密码: 显式配置的 BCRYPT_ROUNDS 视为固定值，cost 不同即重新哈希；
+  自动校准的 cost 因机器和负载而异，只在已有 cost 更低时升级，避免不同 worker 来回改写同一个哈希
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable
+
+import bcrypt
+from flask import current_app
+
+CALIBRATION_ROUNDS = 8
+MAX_ROUNDS = 16
+
+# 进程内共享的哈希线程池，首次使用时按配置创建
+_executor = None
+_executor_lock = threading.Lock()
+_calibration_lock = threading.Lock()
+
+
+class PasswordHasherBusy(Exception):
+    """等待哈希线程池超时"""
+
+
+def calibrate_rounds(target_ms: float, min_rounds: int) -> int:
+    """
+    测量一次较低 cost 的哈希耗时，按每加一轮耗时翻倍推算
+    不超过 target_ms 的最大 cost，结果限制在 [min_rounds, MAX_ROUNDS]。
+    """
+    salt = bcrypt.gensalt(rounds=CALIBRATION_ROUNDS)
+    start = time.perf_counter()
+    bcrypt.hashpw(b'calibration-password', salt)
+    elapsed_ms = max((time.perf_counter() - start) * 1000, 0.001)
+
+    rounds = CALIBRATION_ROUNDS
+    while rounds < MAX_ROUNDS and elapsed_ms * 2 <= target_ms:
+        elapsed_ms *= 2
+        rounds += 1
+    return max(min_rounds, rounds)
+
+
+def init_app(app):
+    """记录显式配置的 bcrypt cost，未配置时由 get_rounds 首次调用时校准"""
+    rounds = app.config.get('BCRYPT_ROUNDS')
+    app.extensions['bcrypt_rounds_pinned'] = bool(rounds)
+    if rounds:
+        app.extensions['bcrypt_rounds'] = int(rounds)
+
+
+def get_rounds() -> int:
+    extensions = current_app.extensions
+    rounds = extensions.get('bcrypt_rounds')
+    if rounds is None:
+        with _calibration_lock:
+            rounds = extensions.get('bcrypt_rounds')
+            if rounds is None:
+                config = current_app.config
+                rounds = calibrate_rounds(config['BCRYPT_TARGET_MS'], config['BCRYPT_MIN_ROUNDS'])
+                current_app.logger.info(f"Calibrated bcrypt cost to {rounds} rounds "
+                                        f"(target {config['BCRYPT_TARGET_MS']}ms)")
+                extensions['bcrypt_rounds'] = rounds
+    return rounds
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=current_app.config['PASSWORD_HASH_WORKERS'],
+                    thread_name_prefix='password-hash'
+                )
+    return _executor
+
+
+def _run(func: Callable, *args):
+    """在哈希线程池中执行并等待结果，排队超过 PASSWORD_HASH_TIMEOUT 秒时报错"""
+    future = _get_executor().submit(func, *args)
+    try:
+        return future.result(timeout=current_app.config['PASSWORD_HASH_TIMEOUT'])
+    except FutureTimeoutError:
+        future.cancel()
+        raise PasswordHasherBusy('Password hashing queue is full')
+
+
+def hash_password(password: str) -> str:
+    salt = bcrypt.gensalt(rounds=get_rounds())
+    return _run(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    return _run(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
+def hash_rounds(password_hash: str) -> int:
+    """从 $2b$<cost>$... 格式的哈希中读取 cost"""
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return 0
+
+
+def needs_rehash(password_hash: str) -> bool:
+    rounds = hash_rounds(password_hash)
+    if current_app.extensions.get('bcrypt_rounds_pinned'):
+        return rounds != get_rounds()
+    return rounds < get_rounds()
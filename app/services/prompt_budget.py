@@ -0,0 +1,80 @@
+"""
+职位匹配提示词的精简与 token 预算控制。
+
+简历只保留匹配需要的字段；职位列表按预算逐级截断列表项，
+仍然超出时从末尾（排序最靠后的职位）开始丢弃。
+token 数为估算值: 中文按每字 1 个 token，其余字符按每 4 个字符 1 个 token。
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Tuple
+
+_CJK_RE = re.compile(r'[一-鿿　-〿＀-￯]')
+
+# 参与匹配的简历字段，其余长段落评价不进入提示词
+RESUME_PROMPT_FIELDS = {
+    'technical_analysis': ['tech_stack', 'depth_evaluation'],
+    'experience_analysis': ['years', 'career_path', 'project_highlights'],
+    'education_analysis': ['background'],
+    'core_competencies': ['key_skills', 'unique_strengths'],
+    'career_analysis': ['suitable_positions', 'potential_fields'],
+}
+
+# 逐级收紧的截断策略: (每个列表最多保留的条数, 每条最多保留的字符数)
+TRUNCATION_STEPS = [(8, 120), (5, 60), (3, 40)]
+
+
+def estimate_tokens(value: Any) -> int:
+    """估算文本或可 JSON 序列化对象的 token 数"""
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def compact_resume_data(resume_data: Dict[str, Any]) -> Dict[str, Any]:
+    """只保留简历解析结果中与职位匹配相关的字段"""
+    compact = {}
+    for section, fields in RESUME_PROMPT_FIELDS.items():
+        data = (resume_data or {}).get(section)
+        if not isinstance(data, dict):
+            continue
+        kept = {k: data[k] for k in fields if data.get(k) not in (None, '', [])}
+        if kept:
+            compact[section] = kept
+    # 结构不符合预期时（如旧数据）原样使用，避免丢失全部信息
+    return compact or resume_data
+
+
+def _truncate_job(job: Dict[str, Any], max_items: int, max_chars: int) -> Dict[str, Any]:
+    truncated = dict(job)
+    for key, value in job.items():
+        if isinstance(value, list):
+            truncated[key] = [
+                item[:max_chars] if isinstance(item, str) else item
+                for item in value[:max_items]
+            ]
+    return truncated
+
+
+def fit_jobs_to_budget(fixed_tokens: int, jobs: List[Dict[str, Any]],
+                       budget: int) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    让 fixed_tokens（系统提示词和简历）加上职位列表不超过 budget。
+    返回 (处理后的职位列表, 估算的总 token 数)，至少保留一个职位。
+    """
+    total = fixed_tokens + estimate_tokens(jobs)
+    if total <= budget:
+        return jobs, total
+
+    for max_items, max_chars in TRUNCATION_STEPS:
+        jobs = [_truncate_job(job, max_items, max_chars) for job in jobs]
+        total = fixed_tokens + estimate_tokens(jobs)
+        if total <= budget:
+            return jobs, total
+
+    job_tokens = [estimate_tokens(job) for job in jobs]
+    while len(jobs) > 1 and total > budget:
+        jobs = jobs[:-1]
+        total -= job_tokens.pop() + 1
+    return jobs, total
@@ -0,0 +1,192 @@
+"""
+本地职位预排序引擎。
+
+在调用大模型之前，用确定性的规则对职位打分：技能覆盖、职位名称、
+工作地点和工作年限四个维度加权求和。排序结果可直接作为本地推荐返回，
+也可以只取前 K 个交给 ai_service.match_jobs 做深度分析。
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.services.text_utils import normalize_text, term_set, tokenize
+
+DEFAULT_WEIGHTS = {
+    'skills': 0.45,
+    'title': 0.25,
+    'location': 0.15,
+    'experience': 0.15,
+}
+
+_YEARS_RE = re.compile(r'(\d+)\s*(?:年|\+?\s*years?)')
+
+
+@dataclass
+class RankedJob:
+    job: Any
+    score: float
+    breakdown: Dict[str, float]
+    matched_skills: List[str] = field(default_factory=list)
+    missing_terms: List[str] = field(default_factory=list)
+
+
+def _get_section(resume_data: Dict[str, Any], section: str, key: str, default=None):
+    value = (resume_data or {}).get(section) or {}
+    if not isinstance(value, dict):
+        return default
+    return value.get(key, default)
+
+
+def _as_list(value) -> List[str]:
+    if isinstance(value, list):
+        return [v for v in value if isinstance(v, str) and v.strip()]
+    if isinstance(value, str) and value.strip():
+        return [value]
+    return []
+
+
+def extract_resume_profile(resume_data: Dict[str, Any]) -> Dict[str, Any]:
+    """从简历解析结果中提取排序所需的字段"""
+    skills = _as_list(_get_section(resume_data, 'technical_analysis', 'tech_stack'))
+    skills += _as_list(_get_section(resume_data, 'core_competencies', 'key_skills'))
+
+    years = _get_section(resume_data, 'experience_analysis', 'years')
+    try:
+        years = float(years)
+    except (TypeError, ValueError):
+        years = None
+
+    # 去重但保持顺序，保证结果稳定
+    seen = set()
+    unique_skills = []
+    for skill in skills:
+        key = normalize_text(skill).strip()
+        if key and key not in seen:
+            seen.add(key)
+            unique_skills.append(skill)
+
+    return {
+        'skills': unique_skills,
+        'years': years,
+        'suitable_positions': _as_list(_get_section(resume_data, 'career_analysis', 'suitable_positions')),
+    }
+
+
+def _required_years(texts: Sequence[str]) -> Optional[float]:
+    found = []
+    for text in texts:
+        found.extend(int(m) for m in _YEARS_RE.findall(normalize_text(text)))
+    return float(max(found)) if found else None
+
+
+def _title_score(positions: Sequence[str], job_title: str) -> float:
+    title_terms = set(tokenize(job_title))
+    if not title_terms:
+        return 0.0
+    best = 0.0
+    for position in positions:
+        position_terms = set(tokenize(position))
+        if position_terms:
+            best = max(best, len(position_terms & title_terms) / len(position_terms))
+    return best
+
+
+def _location_score(desired_location: str, job_location: str) -> float:
+    desired = normalize_text(desired_location).strip()
+    actual = normalize_text(job_location).strip()
+    if not desired or not actual:
+        return 0.0
+    return 1.0 if desired in actual or actual in desired else 0.0
+
+
+def _experience_score(years: Optional[float], required: Optional[float]) -> float:
+    if not required:
+        return 1.0
+    if years is None:
+        return 0.5
+    return min(1.0, years / required)
+
+
+def score_job(profile: Dict[str, Any], desired_position: str, desired_location: str,
+              job: Any, weights: Dict[str, float]) -> RankedJob:
+    """对单个职位打分，job 需提供 job_title/location 及 get_requirements/get_responsibilities"""
+    requirements = job.get_requirements()
+    responsibilities = job.get_responsibilities()
+    job_terms = term_set(requirements) | term_set(responsibilities) | set(tokenize(job.job_title))
+
+    matched_skills = []
+    for skill in profile['skills']:
+        skill_terms = set(tokenize(skill))
+        if skill_terms and skill_terms <= job_terms:
+            matched_skills.append(skill)
+    resume_terms = term_set(profile['skills'])
+
+    # 技能分: 简历技能命中率与职位要求(英文技术词)覆盖率的平均
+    job_tech_terms = {t for t in term_set(requirements) if t.isascii() and not t.isdigit()}
+    resume_coverage = len(matched_skills) / len(profile['skills']) if profile['skills'] else 0.0
+    job_coverage = len(job_tech_terms & resume_terms) / len(job_tech_terms) if job_tech_terms else resume_coverage
+    missing_terms = sorted(job_tech_terms - resume_terms)
+
+    positions = [desired_position] + profile['suitable_positions'] if desired_position else profile['suitable_positions']
+    breakdown = {
+        'skills': (resume_coverage + job_coverage) / 2,
+        'title': _title_score(positions, job.job_title),
+        'location': _location_score(desired_location, job.location),
+        'experience': _experience_score(profile['years'], _required_years(requirements)),
+    }
+
+    total_weight = sum(weights.values()) or 1.0
+    score = sum(breakdown[k] * weights.get(k, 0.0) for k in breakdown) / total_weight
+
+    return RankedJob(
+        job=job,
+        score=score,
+        breakdown=breakdown,
+        matched_skills=matched_skills,
+        missing_terms=missing_terms,
+    )
+
+
+def rank_jobs(resume_data: Dict[str, Any], desired_position: str, desired_location: str,
+              jobs: Sequence[Any], weights: Optional[Dict[str, float]] = None,
+              top_k: Optional[int] = None) -> List[RankedJob]:
+    """
+    对职位列表打分并按得分降序排列，得分为 0 的职位会被丢弃。
+    得分相同时按职位 ID 排序，保证结果确定。
+    """
+    merged_weights = dict(DEFAULT_WEIGHTS)
+    if weights:
+        merged_weights.update({k: float(v) for k, v in weights.items() if k in DEFAULT_WEIGHTS})
+
+    profile = extract_resume_profile(resume_data)
+    ranked = [
+        score_job(profile, desired_position, desired_location, job, merged_weights)
+        for job in jobs
+    ]
+    ranked = [r for r in ranked if r.score > 0]
+    ranked.sort(key=lambda r: (-r.score, r.job.id))
+
+    if top_k is not None:
+        ranked = ranked[:top_k]
+    return ranked
+
+
+def to_recommendations(ranked: Sequence[RankedJob]) -> List[Dict[str, Any]]:
+    """将本地排序结果转换为与 ai_service.match_jobs 相同结构的推荐列表"""
+    recommendations = []
+    for item in ranked:
+        breakdown = item.breakdown
+        analysis = (
+            f"本地规则评分: 技能 {breakdown['skills']:.0%}, 职位名称 {breakdown['title']:.0%}, "
+            f"地点 {breakdown['location']:.0%}, 年限 {breakdown['experience']:.0%}"
+        )
+        recommendations.append({
+            'job_id': item.job.id,
+            'match_score': round(item.score * 100),
+            'match_analysis': analysis,
+            'advantages': [f"掌握 {skill}" for skill in item.matched_skills],
+            'challenges': [f"缺少 {term} 相关经验" for term in item.missing_terms],
+            'suggestions': [f"补充 {term} 相关技能" for term in item.missing_terms[:3]],
+        })
+    return recommendations
@@ -0,0 +1,198 @@
+"""
+职位全文检索。
+
+根据数据库方言选择检索后端:
+- SQLite: FTS5 虚拟表 job_fts，按 bm25 排序
+- PostgreSQL: job.search_vector (tsvector + GIN 索引)，按 ts_rank 排序
+- 其他: 退化为 ilike 模糊匹配
+
+中文在写入索引前先切分为二元组并以空格分隔，因此两个后端都可以
+使用默认的分词器，查询词按同样方式切分后做 AND 匹配。
+索引通过 Job 的 ORM 事件在插入/更新/删除时同步；批量写入需显式调用 index_jobs。
+"""
+
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional
+
+from flask import current_app
+from sqlalchemy import DDL, Float, Integer, Text, cast, event, func, literal_column, or_, text
+
+from app import db
+from app.models import Job
+from app.services.text_utils import tokenize
+
+FTS_TABLE = 'job_fts'
+
+# 列顺序与 bm25 权重一一对应: 职位名称、公司、地点、职位要求、原始 JD
+FTS_COLUMNS = ('job_title', 'company_name', 'location', 'requirements', 'raw_jd_text')
+FTS_WEIGHTS = (10.0, 4.0, 4.0, 2.0, 1.0)
+
+
+def segment(text: str) -> str:
+    """将文本切分为以空格分隔的词元串，用于写入索引"""
+    return ' '.join(tokenize(text))
+
+
+def job_document(job: Job) -> dict:
+    """构造职位的索引文档"""
+    return {
+        'job_title': segment(job.job_title),
+        'company_name': segment(job.company_name),
+        'location': segment(job.location),
+        'requirements': segment(' '.join(job.get_requirements())),
+        'raw_jd_text': segment(job.raw_jd_text),
+    }
+
+
+class SearchBackend(ABC):
+    """检索后端；不维护独立索引的后端无需实现 index/remove"""
+    name = 'base'
+
+    def index(self, connection, job: Job):
+        pass
+
+    def remove(self, connection, job_id: int):
+        pass
+
+    @abstractmethod
+    def apply(self, query, q: str):
+        """在 query 上追加检索条件和相关度排序"""
+
+
+class SQLiteFTSBackend(SearchBackend):
+    name = 'fts5'
+
+    create_sql = (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+        f"USING fts5({', '.join(FTS_COLUMNS)}, tokenize='unicode61')"
+    )
+
+    def index(self, connection, job: Job):
+        self.remove(connection, job.id)
+        connection.execute(
+            text(f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) "
+                 f"VALUES (:rowid, {', '.join(':' + c for c in FTS_COLUMNS)})"),
+            {'rowid': job.id, **job_document(job)}
+        )
+
+    def remove(self, connection, job_id: int):
+        connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :rowid"), {'rowid': job_id})
+
+    def apply(self, query, q: str):
+        match = ' '.join(f'"{token}"' for token in tokenize(q))
+        weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+        ranked = text(
+            f"SELECT rowid AS job_id, bm25({FTS_TABLE}, {weights}) AS rank "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+        ).bindparams(match=match).columns(job_id=Integer, rank=Float).subquery('fts_rank')
+        return query.join(ranked, ranked.c.job_id == Job.id).order_by(ranked.c.rank)
+
+
+class PostgresBackend(SearchBackend):
+    name = 'postgres'
+
+    def index(self, connection, job: Job):
+        doc = job_document(job)
+        connection.execute(
+            text(
+                "UPDATE job SET search_vector = "
+                "setweight(to_tsvector('simple', :job_title), 'A') || "
+                "setweight(to_tsvector('simple', :company_name || ' ' || :location), 'B') || "
+                "setweight(to_tsvector('simple', :requirements), 'C') || "
+                "setweight(to_tsvector('simple', :raw_jd_text), 'D') "
+                "WHERE id = :id"
+            ),
+            {'id': job.id, **doc}
+        )
+
+    def apply(self, query, q: str):
+        vector = literal_column('job.search_vector')
+        tsquery = func.plainto_tsquery('simple', segment(q))
+        return query.filter(vector.op('@@')(tsquery)).order_by(func.ts_rank(vector, tsquery).desc())
+
+
+class LikeBackend(SearchBackend):
+    name = 'like'
+
+    def apply(self, query, q: str):
+        for word in q.split():
+            pattern = f'%{word}%'
+            query = query.filter(or_(
+                Job.job_title.ilike(pattern),
+                Job.company_name.ilike(pattern),
+                Job.location.ilike(pattern),
+                cast(Job.requirements, Text).ilike(pattern),
+                Job.raw_jd_text.ilike(pattern),
+            ))
+        return query
+
+
+_BACKENDS = {
+    'fts5': SQLiteFTSBackend(),
+    'postgres': PostgresBackend(),
+    'like': LikeBackend(),
+}
+_DIALECT_BACKENDS = {'sqlite': 'fts5', 'postgresql': 'postgres'}
+
+
+def get_search_backend(dialect_name: Optional[str] = None) -> SearchBackend:
+    """按配置 SEARCH_BACKEND 或数据库方言选择检索后端"""
+    configured = current_app.config.get('SEARCH_BACKEND', 'auto')
+    if configured != 'auto':
+        return _BACKENDS[configured]
+    dialect_name = dialect_name or db.engine.dialect.name
+    return _BACKENDS[_DIALECT_BACKENDS.get(dialect_name, 'like')]
+
+
+def search_jobs(query, q: str):
+    """对职位查询追加全文检索条件，查询词为空时原样返回"""
+    if not tokenize(q):
+        return query
+    return get_search_backend().apply(query, q)
+
+
+def index_jobs(jobs: Iterable[Job]):
+    """显式同步一批职位的索引（用于绕过 ORM 事件的批量写入）"""
+    backend = get_search_backend()
+    connection = db.session.connection()
+    for job in jobs:
+        backend.index(connection, job)
+
+
+def rebuild_index(batch_size: int = 500) -> int:
+    """重建全部职位的检索索引，返回处理的职位数"""
+    count = 0
+    last_id = 0
+    while True:
+        jobs: List[Job] = Job.query.filter(Job.id > last_id).order_by(Job.id).limit(batch_size).all()
+        if not jobs:
+            break
+        index_jobs(jobs)
+        count += len(jobs)
+        last_id = jobs[-1].id
+    db.session.commit()
+    return count
+
+
+# 测试和开发环境通过 db.create_all() 建表时同时创建 FTS5 虚拟表
+event.listen(
+    Job.__table__,
+    'after_create',
+    DDL(SQLiteFTSBackend.create_sql).execute_if(dialect='sqlite')
+)
+event.listen(
+    Job.__table__,
+    'before_drop',
+    DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect='sqlite')
+)
+
+
+@event.listens_for(Job, 'after_insert')
+@event.listens_for(Job, 'after_update')
+def _sync_job_index(mapper, connection, job):
+    get_search_backend(connection.dialect.name).index(connection, job)
+
+
+@event.listens_for(Job, 'after_delete')
+def _remove_job_index(mapper, connection, job):
+    get_search_backend(connection.dialect.name).remove(connection, job.id)
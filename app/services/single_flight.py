@@ -0,0 +1,250 @@
+"""
+大模型调用的请求合并（single-flight）。
+
+指纹（工具、模型和完整参数）相同的并发调用只发起一次上游请求，其余调用等待并共享结果，
+用于用户重复点击或前端重试时避免重复的大模型调用。LLM_SINGLE_FLIGHT 控制范围:
+
+- off: 不合并
+- thread: 进程内合并，跟随线程等待领头线程的结果
+- file: 在 thread 的基础上用 fcntl 文件锁跨 gunicorn worker 合并。领头 worker 持锁调用上游，
+  完成后如果有 worker 在等待，把结果写入 LLM_SINGLE_FLIGHT_DIR；等待锁的 worker 拿到锁后，
+  如果存在在它到达之后写入的结果就直接复用，否则自己调用。结果包含简历等个人信息:
+  目录权限为 0700、文件为 0600，最后一个等待者读取后立即删除结果文件
+
+只合并同时在途的调用，已完成调用的结果复用由 llm_cache 负责。
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import current_app
+
+from app.metrics import get_registry
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - 非 POSIX 平台
+    fcntl = None
+
+LOCK_POLL_INTERVAL = 0.05
+SWEEP_EVERY = 100  # 每写入多少次结果清理一次过期文件
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """进程内的 single-flight，同一个键同时只有一个线程执行 fn"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """返回 (结果, 是否共享了其他线程的结果)；领头调用的异常同样抛给跟随者"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if not call.event.wait(timeout):
+                raise TimeoutError(f"Timed out waiting for in-flight LLM call {key[:12]}")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class FileSingleFlight:
+    """基于文件锁的跨进程 single-flight，结果须可 JSON 序列化"""
+    def __init__(self, directory: str, result_ttl: float = 300.0):
+        if fcntl is None:
+            raise RuntimeError('LLM_SINGLE_FLIGHT=file requires fcntl (POSIX)')
+        self.directory = directory
+        self.result_ttl = result_ttl
+        self._writes = 0
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        # makedirs 受 umask 影响，对已存在的目录也不生效
+        os.chmod(directory, 0o700)
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, f'{key}{suffix}')
+
+    @staticmethod
+    def _open(path: str, flags: int, mode: str):
+        """以 0600 权限创建/打开文件"""
+        return os.fdopen(os.open(path, flags | os.O_CREAT, 0o600), mode, encoding='utf-8')
+
+    def _adjust_waiters(self, key: str, delta: int) -> int:
+        """修改等待该键的进程数并返回新值"""
+        with self._open(self._path(key, '.waiters'), os.O_RDWR, 'r+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            count = max(0, int(f.read() or 0) + delta)
+            f.seek(0)
+            f.truncate()
+            f.write(str(count))
+            return count
+
+    def _discard_result(self, key: str):
+        try:
+            os.unlink(self._path(key, '.json'))
+        except FileNotFoundError:
+            pass
+
+    def _acquire(self, f, key: str, deadline: float):
+        """轮询获取排他锁，超过 deadline 时抛出 TimeoutError"""
+        while True:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for in-flight LLM call {key[:12]}")
+                time.sleep(LOCK_POLL_INTERVAL)
+
+    def _read_result(self, key: str, since: float):
+        path = self._path(key, '.json')
+        try:
+            if os.stat(path).st_mtime < since:
+                return None
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_result(self, key: str, result):
+        path = self._path(key, '.json')
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with self._open(tmp_path, os.O_WRONLY | os.O_TRUNC, 'w') as f:
+            json.dump(result, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._writes += 1
+        if self._writes % SWEEP_EVERY == 0:
+            self.sweep()
+
+    def sweep(self):
+        """删除崩溃等情况残留的过期文件（锁文件和计数文件只在能立即加锁时删除）"""
+        cutoff = time.time() - self.result_ttl
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if os.stat(path).st_mtime >= cutoff:
+                    continue
+                if name.endswith(('.lock', '.waiters')):
+                    with open(path, 'a') as f:
+                        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        os.unlink(path)
+                else:
+                    os.unlink(path)
+            except OSError:
+                continue
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: float) -> Tuple[Any, bool]:
+        arrived = time.time()
+        with self._open(self._path(key, '.lock'), os.O_WRONLY | os.O_APPEND, 'a') as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                waiting = None
+            except BlockingIOError:
+                # 登记为等待者，领头进程据此决定是否写出结果
+                self._adjust_waiters(key, 1)
+                try:
+                    self._acquire(f, key, time.monotonic() + timeout)
+                except BaseException:
+                    if self._adjust_waiters(key, -1) == 0:
+                        self._discard_result(key)
+                    raise
+                waiting = self._adjust_waiters(key, -1)
+            try:
+                if waiting is not None:
+                    result = self._read_result(key, arrived)
+                    if result is not None:
+                        if waiting == 0:
+                            # 最后一个等待者，之后到达的进程不会复用这个结果
+                            self._discard_result(key)
+                        return result, True
+                result = fn()
+                if self._adjust_waiters(key, 0):
+                    self._write_result(key, result)
+                return result, False
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def fingerprint(server_name: str, tool_name: str, arguments: Dict[str, Any]) -> str:
+    payload = json.dumps(
+        [server_name, tool_name, current_app.config['LLM_MODEL'], arguments],
+        ensure_ascii=False, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _get_flights() -> Tuple[SingleFlight, Optional[FileSingleFlight]]:
+    flights = current_app.extensions.get('llm_single_flight')
+    if flights is None:
+        config = current_app.config
+        files = None
+        if config['LLM_SINGLE_FLIGHT'] == 'file':
+            files = FileSingleFlight(config['LLM_SINGLE_FLIGHT_DIR'], config['LLM_SINGLE_FLIGHT_TIMEOUT'])
+        flights = current_app.extensions.setdefault('llm_single_flight', (SingleFlight(), files))
+    return flights
+
+
+def _count_shared(scope: str):
+    registry = get_registry()
+    if registry is not None:
+        registry.counter('llm_coalesced_calls_total', 'LLM calls served by an identical in-flight call',
+                         ('scope',)).inc(scope=scope)
+
+
+def use_tool(client, server_name: str, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """client.use_tool 的合并版本"""
+    config = current_app.config
+    mode = config['LLM_SINGLE_FLIGHT']
+    if mode == 'off':
+        return client.use_tool(server_name=server_name, tool_name=tool_name, arguments=arguments)
+    if mode not in ('thread', 'file'):
+        raise ValueError(f"Unknown LLM_SINGLE_FLIGHT mode: {mode}")
+
+    key = fingerprint(server_name, tool_name, arguments)
+    timeout = config['LLM_SINGLE_FLIGHT_TIMEOUT']
+    threads, files = _get_flights()
+
+    def call_upstream():
+        return client.use_tool(server_name=server_name, tool_name=tool_name, arguments=arguments)
+
+    def lead():
+        if files is None:
+            return call_upstream()
+        result, shared = files.do(key, call_upstream, timeout)
+        if shared:
+            _count_shared('process')
+        return result
+
+    result, shared = threads.do(key, lead, timeout)
+    if shared:
+        _count_shared('thread')
+    return dict(result)
@@ -0,0 +1,117 @@
+"""
+职位技能倒排索引。
+
+从职位名称、职责和要求中切分出规范化词元，写入 job_term 表
+（term -> job_id），这样“需要 Kafka 的职位”之类的查询可以走索引，
+而不必加载每一行再 json.loads。
+"""
+
+from typing import Dict, Iterable, List, Set, Union
+
+from sqlalchemy import delete, event, func, insert, select
+
+from app import db
+from app.models import Job, JobTerm
+from app.services.text_utils import term_set, tokenize
+
+MAX_TERM_LENGTH = 64
+
+
+def extract_terms(job: Job) -> Set[str]:
+    """提取职位的索引词元（忽略纯数字）"""
+    terms = term_set(job.get_requirements()) | term_set(job.get_responsibilities())
+    terms.update(tokenize(job.job_title))
+    return {t[:MAX_TERM_LENGTH] for t in terms if not t.isdigit()}
+
+
+def query_terms(values: Union[str, Iterable[str]]) -> Set[str]:
+    """将查询词（字符串或列表）切分为与索引一致的词元"""
+    if isinstance(values, str):
+        values = [values]
+    return {t[:MAX_TERM_LENGTH] for t in term_set(values) if not t.isdigit()}
+
+
+def _term_rows(jobs: Iterable[Job]) -> List[Dict]:
+    return [
+        {'job_id': job.id, 'term': term}
+        for job in jobs
+        for term in sorted(extract_terms(job))
+    ]
+
+
+def index_jobs(jobs: List[Job]):
+    """
+    为一批职位（重新）建立索引，职位必须已经分配 ID。
+    只写入当前会话，由调用方负责提交。
+    """
+    if not jobs:
+        return
+    db.session.execute(delete(JobTerm).where(JobTerm.job_id.in_([job.id for job in jobs])))
+    rows = _term_rows(jobs)
+    if rows:
+        db.session.execute(insert(JobTerm), rows)
+
+
+def index_job(job: Job):
+    """为单个职位建立索引"""
+    index_jobs([job])
+
+
+def rebuild_index(batch_size: int = 500) -> int:
+    """清空并重建全部索引，返回处理的职位数"""
+    db.session.execute(delete(JobTerm))
+    count = 0
+    last_id = 0
+    while True:
+        jobs = Job.query.filter(Job.id > last_id).order_by(Job.id).limit(batch_size).all()
+        if not jobs:
+            break
+        rows = _term_rows(jobs)
+        if rows:
+            db.session.execute(insert(JobTerm), rows)
+        count += len(jobs)
+        last_id = jobs[-1].id
+    db.session.commit()
+    return count
+
+
+def job_ids_select(terms: Set[str], match_all: bool = False, min_hits: int = 1):
+    """
+    返回命中词元的 job_id 子查询。
+    match_all 为 True 时要求职位包含全部词元，否则至少命中 min_hits 个。
+    """
+    stmt = select(JobTerm.job_id).where(JobTerm.term.in_(sorted(terms)))
+    if match_all:
+        min_hits = len(terms)
+    if min_hits > 1:
+        return stmt.group_by(JobTerm.job_id).having(func.count(JobTerm.term) >= min_hits)
+    return stmt.distinct()
+
+
+def selective_terms(terms: Set[str], max_df_ratio: float) -> Set[str]:
+    """
+    只保留有区分度的词元: 去掉索引中没有的词元，以及出现在超过 max_df_ratio 比例职位中的
+    高频词元（如中文二元组“工程”“程师”，几乎每个职位都有，用于召回等于全表扫描）
+    """
+    if not terms:
+        return set()
+    total = db.session.execute(select(func.count()).select_from(Job)).scalar()
+    limit = max(1, int(total * max_df_ratio))
+    rows = db.session.execute(
+        select(JobTerm.term, func.count()).where(JobTerm.term.in_(sorted(terms))).group_by(JobTerm.term)
+    )
+    return {term for term, df in rows if df <= limit}
+
+
+def find_job_ids(values: Union[str, Iterable[str]], match_all: bool = False) -> Set[int]:
+    """按查询词查找职位 ID"""
+    terms = query_terms(values)
+    if not terms:
+        return set()
+    return set(db.session.execute(job_ids_select(terms, match_all)).scalars())
+
+
+@event.listens_for(Job, 'after_delete')
+def _remove_job_terms(mapper, connection, job):
+    # SQLite 默认不执行外键约束，job_term 上的 ON DELETE CASCADE 不会生效
+    connection.execute(delete(JobTerm).where(JobTerm.job_id == job.id))
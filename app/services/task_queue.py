@@ -0,0 +1,213 @@
+"""
+进程内后台任务队列。
+
+任务先写入 background_task 表再提交到有界线程池执行，接口可以立即返回
+202 和任务 ID。进程启动后处理第一个请求前会调用 recover() 重新调度未完成的任务；
+任务以条件更新 (status='pending' -> 'running') 的方式认领，
+多个 worker 同时恢复时同一任务只会执行一次。执行期间每 TASK_QUEUE_HEARTBEAT 秒刷新一次
+updated_at，只有超过 TASK_QUEUE_STALE_AFTER 秒没有刷新（执行进程已退出）的 running 任务才会被重新调度。
+
+TASK_QUEUE_EAGER 为 True 时任务在提交时同步执行，便于测试。
+"""
+
+import json
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, UTC
+from typing import Any, Callable, Dict, Optional
+
+from flask import current_app
+from sqlalchemy import inspect, update
+
+from app import db
+from app.models import BackgroundTask, User
+from app.services.ai_service import parse_resume
+from app.services.job_service import create_job_from_text, ingest_jds
+
+PENDING = 'pending'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+_handlers: Dict[str, Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]] = {}
+
+
+def task_handler(kind: str):
+    """注册任务处理函数，处理函数接收 payload 并返回可 JSON 序列化的结果"""
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+class TaskQueue:
+    def __init__(self, app=None):
+        self._executor = None
+        self._futures: Dict[str, Future] = {}
+        self._recovered_apps = set()
+        self._recover_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['task_queue'] = self
+        app.before_request(self._recover_once)
+
+    def _recover_once(self):
+        app = current_app._get_current_object()
+        if id(app) in self._recovered_apps:
+            return
+        with self._recover_lock:
+            if id(app) in self._recovered_apps:
+                return
+            self._recovered_apps.add(id(app))
+        count = self.recover()
+        if count:
+            current_app.logger.info(f"Recovered {count} unfinished background tasks")
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=current_app.config['TASK_QUEUE_WORKERS'],
+                thread_name_prefix='task-queue'
+            )
+        return self._executor
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], user_id: Optional[int] = None) -> BackgroundTask:
+        """持久化任务并调度执行"""
+        if kind not in _handlers:
+            raise ValueError(f"Unknown task kind: {kind}")
+
+        task = BackgroundTask(
+            id=str(uuid.uuid4()),
+            kind=kind,
+            status=PENDING,
+            payload=json.dumps(payload, ensure_ascii=False),
+            user_id=user_id
+        )
+        db.session.add(task)
+        db.session.commit()
+
+        self._dispatch(task.id)
+        return task
+
+    def _dispatch(self, task_id: str):
+        app = current_app._get_current_object()
+        if app.config['TASK_QUEUE_EAGER']:
+            self._run(app, task_id)
+            db.session.expire_all()
+            return
+        future = self._get_executor().submit(self._run, app, task_id)
+        self._futures[task_id] = future
+        future.add_done_callback(lambda _: self._futures.pop(task_id, None))
+
+    def wait(self, task_id: str, timeout: Optional[float] = None):
+        """等待本进程内调度的任务结束（主要用于测试和命令行）"""
+        future = self._futures.get(task_id)
+        if future is not None:
+            future.result(timeout=timeout)
+
+    def _claim(self, task_id: str) -> bool:
+        claimed = db.session.execute(
+            update(BackgroundTask)
+            .where(BackgroundTask.id == task_id, BackgroundTask.status == PENDING)
+            .values(status=RUNNING, attempts=BackgroundTask.attempts + 1,
+                    updated_at=datetime.now(UTC))
+        ).rowcount
+        db.session.commit()
+        return claimed == 1
+
+    def _heartbeat(self, app, task_id: str, stop: threading.Event):
+        """任务执行期间定期刷新 updated_at，表明执行进程仍然存活"""
+        with app.app_context():
+            while not stop.wait(app.config['TASK_QUEUE_HEARTBEAT']):
+                try:
+                    # 使用独立连接，不影响任务处理函数所在会话的事务
+                    with db.engine.begin() as conn:
+                        conn.execute(
+                            update(BackgroundTask)
+                            .where(BackgroundTask.id == task_id, BackgroundTask.status == RUNNING)
+                            .values(updated_at=datetime.now(UTC))
+                        )
+                except Exception as e:
+                    app.logger.warning(f"Heartbeat of background task {task_id} failed: {str(e)}")
+
+    def _run(self, app, task_id: str):
+        with app.app_context():
+            if not self._claim(task_id):
+                return
+
+            task = db.session.get(BackgroundTask, task_id)
+            stop = threading.Event()
+            heartbeat = threading.Thread(target=self._heartbeat, args=(app, task_id, stop),
+                                         name=f'task-heartbeat-{task_id}', daemon=True)
+            heartbeat.start()
+            try:
+                result = _handlers[task.kind](task.get_payload())
+                task.result = json.dumps(result, ensure_ascii=False) if result is not None else None
+                task.status = SUCCEEDED
+            except Exception as e:
+                db.session.rollback()
+                task = db.session.get(BackgroundTask, task_id)
+                current_app.logger.error(f"Background task {task_id} ({task.kind}) failed: {str(e)}")
+                task.error = str(e)
+                task.status = FAILED
+            finally:
+                stop.set()
+                heartbeat.join()
+            task.finished_at = datetime.now(UTC)
+            db.session.commit()
+
+    def recover(self) -> int:
+        """
+        重新调度未完成的任务: 所有 pending 任务，以及超过
+        TASK_QUEUE_STALE_AFTER 秒没有心跳的 running 任务（执行进程已退出）。
+        """
+        if not inspect(db.engine).has_table(BackgroundTask.__tablename__):
+            return 0
+
+        stale_before = datetime.now(UTC) - timedelta(seconds=current_app.config['TASK_QUEUE_STALE_AFTER'])
+        db.session.execute(
+            update(BackgroundTask)
+            .where(BackgroundTask.status == RUNNING, BackgroundTask.updated_at < stale_before)
+            .values(status=PENDING)
+        )
+        db.session.commit()
+
+        task_ids = [
+            task_id for (task_id,) in
+            db.session.query(BackgroundTask.id)
+            .filter(BackgroundTask.status == PENDING)
+            .order_by(BackgroundTask.created_at)
+        ]
+        for task_id in task_ids:
+            self._dispatch(task_id)
+        return len(task_ids)
+
+
+task_queue = TaskQueue()
+
+
+# 内置任务
+
+@task_handler('parse_resume')
+def _parse_resume_task(payload):
+    parsed_data = parse_resume(payload['resume_text'])
+    user = db.session.get(User, payload['user_id'])
+    # 解析期间用户可能又上传了新简历，只在文本未变化时写回
+    if user is not None and user.resume_text == payload['resume_text']:
+        user.set_resume_parsed_data(parsed_data)
+        db.session.commit()
+    return {'parsed_data': parsed_data}
+
+
+@task_handler('parse_job_description')
+def _parse_job_description_task(payload):
+    job = create_job_from_text(payload['raw_jd_text'])
+    return {'job_id': job.id}
+
+
+@task_handler('ingest_jds')
+def _ingest_jds_task(payload):
+    return ingest_jds(payload['raw_jd_texts'])
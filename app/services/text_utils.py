@@ -0,0 +1,47 @@
+"""
+文本规范化与分词工具，供本地排序、索引和检索共用。
+
+英文/数字按词切分（保留 c++、c#、node.js 这类技术名词），
+中文按字二元组（bigram）切分，不依赖外部分词器。
+"""
+
+import re
+import unicodedata
+from typing import Iterable, List, Set
+
+_ASCII_TOKEN_RE = re.compile(r'[a-z][a-z0-9+#]*(?:\.[a-z0-9]+)*|\d+')
+_CJK_RUN_RE = re.compile(r'[一-鿿]+')
+
+
+def normalize_text(text: str) -> str:
+    """全角转半角并转小写"""
+    if not text:
+        return ''
+    return unicodedata.normalize('NFKC', str(text)).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    切分文本，返回词元列表（保留重复）。
+    英文词元原样保留，连续中文片段切为二元组；单个汉字保留为一元。
+    """
+    text = normalize_text(text)
+    if not text:
+        return []
+
+    tokens = [t.rstrip('.') for t in _ASCII_TOKEN_RE.findall(text)]
+    for run in _CJK_RUN_RE.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return [t for t in tokens if t]
+
+
+def term_set(values: Iterable[str]) -> Set[str]:
+    """将多段文本切分后合并为去重的词元集合"""
+    terms = set()
+    for value in values or []:
+        if isinstance(value, str):
+            terms.update(tokenize(value))
+    return terms
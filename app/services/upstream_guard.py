@@ -0,0 +1,416 @@
+"""
+大模型上游的保护: 限流、自适应并发和熔断。
+
+- TokenBucket: 每分钟请求数 (LLM_RATE_LIMIT_RPM) 和 token 数 (LLM_RATE_LIMIT_TPM) 两个令牌桶。
+  LLM_RATE_LIMIT_BACKEND=file 时状态保存在加了 fcntl 锁的文件中，多个 worker 共享同一个限额
+- AIMDController: 每个进程的并发上限，成功且延迟正常时加性增加，遇到 429 或延迟超过阈值时减半
+- CircuitBreaker: 连续 LLM_BREAKER_FAILURES 次连接错误/超时/5xx 后熔断，熔断期间直接抛出
+  UpstreamUnavailable（接口返回 503），LLM_BREAKER_RESET_TIMEOUT 秒后放行一个探测请求
+
+UpstreamGuard 把三者组合起来，由 DevMCPClient / AsyncDevMCPClient 在每次上游请求（包括重试）前后调用。
+"""
+
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from flask import current_app, jsonify
+
+from app.metrics import get_registry
+from app.services.prompt_budget import estimate_tokens
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - 非 POSIX 平台
+    fcntl = None
+
+
+class UpstreamUnavailable(Exception):
+    """大模型上游暂不可用（熔断中或等待限流/并发槽位超时），接口返回 503"""
+    def __init__(self, message, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _inc(name: str, documentation: str, amount: float = 1, **labels):
+    registry = get_registry()
+    if registry is not None:
+        registry.counter(name, documentation, tuple(labels)).inc(amount, **labels)
+
+
+def _set_gauge(name: str, documentation: str, value: float):
+    registry = get_registry()
+    if registry is not None:
+        registry.gauge(name, documentation).set(value)
+
+
+class TokenBucket:
+    """进程内的请求数/token 数令牌桶，容量为一分钟的限额；限额为 0 表示不限制"""
+    def __init__(self, rpm: int = 0, tpm: int = 0, clock=time.monotonic):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._state: Optional[Dict[str, float]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rpm or self.tpm)
+
+    def _full_state(self) -> Dict[str, float]:
+        return {'requests': float(self.rpm), 'tokens': float(self.tpm), 'updated_at': self.clock()}
+
+    @contextmanager
+    def _locked_state(self):
+        with self._lock:
+            if self._state is None:
+                self._state = self._full_state()
+            yield self._state
+
+    def _refill(self, state: Dict[str, float]):
+        now = self.clock()
+        elapsed = max(0.0, now - state['updated_at'])
+        state['updated_at'] = now
+        state['requests'] = min(float(self.rpm), state['requests'] + elapsed * self.rpm / 60)
+        state['tokens'] = min(float(self.tpm), state['tokens'] + elapsed * self.tpm / 60)
+
+    def try_acquire(self, tokens: int) -> float:
+        """取出 1 个请求和 tokens 个 token；成功返回 0，否则不扣减并返回需要等待的秒数"""
+        if not self.enabled:
+            return 0.0
+        # 单次请求超过桶容量时按容量计，避免永远等不到
+        tokens = min(tokens, self.tpm) if self.tpm else 0
+        with self._locked_state() as state:
+            self._refill(state)
+            wait = 0.0
+            if self.rpm and state['requests'] < 1:
+                wait = max(wait, (1 - state['requests']) * 60 / self.rpm)
+            if self.tpm and state['tokens'] < tokens:
+                wait = max(wait, (tokens - state['tokens']) * 60 / self.tpm)
+            if wait > 0:
+                return wait
+            if self.rpm:
+                state['requests'] -= 1
+            state['tokens'] -= tokens
+            return 0.0
+
+    def adjust(self, tokens: int):
+        """按实际用量修正 token 桶，正数补扣，负数退还"""
+        if not self.tpm or not tokens:
+            return
+        with self._locked_state() as state:
+            self._refill(state)
+            state['tokens'] = min(float(self.tpm), state['tokens'] - tokens)
+
+    def snapshot(self) -> Dict[str, Any]:
+        if not self.enabled:
+            return {'rpm': 0, 'tpm': 0}
+        with self._locked_state() as state:
+            self._refill(state)
+            return {'rpm': self.rpm, 'tpm': self.tpm,
+                    'available_requests': round(state['requests'], 2), 'available_tokens': round(state['tokens'])}
+
+
+class FileTokenBucket(TokenBucket):
+    """状态保存在文件中并用 fcntl 加锁，同一台机器上的多个 worker 共享限额"""
+    def __init__(self, rpm: int, tpm: int, path: str):
+        if fcntl is None:
+            raise RuntimeError('LLM_RATE_LIMIT_BACKEND=file requires fcntl (POSIX)')
+        super().__init__(rpm, tpm, clock=time.time)
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    @contextmanager
+    def _locked_state(self):
+        with self._lock, open(self.path, 'a+', encoding='utf-8') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or 'null')
+                except ValueError:
+                    state = None
+                if not isinstance(state, dict):
+                    state = self._full_state()
+                yield state
+                f.seek(0)
+                f.truncate()
+                json.dump(state, f)
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class AIMDController:
+    """
+    加性增、乘性减的并发上限。成功且延迟低于阈值时上限每轮（limit 次成功）加 1；
+    429 或延迟超过阈值时乘以 decrease_factor，cooldown 秒内只减一次，避免同一波失败把上限压到底。
+    """
+    def __init__(self, initial: int = 10, minimum: int = 1, maximum: int = 10, latency_threshold: float = 0.0,
+                 decrease_factor: float = 0.5, cooldown: float = 1.0, clock=time.monotonic):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.latency_threshold = latency_threshold
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.clock = clock
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._last_decrease = -math.inf
+
+    def current_limit(self) -> int:
+        return max(self.minimum, int(self.limit))
+
+    def acquire(self, timeout: float):
+        deadline = self.clock() + timeout
+        with self._cond:
+            while self.in_flight >= self.current_limit():
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    raise UpstreamUnavailable('Too many concurrent LLM requests, try again later', retry_after=1)
+                self._cond.wait(remaining)
+            self.in_flight += 1
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_result(self, latency: float, status_code: Optional[int]) -> bool:
+        """记录一次请求结果，返回是否降低了上限"""
+        overloaded = status_code == 429 or (self.latency_threshold and latency > self.latency_threshold)
+        with self._cond:
+            if overloaded:
+                now = self.clock()
+                if now - self._last_decrease < self.cooldown:
+                    return False
+                self._last_decrease = now
+                self.limit = max(float(self.minimum), self.limit * self.decrease_factor)
+                return True
+            if status_code is not None and 200 <= status_code < 300:
+                self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+                self._cond.notify_all()
+            return False
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def _retry_after(self) -> float:
+        return max(0.0, self.reset_timeout - (self.clock() - self._opened_at))
+
+    def check(self, reserve_probe: bool = True):
+        """
+        熔断中直接抛出 UpstreamUnavailable；半开状态只放行一个探测请求。
+        reserve_probe=False 只做检查，不占用探测名额（用于排队等待前的快速失败）
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                if self._retry_after() > 0:
+                    raise UpstreamUnavailable('LLM upstream is unavailable, try again later',
+                                              retry_after=self._retry_after())
+                if not reserve_probe:
+                    return
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    raise UpstreamUnavailable('LLM upstream is recovering, try again later',
+                                              retry_after=self.reset_timeout)
+                if reserve_probe:
+                    self._probe_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_neutral(self):
+        """上游可达但结果不计入熔断（如 429），只释放探测名额"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self) -> bool:
+        """记录一次失败，返回是否因此进入熔断"""
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self._opened_at = self.clock()
+                return True
+            return False
+
+
+class UpstreamGuard:
+    def __init__(self, bucket: Optional[TokenBucket] = None, concurrency: Optional[AIMDController] = None,
+                 breaker: Optional[CircuitBreaker] = None, max_wait: float = 30.0, slot_timeout: float = 60.0,
+                 completion_estimate: int = 1000):
+        self.bucket = bucket or TokenBucket()
+        self.concurrency = concurrency
+        self.breaker = breaker
+        self.max_wait = max_wait
+        self.slot_timeout = slot_timeout
+        self.completion_estimate = completion_estimate
+
+    @classmethod
+    def from_config(cls, config):
+        if config['LLM_RATE_LIMIT_BACKEND'] == 'file':
+            bucket = FileTokenBucket(config['LLM_RATE_LIMIT_RPM'], config['LLM_RATE_LIMIT_TPM'],
+                                     config['LLM_RATE_LIMIT_FILE'])
+        else:
+            bucket = TokenBucket(config['LLM_RATE_LIMIT_RPM'], config['LLM_RATE_LIMIT_TPM'])
+        concurrency = AIMDController(
+            initial=config['LLM_AIMD_MAX_CONCURRENCY'],
+            minimum=config['LLM_AIMD_MIN_CONCURRENCY'],
+            maximum=config['LLM_AIMD_MAX_CONCURRENCY'],
+            latency_threshold=config['LLM_AIMD_LATENCY_THRESHOLD']
+        )
+        breaker = CircuitBreaker(config['LLM_BREAKER_FAILURES'], config['LLM_BREAKER_RESET_TIMEOUT'])
+        return cls(bucket, concurrency, breaker, max_wait=config['LLM_RATE_LIMIT_MAX_WAIT'],
+                   slot_timeout=config['LLM_SLOT_TIMEOUT'],
+                   completion_estimate=config['LLM_COMPLETION_TOKEN_ESTIMATE'])
+
+    def estimate_tokens(self, arguments: Dict[str, Any]) -> int:
+        """请求前按提示词估算值加预期的输出长度预扣 token，返回后按实际用量修正"""
+        prompt = sum(estimate_tokens(m.get('content', '')) for m in arguments.get('messages', []))
+        return prompt + (arguments.get('max_tokens') or self.completion_estimate)
+
+    def _check_breaker(self, reserve_probe: bool = True):
+        if self.breaker is None:
+            return
+        try:
+            self.breaker.check(reserve_probe)
+        except UpstreamUnavailable:
+            _inc('llm_circuit_rejected_total', 'LLM calls rejected while the circuit breaker was open')
+            raise
+
+    def rate_limit_wait(self, tokens: int, waited: float) -> float:
+        """令牌桶需要等待的秒数（0 表示已取得额度）；总等待会超过 max_wait 时抛出 UpstreamUnavailable"""
+        wait = self.bucket.try_acquire(tokens)
+        if wait <= 0:
+            return 0.0
+        if waited + wait > self.max_wait:
+            _inc('llm_rate_limit_rejected_total', 'LLM calls rejected after waiting too long for rate limit')
+            raise UpstreamUnavailable('LLM rate limit exceeded, try again later', retry_after=wait)
+        _inc('llm_rate_limit_wait_seconds_total', 'Time spent waiting for the LLM rate limiter', wait)
+        return wait
+
+    def before_attempt(self, tokens: int):
+        """同步客户端: 熔断检查、等待限流额度、占用并发槽位"""
+        self._check_breaker(reserve_probe=False)
+        waited = 0.0
+        while True:
+            wait = self.rate_limit_wait(tokens, waited)
+            if not wait:
+                break
+            time.sleep(wait)
+            waited += wait
+        if self.concurrency is not None:
+            self.concurrency.acquire(self.slot_timeout)
+        try:
+            self._check_breaker()
+        except UpstreamUnavailable:
+            if self.concurrency is not None:
+                self.concurrency.release()
+            raise
+        self._publish()
+
+    async def before_attempt_async(self, tokens: int):
+        """异步客户端: 熔断检查、等待限流额度；并发由 AsyncDevMCPClient 的 AsyncLimiter 控制"""
+        self._check_breaker(reserve_probe=False)
+        waited = 0.0
+        while True:
+            wait = self.rate_limit_wait(tokens, waited)
+            if not wait:
+                break
+            await asyncio.sleep(wait)
+            waited += wait
+        self._check_breaker()
+        self._publish()
+
+    def scaled_limit(self, maximum: int) -> int:
+        """把 AIMD 上限按比例换算到另一个并发上限（异步客户端的 LLM_ASYNC_MAX_CONCURRENCY）"""
+        if self.concurrency is None:
+            return maximum
+        return max(1, int(maximum * self.concurrency.limit / self.concurrency.maximum))
+
+    def after_attempt(self, latency: float, status_code: Optional[int], release_slot: bool = True):
+        """记录一次上游请求的结果；status_code 为 None 表示连接错误或超时"""
+        if release_slot and self.concurrency is not None:
+            self.concurrency.release()
+        if self.concurrency is not None and self.concurrency.on_result(latency, status_code):
+            _inc('llm_concurrency_decreases_total', 'AIMD concurrency limit reductions')
+        if self.breaker is not None:
+            if status_code is None or status_code >= 500:
+                if self.breaker.record_failure():
+                    _inc('llm_circuit_opened_total', 'Times the LLM circuit breaker opened')
+            elif status_code == 429:
+                self.breaker.record_neutral()
+            else:
+                self.breaker.record_success()
+        self._publish()
+
+    def abandon_attempt(self, release_slot: bool = True):
+        """请求被取消或中断（没有上游结果）：只归还并发槽位和探测名额，不计入熔断和 AIMD"""
+        if release_slot and self.concurrency is not None:
+            self.concurrency.release()
+        if self.breaker is not None:
+            self.breaker.record_neutral()
+        self._publish()
+
+    def settle(self, estimated_tokens: int, actual_tokens: int):
+        self.bucket.adjust(actual_tokens - estimated_tokens)
+
+    def _publish(self):
+        if self.concurrency is not None:
+            _set_gauge('llm_concurrency_limit', 'Current AIMD concurrency limit for LLM calls',
+                       self.concurrency.current_limit())
+        if self.breaker is not None:
+            _set_gauge('llm_circuit_state', 'LLM circuit breaker state (0 closed, 1 half-open, 2 open)',
+                       CircuitBreaker.STATE_VALUES[self.breaker.state])
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot = {'rate_limit': self.bucket.snapshot()}
+        if self.concurrency is not None:
+            snapshot['concurrency'] = {'limit': self.concurrency.current_limit(),
+                                       'in_flight': self.concurrency.in_flight}
+        if self.breaker is not None:
+            snapshot['circuit'] = {'state': self.breaker.state, 'failures': self.breaker.failures}
+        return snapshot
+
+
+def get_upstream_guard() -> UpstreamGuard:
+    """当前应用的 UpstreamGuard，同步和异步客户端共用同一份限额和熔断状态"""
+    guard = current_app.extensions.get('llm_upstream_guard')
+    if guard is None:
+        guard = current_app.extensions.setdefault('llm_upstream_guard', UpstreamGuard.from_config(current_app.config))
+    return guard
+
+
+def init_app(app):
+    @app.errorhandler(UpstreamUnavailable)
+    def upstream_unavailable(error):
+        response = jsonify({'status': 'error', 'message': str(error)})
+        response.status_code = 503
+        if error.retry_after is not None:
+            response.headers['Retry-After'] = str(max(1, math.ceil(error.retry_after)))
+        return response
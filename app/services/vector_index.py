@@ -0,0 +1,337 @@
+"""
+职位向量索引，用于 match_jobs 的语义候选召回（retrieval=vector）。
+
+每个职位一个向量，按行追加到 VECTOR_INDEX_DIR 下的两个文件:
+
+- vectors.f32: float32 矩阵（行数 × VECTOR_DIM），写入前已归一化，余弦相似度即点积
+- ids.i64: 每行对应的职位 ID
+- meta.json: 嵌入模型名称和维度，与当前配置不一致时需要重建
+
+查询时以只读 np.memmap 映射文件，数据留在操作系统页缓存中，由同一台机器上的所有 worker 共享。
+写入（新建职位时追加、flask rebuild-vector-index 重建）用 fcntl 文件锁与其他进程互斥；
+读取方发现文件大小或 inode 变化后重新映射。同一职位再次写入时以最后一行为准，
+已删除的职位在回表加载时过滤。
+
+嵌入模型可插拔: VECTOR_EMBEDDER=hashing 使用本地确定性的特征哈希嵌入（离线可用），
+也可以写成 "模块:工厂函数"，工厂函数接收 app.config，返回带 name、dim 和 embed(texts) 的对象。
+需要 numpy（可选依赖）。
+"""
+
+import hashlib
+import importlib
+import json
+import math
+import os
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+from flask import current_app
+
+from app.models import Job
+from app.services.text_utils import tokenize
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 可选依赖
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - 非 POSIX 平台
+    fcntl = None
+
+VECTORS_FILE = 'vectors.f32'
+IDS_FILE = 'ids.i64'
+META_FILE = 'meta.json'
+LOCK_FILE = '.lock'
+
+_get_lock = threading.Lock()
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError('The vector index requires numpy (pip install numpy)')
+
+
+class HashingEmbedder:
+    """特征哈希嵌入: 词元经 blake2b 哈希到固定维度（带符号），按 1 + log(tf) 加权后 L2 归一化"""
+    name = 'hashing'
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def _bucket(self, token: str) -> Tuple[int, float]:
+        digest = int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+        return digest % self.dim, 1.0 if digest >> 63 else -1.0
+
+    def embed(self, texts: Sequence[str]):
+        _require_numpy()
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token, count in Counter(tokenize(text)).items():
+                column, sign = self._bucket(token)
+                vectors[row, column] += sign * (1.0 + math.log(count))
+        return vectors
+
+
+def load_embedder(config):
+    spec = config['VECTOR_EMBEDDER']
+    if spec == 'hashing':
+        return HashingEmbedder(config['VECTOR_DIM'])
+    module_name, _, factory = spec.partition(':')
+    if not factory:
+        raise RuntimeError(f"VECTOR_EMBEDDER must be 'hashing' or 'module:factory', got {spec!r}")
+    return getattr(importlib.import_module(module_name), factory)(config)
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+class _View:
+    """某一时刻映射的索引内容"""
+    def __init__(self, key, vectors, ids):
+        self.key = key
+        self.vectors = vectors
+        self.ids = ids
+        # 同一职位出现多次时只保留最后一行
+        stale = None
+        if len(ids):
+            _, last_reversed = np.unique(ids[::-1], return_index=True)
+            if len(last_reversed) < len(ids):
+                stale = np.ones(len(ids), dtype=bool)
+                stale[len(ids) - 1 - last_reversed] = False
+        self.stale = stale
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class VectorIndex:
+    def __init__(self, directory: str, dim: int, embedder_name: str = 'hashing', block_rows: int = 65536,
+                 check_meta: bool = True):
+        """check_meta=False 跳过模型/维度校验，仅用于随后以 replace() 重建的场景"""
+        _require_numpy()
+        if fcntl is None:
+            raise RuntimeError('The vector index requires fcntl (POSIX)')
+        self.directory = directory
+        self.dim = dim
+        self.embedder_name = embedder_name
+        self.block_rows = block_rows
+        self._lock = threading.Lock()
+        self._view: Optional[_View] = None
+        os.makedirs(directory, exist_ok=True)
+        if check_meta:
+            with self._file_lock(fcntl.LOCK_EX):
+                self._check_meta()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @contextmanager
+    def _file_lock(self, mode):
+        with open(self._path(LOCK_FILE), 'a') as f:
+            fcntl.flock(f, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _write_meta(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'embedder': self.embedder_name, 'dim': self.dim}, f)
+
+    def _check_meta(self):
+        path = self._path(META_FILE)
+        if not os.path.exists(path):
+            self._write_meta(path)
+            return
+        with open(path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta != {'embedder': self.embedder_name, 'dim': self.dim}:
+            raise RuntimeError(
+                f"Vector index at {self.directory} was built with {meta}, run flask rebuild-vector-index"
+            )
+
+    def _row_count(self) -> int:
+        """两个文件中完整写入的行数"""
+        def size(name):
+            try:
+                return os.path.getsize(self._path(name))
+            except FileNotFoundError:
+                return 0
+        return min(size(IDS_FILE) // 8, size(VECTORS_FILE) // (4 * self.dim))
+
+    def append(self, job_ids: Sequence[int], vectors):
+        """追加向量（会先归一化）；调用方须保证职位已提交"""
+        vectors = _normalize(vectors)
+        if vectors.shape != (len(job_ids), self.dim):
+            raise ValueError(f"Expected {len(job_ids)} vectors of dim {self.dim}, got {vectors.shape}")
+        ids = np.asarray(job_ids, dtype='<i8')
+        with self._file_lock(fcntl.LOCK_EX):
+            # 截掉上次中断写入留下的不完整行，保证两个文件行数一致
+            rows = self._row_count()
+            with open(self._path(VECTORS_FILE), 'ab') as f:
+                f.truncate(rows * 4 * self.dim)
+                f.write(vectors.astype('<f4').tobytes())
+            with open(self._path(IDS_FILE), 'ab') as f:
+                f.truncate(rows * 8)
+                f.write(ids.tobytes())
+
+    def replace(self, batches: Iterable[Tuple[Sequence[int], Any]]) -> int:
+        """用 batches（[(job_ids, vectors)]）整体替换索引内容，返回写入的行数"""
+        count = 0
+        suffix = f'.{os.getpid()}.tmp'
+        with self._file_lock(fcntl.LOCK_EX):
+            with open(self._path(VECTORS_FILE + suffix), 'wb') as vf, open(self._path(IDS_FILE + suffix), 'wb') as idf:
+                for job_ids, vectors in batches:
+                    vf.write(_normalize(vectors).astype('<f4').tobytes())
+                    idf.write(np.asarray(job_ids, dtype='<i8').tobytes())
+                    count += len(job_ids)
+            self._write_meta(self._path(META_FILE + suffix))
+            for name in (VECTORS_FILE, IDS_FILE, META_FILE):
+                os.replace(self._path(name + suffix), self._path(name))
+        return count
+
+    def _stat_key(self):
+        key = []
+        for name in (VECTORS_FILE, IDS_FILE):
+            try:
+                st = os.stat(self._path(name))
+                key.append((st.st_ino, st.st_size))
+            except FileNotFoundError:
+                key.append(None)
+        return tuple(key)
+
+    def view(self) -> _View:
+        """当前索引内容的只读映射，文件变化后重新映射"""
+        key = self._stat_key()
+        view = self._view
+        if view is not None and view.key == key:
+            return view
+        with self._lock, self._file_lock(fcntl.LOCK_SH):
+            key = self._stat_key()
+            rows = self._row_count()
+            if rows:
+                vectors = np.memmap(self._path(VECTORS_FILE), dtype='<f4', mode='r', shape=(rows, self.dim))
+                ids = np.memmap(self._path(IDS_FILE), dtype='<i8', mode='r', shape=(rows,))
+            else:
+                vectors = np.zeros((0, self.dim), dtype=np.float32)
+                ids = np.zeros(0, dtype=np.int64)
+            self._view = _View(key, vectors, ids)
+            return self._view
+
+    def __len__(self) -> int:
+        view = self.view()
+        return len(view) if view.stale is None else int((~view.stale).sum())
+
+    def search(self, queries, top_k: int) -> List[List[Tuple[int, float]]]:
+        """
+        批量 top-K 余弦检索，queries 为 (m, dim) 或 (dim,)，返回每个查询的 [(job_id, 相似度)]。
+        按 block_rows 行分块做矩阵乘法，避免一次性物化整块映射；相似度矩阵为 n × m 的 float32，
+        临时内存随索引行数线性增长（10 万行、单个查询约 400 KB）。
+        """
+        queries = _normalize(queries)
+        view = self.view()
+        n = len(view)
+        if not n or top_k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        scores = np.empty((n, len(queries)), dtype=np.float32)
+        for start in range(0, n, self.block_rows):
+            end = min(n, start + self.block_rows)
+            np.matmul(view.vectors[start:end], queries.T, out=scores[start:end])
+        if view.stale is not None:
+            scores[view.stale] = -np.inf
+
+        k = min(top_k, n)
+        results = []
+        for column in scores.T:
+            top = np.argpartition(-column, k - 1)[:k]
+            top = top[np.argsort(-column[top], kind='stable')]
+            results.append([(int(view.ids[i]), float(column[i])) for i in top if column[i] > -np.inf])
+        return results
+
+
+def job_text(job: Job) -> str:
+    """职位的嵌入文本"""
+    parts = [job.job_title, *job.get_requirements(), *job.get_responsibilities(), job.raw_jd_text]
+    return '\n'.join(part for part in parts if isinstance(part, str) and part)
+
+
+def get_embedder():
+    embedder = current_app.extensions.get('vector_embedder')
+    if embedder is None:
+        embedder = current_app.extensions.setdefault('vector_embedder', load_embedder(current_app.config))
+    return embedder
+
+
+def get_index() -> VectorIndex:
+    """当前应用的向量索引；未启用或缺少依赖时抛出 RuntimeError"""
+    config = current_app.config
+    if not config['VECTOR_INDEX_ENABLED']:
+        raise RuntimeError('Vector index is disabled (VECTOR_INDEX_ENABLED=false)')
+    index = current_app.extensions.get('vector_index')
+    if index is None:
+        with _get_lock:
+            index = current_app.extensions.get('vector_index')
+            if index is None:
+                index = current_app.extensions['vector_index'] = _open_index()
+    return index
+
+
+def _open_index(check_meta: bool = True) -> VectorIndex:
+    config = current_app.config
+    embedder = get_embedder()
+    return VectorIndex(config['VECTOR_INDEX_DIR'], embedder.dim, embedder.name,
+                       block_rows=config['VECTOR_SEARCH_BLOCK_ROWS'], check_meta=check_meta)
+
+
+def index_jobs(jobs: Sequence[Job]):
+    """
+    新建职位提交后追加向量。索引是派生数据，写入失败只记录日志，
+    之后可用 flask rebuild-vector-index 补齐。
+    """
+    if not jobs or not current_app.config['VECTOR_INDEX_ENABLED']:
+        return
+    try:
+        index = get_index()
+        index.append([job.id for job in jobs], get_embedder().embed([job_text(job) for job in jobs]))
+    except Exception as e:
+        current_app.logger.error(f"Failed to add {len(jobs)} jobs to the vector index: {str(e)}")
+
+
+def rebuild_index(batch_size: int = 500) -> int:
+    """
+    按职位 ID 顺序重新嵌入全部职位并替换索引，返回处理的职位数。
+    更换嵌入模型或维度后已有索引无法打开，这里跳过校验，replace() 会一并写入新的 meta.json。
+    """
+    if not current_app.config['VECTOR_INDEX_ENABLED']:
+        raise RuntimeError('Vector index is disabled (VECTOR_INDEX_ENABLED=false)')
+    index = _open_index(check_meta=False)
+    embedder = get_embedder()
+
+    def batches():
+        last_id = 0
+        while True:
+            jobs = Job.query.filter(Job.id > last_id).order_by(Job.id).limit(batch_size).all()
+            if not jobs:
+                break
+            yield [job.id for job in jobs], embedder.embed([job_text(job) for job in jobs])
+            last_id = jobs[-1].id
+
+    count = index.replace(batches())
+    with _get_lock:
+        current_app.extensions['vector_index'] = index
+    return count
+
+
+def search_jobs(text: str, top_k: int) -> List[Tuple[int, float]]:
+    """按文本语义检索最相近的职位 [(job_id, 相似度)]"""
+    return get_index().search(get_embedder().embed([text]), top_k)[0]
@@ -0,0 +1,119 @@
+"""
+响应 JSON 序列化基准测试。
+
+构造与 /api/user/profile、/api/job/<id> 相当的负载（中文简历分析、完整 JD），
+比较标准库 jsonify 默认行为（ensure_ascii=True）与 FastJSONProvider 各后端的
+序列化耗时和响应体大小:
+
+    python benchmarks/json_benchmark.py --iterations 2000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from app.json_provider import FastJSONProvider, orjson  # noqa: E402
+
+SENTENCE = '负责核心交易系统的设计与开发，使用 Java、Kafka 和 Redis 构建高并发低延迟的分布式服务'
+
+
+def profile_payload():
+    analysis = [SENTENCE] * 8
+    return {
+        'status': 'ok',
+        'user': {
+            'id': 1,
+            'email': 'user@example.com',
+            'name': '张三',
+            'resume_text': SENTENCE * 60,
+            'resume_parsed_data': {
+                'technical_analysis': {'tech_stack': ['Java', 'Kafka', 'Redis', 'MySQL', 'Kubernetes'],
+                                       'depth_evaluation': analysis, 'learning_ability': analysis},
+                'experience_analysis': {'years': 6, 'career_path': analysis, 'project_highlights': analysis},
+                'education_analysis': {'background': SENTENCE, 'continuous_learning': analysis},
+                'core_competencies': {'key_skills': analysis, 'unique_strengths': analysis},
+                'career_analysis': {'suitable_positions': ['后端工程师', '架构师'], 'potential_fields': analysis},
+            },
+            'is_admin': False,
+            'created_at': datetime(2026, 1, 1, 8, 30),
+        }
+    }
+
+
+def job_payload():
+    return {
+        'status': 'ok',
+        'job': {
+            'id': 42,
+            'job_title': '高级后端工程师',
+            'company_name': 'ABC科技有限公司',
+            'location': '北京',
+            'responsibilities': [SENTENCE] * 10,
+            'requirements': [SENTENCE] * 10,
+            'raw_jd_text': SENTENCE * 40,
+            'created_at': datetime(2026, 1, 1, 8, 30),
+            'updated_at': datetime(2026, 1, 2, 9, 15),
+        }
+    }
+
+
+def make_app(**config):
+    app = Flask(__name__)
+    app.config.update(config)
+    return app
+
+
+def stdlib_default(app):
+    provider = DefaultJSONProvider(app)
+
+    def to_jsonable(payload):
+        # 原先 to_dict 中手动调用 isoformat
+        data = {k: dict(v) if isinstance(v, dict) else v for k, v in payload.items()}
+        for value in data.values():
+            if isinstance(value, dict):
+                for key, item in value.items():
+                    if isinstance(item, datetime):
+                        value[key] = item.isoformat()
+        return data
+
+    return lambda payload: provider.dumps(to_jsonable(payload), separators=(',', ':'))
+
+
+def bench(encode, payload, iterations):
+    body = encode(payload)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        encode(payload)
+    elapsed = time.perf_counter() - start
+    size = len(body.encode('utf-8') if isinstance(body, str) else body)
+    return elapsed / iterations * 1e6, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    encoders = {'stdlib (ensure_ascii, before)': stdlib_default(make_app())}
+    stdlib = FastJSONProvider(make_app(JSON_BACKEND='stdlib'))
+    encoders['FastJSONProvider stdlib'] = lambda payload: stdlib.dumps(payload, separators=(',', ':'))
+    if orjson is not None:
+        fast = FastJSONProvider(make_app(JSON_BACKEND='orjson'))
+        encoders['FastJSONProvider orjson'] = fast.dumps
+
+    for name, payload in (('/api/user/profile', profile_payload()), ('/api/job/<id>', job_payload())):
+        print(name)
+        for label, encode in encoders.items():
+            per_call, size = bench(encode, payload, args.iterations)
+            print(f"  {label:32s} {per_call:8.1f} us/op  {size:8d} bytes")
+
+
+if __name__ == '__main__':
+    main()
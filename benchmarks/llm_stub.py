@@ -0,0 +1,85 @@
+"""
+离线基准测试用的大模型替身。
+
+实现与 DevMCPClient 相同的 use_tool 接口，按提示词类型返回合法的 JSON
+（职位解析、简历解析、职位匹配），可配置延迟和响应文本长度。
+挂到 app.mcp 上后 get_mcp_client() 会优先返回它。
+"""
+
+import json
+import random
+import threading
+import time
+
+from app.services.ai_service import MATCH_SYSTEM_PROMPT
+
+SKILLS = ['Python', 'Java', 'Go', 'Kafka', 'Redis', 'MySQL', 'PostgreSQL', 'Kubernetes', 'Docker', 'React']
+
+
+class StubLLMClient:
+    def __init__(self, latency_ms=200.0, jitter_ms=0.0, response_chars=200, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.response_chars = response_chars
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _text(self):
+        return ('匹配分析' * (self.response_chars // 4 + 1))[:self.response_chars]
+
+    def _sleep(self):
+        with self._lock:
+            self.calls += 1
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        delay = max(0.0, self.latency_ms + jitter) / 1000
+        if delay:
+            time.sleep(delay)
+
+    def _parse_job(self, raw_jd_text):
+        return {
+            'job_title': '后端工程师',
+            'company_name': '基准测试公司',
+            'location': '北京',
+            'responsibilities': [self._text()],
+            'requirements': SKILLS[:4]
+        }
+
+    def _parse_resume(self, resume_text):
+        text = self._text()
+        return {
+            'technical_analysis': {'tech_stack': SKILLS[:5], 'depth_evaluation': text},
+            'experience_analysis': {'years': 5, 'career_path': text, 'project_highlights': [text]},
+            'education_analysis': {'background': '计算机科学本科'},
+            'core_competencies': {'key_skills': SKILLS[:3], 'unique_strengths': text},
+            'career_analysis': {'suitable_positions': ['后端工程师'], 'development_suggestions': text}
+        }
+
+    def _match(self, payload):
+        text = self._text()
+        return {'recommendations': [
+            {
+                'job_id': job['id'],
+                'match_score': 90 - index,
+                'match_analysis': text,
+                'advantages': [text],
+                'challenges': [text],
+                'suggestions': [text]
+            }
+            for index, job in enumerate(payload['jobs'])
+        ]}
+
+    def use_tool(self, server_name, tool_name, arguments):
+        if server_name != 'siliconflow' or tool_name != 'json_mode':
+            raise ValueError(f"Unsupported tool: {server_name}/{tool_name}")
+
+        system, user = arguments['messages'][0]['content'], arguments['messages'][1]['content']
+        if system == MATCH_SYSTEM_PROMPT:
+            result = self._match(json.loads(user))
+        elif 'technical_analysis' in system:
+            result = self._parse_resume(user)
+        else:
+            result = self._parse_job(user)
+
+        self._sleep()
+        return {'content': json.dumps(result, ensure_ascii=False)}
@@ -0,0 +1,78 @@
+"""
+登录吞吐基准测试。
+
+在临时 SQLite 数据库中创建一个用户，用多个线程并发调用 /api/auth/login，
+输出吞吐量和延迟分位数。用于比较不同 bcrypt cost 和哈希线程数的效果:
+
+    python benchmarks/login_benchmark.py --rounds 12 --workers 2 --concurrency 16 --requests 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db  # noqa: E402
+from app.models import User  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=0, help='bcrypt cost, 0 表示自动校准')
+    parser.add_argument('--workers', type=int, default=2, help='哈希线程池大小')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=100)
+    return parser.parse_args()
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def main():
+    args = parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        from config import Config
+
+        class BenchmarkConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+            LOG_FILE = os.path.join(tmpdir, 'bench.log')
+            BCRYPT_ROUNDS = args.rounds or None
+            PASSWORD_HASH_WORKERS = args.workers
+
+        app = create_app(BenchmarkConfig)
+        with app.app_context():
+            db.create_all()
+            user = User(email='bench@example.com', name='Bench')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+
+        def login(_):
+            client = app.test_client()
+            start = time.perf_counter()
+            response = client.post('/api/auth/login', json={'email': 'bench@example.com', 'password': 'password123'})
+            return time.perf_counter() - start, response.status_code
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            results = list(executor.map(login, range(args.requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency * 1000 for latency, _ in results)
+    errors = sum(1 for _, status in results if status != 200)
+    print(f"bcrypt rounds:  {app.extensions['bcrypt_rounds']}")
+    print(f"requests:       {args.requests} ({errors} errors), concurrency {args.concurrency}")
+    print(f"throughput:     {args.requests / elapsed:.1f} req/s")
+    print(f"latency (ms):   mean {statistics.mean(latencies):.1f}, p50 {percentile(latencies, 0.5):.1f}, "
+          f"p95 {percentile(latencies, 0.95):.1f}, max {latencies[-1]:.1f}")
+
+
+if __name__ == '__main__':
+    main()
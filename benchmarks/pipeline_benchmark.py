@@ -0,0 +1,226 @@
+"""
+完整请求链路基准测试（离线）。
+
+在临时 SQLite 数据库中写入 N 个用户和 M 个职位，用 llm_stub.StubLLMClient
+替换大模型客户端，然后并发压测以下接口并输出吞吐量和 p50/p95/p99 延迟:
+
+    login          POST /api/auth/login
+    list_jobs      GET  /api/job/?page=...
+    get_job        GET  /api/job/<id>
+    update_resume  PUT  /api/user/update_resume
+    match_jobs     GET  /api/user/match_jobs
+
+结果以 JSON 写入 --output，可用 --compare 与另一次（如上一个提交）的结果对比:
+
+    python benchmarks/pipeline_benchmark.py --users 50 --jobs 2000 --concurrency 8 \\
+        --requests 200 --llm-latency 300 --output bench.json
+    python benchmarks/pipeline_benchmark.py ... --output new.json --compare bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, UTC
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import create_app, db  # noqa: E402
+from app.middleware import generate_token  # noqa: E402
+from app.models import Job, User  # noqa: E402
+from app.services import password_service  # noqa: E402
+from benchmarks.llm_stub import SKILLS, StubLLMClient  # noqa: E402
+
+SCENARIOS = ('login', 'list_jobs', 'get_job', 'update_resume', 'match_jobs')
+TITLES = ['后端工程师', '前端工程师', '数据工程师', '算法工程师', '测试工程师', '运维工程师']
+LOCATIONS = ['北京', '上海', '深圳', '杭州']
+PASSWORD = 'password123'
+RESUME_TEXT = '六年后端开发经验，熟悉 Python、Kafka 和 Redis，负责过高并发交易系统的设计与开发。'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--jobs', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=100, help='每个场景的请求数')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--llm-latency', type=float, default=200.0, help='替身大模型延迟 (ms)')
+    parser.add_argument('--llm-jitter', type=float, default=0.0, help='延迟随机抖动 (±ms)')
+    parser.add_argument('--llm-response-chars', type=int, default=200, help='响应中每段文本的长度')
+    parser.add_argument('--rounds', type=int, default=0, help='bcrypt cost, 0 表示自动校准')
+    parser.add_argument('--no-llm-cache', action='store_true', help='关闭大模型响应缓存')
+    parser.add_argument('--reuse-matches', action='store_true',
+                        help='match_jobs 复用已保存的匹配结果（默认 refresh=true，每次都调用大模型）')
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--compare', help='与之前的结果文件对比')
+    return parser.parse_args()
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def seed(app, n_users, n_jobs):
+    """写入测试数据，返回 [(user_id, email, token)] 和职位 ID 列表"""
+    with app.app_context():
+        db.create_all()
+        # 所有用户共用同一个哈希，避免写入数据时按用户数重复计算 bcrypt
+        password_hash = password_service.hash_password(PASSWORD)
+        for i in range(n_jobs):
+            job = Job(
+                job_title=TITLES[i % len(TITLES)],
+                company_name=f'公司{i % 97}',
+                location=LOCATIONS[i % len(LOCATIONS)],
+                raw_jd_text=f'{TITLES[i % len(TITLES)]} 职位描述 {i} ' + '负责核心系统的设计与开发。' * 20
+            )
+            job.set_requirements([SKILLS[i % len(SKILLS)], SKILLS[(i + 3) % len(SKILLS)]])
+            job.set_responsibilities(['负责核心系统的设计与开发'])
+            db.session.add(job)
+        users = []
+        for i in range(n_users):
+            user = User(email=f'bench{i}@example.com', name=f'Bench {i}', password_hash=password_hash,
+                        resume_text=RESUME_TEXT)
+            user.set_resume_parsed_data(app.mcp._parse_resume(RESUME_TEXT))
+            db.session.add(user)
+            users.append(user)
+        db.session.commit()
+        job_ids = [job_id for job_id, in db.session.query(Job.id)]
+        return [(user.id, user.email, generate_token(user.id, user.is_admin, user.email)) for user in users], job_ids
+
+
+def build_requests(args, users, job_ids):
+    """每个场景返回 index -> (method, url, kwargs)"""
+    pages = max(1, len(job_ids) // 20)
+
+    def auth(i):
+        return {'Authorization': f'Bearer {users[i % len(users)][2]}'}
+
+    return {
+        'login': lambda i: ('POST', '/api/auth/login',
+                            {'json': {'email': users[i % len(users)][1], 'password': PASSWORD}}),
+        'list_jobs': lambda i: ('GET', f'/api/job/?page={i % pages + 1}&per_page=20', {}),
+        'get_job': lambda i: ('GET', f'/api/job/{job_ids[i % len(job_ids)]}', {}),
+        # 每次请求的简历文本不同，避免命中大模型缓存
+        'update_resume': lambda i: ('PUT', '/api/user/update_resume',
+                                    {'json': {'resume_text': f'{RESUME_TEXT} #{i}'}, 'headers': auth(i)}),
+        'match_jobs': lambda i: ('GET', '/api/user/match_jobs?desired_position=后端工程师'
+                                        f'&desired_location={LOCATIONS[i % len(LOCATIONS)]}'
+                                        f"&refresh={'false' if args.reuse_matches else 'true'}",
+                                 {'headers': auth(i)}),
+    }
+
+
+def run_scenario(app, make_request, n_requests, concurrency):
+    def call(i):
+        method, url, kwargs = make_request(i)
+        client = app.test_client()
+        start = time.perf_counter()
+        response = client.open(url, method=method, **kwargs)
+        return time.perf_counter() - start, response.status_code
+
+    llm_calls = app.mcp.calls
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(call, range(n_requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency * 1000 for latency, _ in results)
+    statuses = {}
+    for _, status in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        'requests': n_requests,
+        'errors': sum(1 for _, status in results if status >= 400),
+        'status_codes': statuses,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(n_requests / elapsed, 2),
+        'llm_calls': app.mcp.calls - llm_calls,
+        'latency_ms': {
+            'mean': round(statistics.mean(latencies), 2),
+            'p50': round(percentile(latencies, 0.50), 2),
+            'p95': round(percentile(latencies, 0.95), 2),
+            'p99': round(percentile(latencies, 0.99), 2),
+            'max': round(latencies[-1], 2),
+        }
+    }
+
+
+def print_results(results, baseline=None):
+    header = f"{'scenario':<14}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>8}{'llm':>6}"
+    print(header)
+    print('-' * len(header))
+    for name, result in results['scenarios'].items():
+        latency = result['latency_ms']
+        print(f"{name:<14}{result['throughput_rps']:>10.1f}{latency['p50']:>10.1f}{latency['p95']:>10.1f}"
+              f"{latency['p99']:>10.1f}{result['errors']:>8}{result['llm_calls']:>6}")
+        old = (baseline or {}).get('scenarios', {}).get(name)
+        if old:
+            def delta(new, prev):
+                return f"{(new - prev) / prev * 100:+.1f}%" if prev else 'n/a'
+            print(f"{'  vs baseline':<14}{delta(result['throughput_rps'], old['throughput_rps']):>10}"
+                  + ''.join(f"{delta(latency[q], old['latency_ms'][q]):>10}" for q in ('p50', 'p95', 'p99')))
+
+
+def main():
+    args = parse_args()
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        from config import Config
+
+        class BenchmarkConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+            LOG_FILE = os.path.join(tmpdir, 'bench.log')
+            BCRYPT_ROUNDS = args.rounds or None
+            LLM_CACHE_ENABLED = not args.no_llm_cache
+
+        app = create_app(BenchmarkConfig)
+        app.mcp = StubLLMClient(args.llm_latency, args.llm_jitter, args.llm_response_chars)
+        users, job_ids = seed(app, args.users, args.jobs)
+        requests = build_requests(args, users, job_ids)
+
+        results = {
+            'meta': {
+                'git_revision': git_revision(),
+                'timestamp': datetime.now(UTC).isoformat(),
+                'python': platform.python_version(),
+                'bcrypt_rounds': app.extensions['bcrypt_rounds'],
+                'args': vars(args),
+            },
+            'scenarios': {
+                name: run_scenario(app, requests[name], args.requests, args.concurrency) for name in scenarios
+            }
+        }
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    print(f"\nresults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
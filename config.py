@@ -1,4 +1,6 @@
 import os
+import json
+import tempfile
 import logging
 from logging.handlers import RotatingFileHandler
 from dotenv import load_dotenv
@@ -11,6 +13,120 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-key-change-this')
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-key-change-this')
     JWT_EXPIRATION_HOURS = float(os.getenv('JWT_EXPIRATION_HOURS', '2'))
+    # 密码哈希: 未设置 BCRYPT_ROUNDS 时按 BCRYPT_TARGET_MS 自动校准 cost
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '0')) or None
+    BCRYPT_TARGET_MS = float(os.getenv('BCRYPT_TARGET_MS', '250'))      # 单次哈希的目标耗时(毫秒)
+    BCRYPT_MIN_ROUNDS = int(os.getenv('BCRYPT_MIN_ROUNDS', '12'))       # 自动校准的下限，不低于 bcrypt 默认值
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))     # 同时执行的哈希数
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', '10'))  # 排队等待上限(秒)
+    # 已验证用户的缓存，命中时鉴权不查询数据库
+    AUTH_PRINCIPAL_CACHE_TTL = float(os.getenv('AUTH_PRINCIPAL_CACHE_TTL', '60'))          # 秒
+    AUTH_PRINCIPAL_CACHE_SIZE = int(os.getenv('AUTH_PRINCIPAL_CACHE_SIZE', '10000'))
+    # 缓存未命中时直接信任 token 中的 is_admin/email，不回查数据库（管理员权限判断仍回查数据库）
+    JWT_TRUST_CLAIMS = os.getenv('JWT_TRUST_CLAIMS', 'false').lower() == 'true'
+
+    # 响应 JSON 序列化: auto 在安装了 orjson 时使用 orjson, 也可指定 orjson / stdlib
+    JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto')
+    JSON_ENSURE_ASCII = os.getenv('JSON_ENSURE_ASCII', 'false').lower() == 'true'  # false 时中文不转义
+    JSON_SORT_KEYS = os.getenv('JSON_SORT_KEYS', 'true').lower() == 'true'
+
+    # 大模型配置
+    LLM_MODEL = os.getenv('LLM_MODEL', 'Qwen/Qwen2.5-72B-Instruct-128K')
+    LLM_API_BASE_URL = os.getenv('LLM_API_BASE_URL', 'https://api.siliconflow.cn/v1')
+    SILICONFLOW_API_KEY = os.getenv('SILICONFLOW_API_KEY')  # 必填, 未设置时调用大模型会报错
+    LLM_POOL_SIZE = int(os.getenv('LLM_POOL_SIZE', '10'))                  # 每个进程保持的连接数
+    LLM_CONNECT_TIMEOUT = float(os.getenv('LLM_CONNECT_TIMEOUT', '5'))     # 秒
+    LLM_READ_TIMEOUT = float(os.getenv('LLM_READ_TIMEOUT', '120'))         # 秒
+    LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '3'))               # 429/5xx/连接错误的重试次数
+    LLM_BACKOFF_FACTOR = float(os.getenv('LLM_BACKOFF_FACTOR', '0.5'))     # 指数退避基数(秒)
+    LLM_BACKOFF_MAX = float(os.getenv('LLM_BACKOFF_MAX', '30'))            # 单次退避上限(秒)
+    LLM_ASYNC_MAX_CONCURRENCY = int(os.getenv('LLM_ASYNC_MAX_CONCURRENCY', '100'))  # 异步客户端同时在途的请求上限
+    # 相同参数的在途大模型调用合并: off / thread(进程内) / file(跨 worker，基于文件锁)
+    LLM_SINGLE_FLIGHT = os.getenv('LLM_SINGLE_FLIGHT', 'thread')
+    LLM_SINGLE_FLIGHT_DIR = os.getenv('LLM_SINGLE_FLIGHT_DIR', 'instance/llm_flight')  # 结果含个人信息，勿放在共享目录
+    LLM_SINGLE_FLIGHT_TIMEOUT = float(os.getenv('LLM_SINGLE_FLIGHT_TIMEOUT', '300'))  # 等待在途调用的最长秒数
+
+    # 大模型上游保护: 限流（0 表示不限制）、自适应并发和熔断
+    LLM_RATE_LIMIT_RPM = int(os.getenv('LLM_RATE_LIMIT_RPM', '0'))        # 每分钟请求数上限
+    LLM_RATE_LIMIT_TPM = int(os.getenv('LLM_RATE_LIMIT_TPM', '0'))        # 每分钟 token 数上限
+    # 限流状态: memory(每个进程独立) / file(同一台机器的 worker 共享，基于文件锁)
+    LLM_RATE_LIMIT_BACKEND = os.getenv('LLM_RATE_LIMIT_BACKEND', 'memory')
+    LLM_RATE_LIMIT_FILE = os.getenv('LLM_RATE_LIMIT_FILE', os.path.join(tempfile.gettempdir(), 'jobsearch-llm-ratelimit.json'))
+    LLM_RATE_LIMIT_MAX_WAIT = float(os.getenv('LLM_RATE_LIMIT_MAX_WAIT', '30'))  # 等待限流额度的最长秒数，超过返回 503
+    LLM_COMPLETION_TOKEN_ESTIMATE = int(os.getenv('LLM_COMPLETION_TOKEN_ESTIMATE', '1000'))  # 未指定 max_tokens 时预扣的输出 token 数
+    LLM_AIMD_MIN_CONCURRENCY = int(os.getenv('LLM_AIMD_MIN_CONCURRENCY', '1'))    # 自适应并发下限
+    LLM_AIMD_MAX_CONCURRENCY = int(os.getenv('LLM_AIMD_MAX_CONCURRENCY', '10'))   # 自适应并发上限（同步客户端）
+    LLM_AIMD_LATENCY_THRESHOLD = float(os.getenv('LLM_AIMD_LATENCY_THRESHOLD', '90'))  # 单次请求超过该秒数视为过载，0 表示不看延迟
+    LLM_SLOT_TIMEOUT = float(os.getenv('LLM_SLOT_TIMEOUT', '60'))          # 等待并发槽位的最长秒数
+    LLM_BREAKER_FAILURES = int(os.getenv('LLM_BREAKER_FAILURES', '5'))     # 连续失败多少次后熔断
+    LLM_BREAKER_RESET_TIMEOUT = float(os.getenv('LLM_BREAKER_RESET_TIMEOUT', '30'))  # 熔断多少秒后放行探测请求
+
+    # 大模型解析结果缓存
+    LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+    LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', str(30 * 24 * 3600)))  # 秒
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '10000'))
+
+    # 后台任务队列
+    TASK_QUEUE_WORKERS = int(os.getenv('TASK_QUEUE_WORKERS', '4'))  # 同时执行的大模型解析任务数
+    TASK_QUEUE_EAGER = os.getenv('TASK_QUEUE_EAGER', 'false').lower() == 'true'
+    TASK_QUEUE_STALE_AFTER = int(os.getenv('TASK_QUEUE_STALE_AFTER', '600'))  # 秒
+    TASK_QUEUE_HEARTBEAT = float(os.getenv('TASK_QUEUE_HEARTBEAT', '60'))  # 执行中任务的心跳间隔(秒), 须小于 STALE_AFTER
+
+    # 批量导入 JD
+    JD_BATCH_WORKERS = int(os.getenv('JD_BATCH_WORKERS', '8'))         # 并行解析的线程数
+    JD_BATCH_CHUNK_SIZE = int(os.getenv('JD_BATCH_CHUNK_SIZE', '200'))  # 每次批量写入的行数
+    JD_BATCH_MAX_ITEMS = int(os.getenv('JD_BATCH_MAX_ITEMS', '5000'))   # 单个请求的最大条数
+
+    # 全文检索后端: auto 按数据库方言选择, 也可指定 fts5 / postgres / like
+    SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'auto')
+
+    # 监控: /metrics 输出 Prometheus 文本格式指标，默认关闭
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() == 'true'
+    # /metrics 的访问控制: 带 "Authorization: Bearer <METRICS_TOKEN>"，或来源 IP 在白名单中；都未配置时拒绝访问
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+    METRICS_ALLOWED_IPS = [ip for ip in os.getenv('METRICS_ALLOWED_IPS', '').split(',') if ip]
+    # 响应附带 Server-Timing 头（会暴露 SQL/大模型耗时），默认关闭，仅在排查性能时开启
+    SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'false').lower() == 'true'
+
+    # 响应压缩: 按 Accept-Encoding 选择 br(需安装 brotli) 或 gzip
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))    # 小于该字节数的响应不压缩
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', '6'))             # gzip 压缩级别 1-9
+    COMPRESS_BR_LEVEL = int(os.getenv('COMPRESS_BR_LEVEL', '4'))       # brotli 质量 0-11
+    COMPRESS_ALGORITHMS = os.getenv('COMPRESS_ALGORITHMS', 'br,gzip').split(',')  # 优先顺序
+    COMPRESS_MIMETYPES = os.getenv(
+        'COMPRESS_MIMETYPES', 'application/json,text/event-stream,text/html,text/plain'
+    ).split(',')
+
+    # 职位接口 HTTP 缓存
+    JOB_CACHE_MAX_AGE = int(os.getenv('JOB_CACHE_MAX_AGE', '30'))        # Cache-Control max-age(秒)
+    JOB_LIST_CACHE_SIZE = int(os.getenv('JOB_LIST_CACHE_SIZE', '256'))   # 进程内列表响应缓存条数, 0 为关闭
+
+    # 游标分页
+    PAGINATION_MAX_PER_PAGE = int(os.getenv('PAGINATION_MAX_PER_PAGE', '100'))
+    PAGINATION_COUNT_TTL = float(os.getenv('PAGINATION_COUNT_TTL', '60'))           # 总数缓存时间(秒)
+    PAGINATION_COUNT_CACHE_SIZE = int(os.getenv('PAGINATION_COUNT_CACHE_SIZE', '256'))
+
+    # 职位匹配配置
+    MATCH_TOP_K = int(os.getenv('MATCH_TOP_K', '10'))  # 本地预排序后交给大模型的职位数
+    # 倒排索引召回: 忽略出现在超过该比例职位中的词元，并要求至少命中若干个其余词元
+    MATCH_CANDIDATE_MAX_TERM_DF = float(os.getenv('MATCH_CANDIDATE_MAX_TERM_DF', '0.5'))
+    MATCH_CANDIDATE_MIN_TERM_HITS = int(os.getenv('MATCH_CANDIDATE_MIN_TERM_HITS', '2'))
+    MATCH_RANK_WEIGHTS = json.loads(os.getenv('MATCH_RANK_WEIGHTS', '{}'))  # 覆盖默认权重, 如 {"skills": 0.6}
+    MATCH_PROMPT_TOKEN_BUDGET = int(os.getenv('MATCH_PROMPT_TOKEN_BUDGET', '6000'))  # 单次匹配请求的提示词预算
+    MATCH_CHUNK_SIZE = int(os.getenv('MATCH_CHUNK_SIZE', '5'))        # 分块匹配时每块的职位数
+    MATCH_CHUNK_WORKERS = int(os.getenv('MATCH_CHUNK_WORKERS', '4'))  # 分块匹配的并发数
+    BM25_K1 = float(os.getenv('BM25_K1', '1.5'))  # engine=bm25 的词频饱和参数
+    BM25_B = float(os.getenv('BM25_B', '0.75'))   # engine=bm25 的文档长度归一化参数
+
+    # 职位向量索引（retrieval=vector 语义召回，需要 numpy）
+    VECTOR_INDEX_ENABLED = os.getenv('VECTOR_INDEX_ENABLED', 'false').lower() == 'true'
+    VECTOR_INDEX_DIR = os.getenv('VECTOR_INDEX_DIR', 'instance/vector_index')  # 同一台机器的 worker 共享
+    # 嵌入模型: hashing(本地特征哈希) 或 "模块:工厂函数"
+    VECTOR_EMBEDDER = os.getenv('VECTOR_EMBEDDER', 'hashing')
+    VECTOR_DIM = int(os.getenv('VECTOR_DIM', '128'))                      # hashing 嵌入的维度
+    VECTOR_CANDIDATES = int(os.getenv('VECTOR_CANDIDATES', '200'))        # 召回后交给本地预排序的职位数
+    VECTOR_SEARCH_BLOCK_ROWS = int(os.getenv('VECTOR_SEARCH_BLOCK_ROWS', '65536'))  # 检索时每块计算的行数
 
     # 日志配置
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -0,0 +1,39 @@
+"""add job full-text search index
+
+Revision ID: 8d41a6c2e0f3
+Revises: 3c9e1f5a7b21
+Create Date: 2026-10-18 10:03:17.552904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41a6c2e0f3'
+down_revision = '3c9e1f5a7b21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 已有职位的索引通过 `flask rebuild-search-index` 回填
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS job_fts "
+            "USING fts5(job_title, company_name, location, requirements, raw_jd_text, tokenize='unicode61')"
+        )
+    elif dialect == 'postgresql':
+        op.add_column('job', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+        op.create_index('ix_job_search_vector', 'job', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS job_fts")
+    elif dialect == 'postgresql':
+        op.drop_index('ix_job_search_vector', table_name='job', postgresql_using='gin')
+        op.drop_column('job', 'search_vector')
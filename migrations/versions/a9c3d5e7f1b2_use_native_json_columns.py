@@ -0,0 +1,54 @@
+"""use native JSON columns for parsed data
+
+Revision ID: a9c3d5e7f1b2
+Revises: 4f2b8e61c9d3
+Create Date: 2026-10-18 14:21:09.736012
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9c3d5e7f1b2'
+down_revision = '4f2b8e61c9d3'
+branch_labels = None
+depends_on = None
+
+COLUMNS = [
+    ('user', 'resume_parsed_data', True),
+    ('job', 'responsibilities', False),
+    ('job', 'requirements', False),
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        # 现有数据是 json.dumps 的文本，直接转换为 jsonb
+        for table, column, nullable in COLUMNS:
+            op.alter_column(table, column, type_=postgresql.JSONB(), existing_nullable=nullable,
+                            postgresql_using=f'{column}::jsonb')
+        op.create_index('ix_user_resume_parsed_data', 'user', ['resume_parsed_data'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'resume_parsed_data': 'jsonb_path_ops'})
+    else:
+        # SQLite 的 JSON 类型同样以文本存储，已有数据无需转换
+        for table, column, nullable in COLUMNS:
+            with op.batch_alter_table(table, schema=None) as batch_op:
+                batch_op.alter_column(column, type_=sa.JSON(), existing_type=sa.Text(),
+                                      existing_nullable=nullable)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.drop_index('ix_user_resume_parsed_data', table_name='user', postgresql_using='gin')
+        for table, column, nullable in COLUMNS:
+            op.alter_column(table, column, type_=sa.Text(), existing_nullable=nullable,
+                            postgresql_using=f'{column}::text')
+    else:
+        for table, column, nullable in COLUMNS:
+            with op.batch_alter_table(table, schema=None) as batch_op:
+                batch_op.alter_column(column, type_=sa.Text(), existing_type=sa.JSON(),
+                                      existing_nullable=nullable)
@@ -0,0 +1,31 @@
+"""add (created_at, id) indexes for keyset pagination
+
+Revision ID: d4b8e2f6a1c3
+Revises: c6e2f8a4b1d7
+Create Date: 2026-10-18 16:05:42.318207
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4b8e2f6a1c3'
+down_revision = 'c6e2f8a4b1d7'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_job_created_at_id', 'job'),
+    ('ix_user_created_at_id', 'user'),
+]
+
+
+def upgrade():
+    # 游标分页按 (created_at, id) 降序取页，反向扫描升序索引即可
+    for name, table in INDEXES:
+        op.create_index(name, table, ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    for name, table in INDEXES:
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,44 @@
+"""add job.raw_jd_hash for duplicate detection on import
+
+Revision ID: f1a7c3e9b5d2
+Revises: d4b8e2f6a1c3
+Create Date: 2026-10-18 18:12:27.604913
+
+"""
+import hashlib
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a7c3e9b5d2'
+down_revision = 'd4b8e2f6a1c3'
+branch_labels = None
+depends_on = None
+
+
+def _raw_jd_hash(text):
+    # 与 job_service.raw_jd_hash 一致: 合并空白后取 SHA-256
+    return hashlib.sha256(re.sub(r'\s+', ' ', text or '').strip().encode('utf-8')).hexdigest()
+
+
+def upgrade():
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('raw_jd_hash', sa.String(length=64), nullable=True))
+
+    job = sa.table('job', sa.column('id', sa.Integer), sa.column('raw_jd_text', sa.Text),
+                   sa.column('raw_jd_hash', sa.String))
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(job.c.id, job.c.raw_jd_text)).fetchall()
+    for job_id, raw_jd_text in rows:
+        bind.execute(job.update().where(job.c.id == job_id).values(raw_jd_hash=_raw_jd_hash(raw_jd_text)))
+
+    op.create_index('ix_job_raw_jd_hash', 'job', ['raw_jd_hash'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_job_raw_jd_hash', table_name='job')
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.drop_column('raw_jd_hash')
@@ -1,5 +1,10 @@
+import asyncio
+import json
 import unittest
-from app.services.ai_service import parse_job_description, parse_resume, match_jobs
+from app.services.ai_service import (
+    parse_job_description, parse_resume, match_jobs, match_jobs_chunked, iter_match_job_chunks,
+    parse_job_description_async, parse_resume_async, match_jobs_async, match_jobs_chunked_async
+)
 from tests.base import BaseTestCase
 
 class TestAIService(BaseTestCase):
@@ -158,3 +163,80 @@ class TestAIService(BaseTestCase):
         
         # Should handle invalid format gracefully and return empty list
         self.assertEqual(result, [])
+
+    def test_match_jobs_chunked_merges_and_sorts(self):
+        def respond(**kwargs):
+            payload = json.loads(kwargs['arguments']['messages'][-1]['content'])
+            return {"content": json.dumps([
+                {"job_id": job["id"], "match_score": job["id"] * 10}
+                for job in payload["jobs"]
+            ])}
+        self.mcp_mock.use_tool.side_effect = respond
+
+        resume_data = {"technical_analysis": {"tech_stack": ["Python"]}}
+        jobs = [{"id": i, "title": f"职位{i}"} for i in range(1, 6)]
+
+        result = match_jobs_chunked(resume_data, "软件工程师", "北京", jobs, chunk_size=2, max_workers=3)
+
+        self.assertEqual(self.mcp_mock.use_tool.call_count, 3)
+        self.assertEqual([r['job_id'] for r in result], [5, 4, 3, 2, 1])
+
+    def test_iter_match_job_chunks_isolates_failures(self):
+        def respond(**kwargs):
+            payload = json.loads(kwargs['arguments']['messages'][-1]['content'])
+            if payload["jobs"][0]["id"] == 1:
+                return {"content": "not json"}
+            return {"content": json.dumps([{"job_id": job["id"], "match_score": 50} for job in payload["jobs"]])}
+        self.mcp_mock.use_tool.side_effect = respond
+
+        resume_data = {"technical_analysis": {"tech_stack": ["Python"]}}
+        jobs = [{"id": i} for i in range(1, 5)]
+
+        results = sorted(iter_match_job_chunks(resume_data, "软件工程师", "北京", jobs, chunk_size=2),
+                         key=lambda r: r['chunk'])
+
+        self.assertIsNotNone(results[0]['error'])
+        self.assertEqual(results[0]['job_ids'], [1, 2])
+        self.assertIsNone(results[1]['error'])
+        self.assertEqual([r['job_id'] for r in results[1]['recommendations']], [3, 4])
+
+    def test_match_jobs_chunked_all_chunks_fail(self):
+        self.mcp_mock.use_tool.return_value = {"content": "not json"}
+
+        with self.assertRaises(ValueError):
+            match_jobs_chunked({"technical_analysis": {}}, "软件工程师", "北京", [{"id": 1}], chunk_size=1)
+
+    def test_async_variants_with_sync_client(self):
+        # 测试替身只提供同步 use_tool，异步版本在线程池中调用它
+        def respond(**kwargs):
+            system = kwargs['arguments']['messages'][0]['content']
+            if 'job_title' in system:
+                return {"content": json.dumps({"job_title": "后端", "company_name": "ABC", "location": "北京",
+                                               "responsibilities": [], "requirements": []})}
+            if 'technical_analysis' in system:
+                return {"content": json.dumps({"technical_analysis": {"tech_stack": ["Python"]}})}
+            payload = json.loads(kwargs['arguments']['messages'][-1]['content'])
+            return {"content": json.dumps([{"job_id": job["id"], "match_score": job["id"]} for job in payload["jobs"]])}
+        self.mcp_mock.use_tool.side_effect = respond
+
+        async def run():
+            jd, resume = await asyncio.gather(parse_job_description_async('JD 文本'), parse_resume_async('简历文本'))
+            jobs = [{"id": i} for i in range(1, 6)]
+            matched = await match_jobs_async(resume, "软件工程师", "北京", jobs)
+            chunked = await match_jobs_chunked_async(resume, "软件工程师", "北京", jobs, chunk_size=2)
+            return jd, resume, matched, chunked
+
+        jd, resume, matched, chunked = asyncio.run(run())
+
+        self.assertEqual(jd['job_title'], '后端')
+        self.assertEqual(resume['technical_analysis']['tech_stack'], ['Python'])
+        self.assertIn('career_analysis', resume)
+        self.assertEqual([r['job_id'] for r in matched], [5, 4, 3, 2, 1])
+        self.assertEqual([r['job_id'] for r in chunked], [5, 4, 3, 2, 1])
+        self.assertEqual(self.mcp_mock.use_tool.call_count, 6)
+
+    def test_async_parse_failure(self):
+        self.mcp_mock.use_tool.return_value = {"content": "not json"}
+        with self.assertRaises(ValueError) as context:
+            asyncio.run(parse_job_description_async('JD 文本'))
+        self.assertIn('Failed to parse job description', str(context.exception))
@@ -0,0 +1,114 @@
+import json
+import unittest
+from unittest.mock import patch
+from tests.base import BaseTestCase
+from app import db
+from app.models import Job
+from app.services.bm25_service import BM25Index, build_query, job_document
+from app.services.text_utils import tokenize
+
+class TestBM25Index(unittest.TestCase):
+    def setUp(self):
+        self.index = BM25Index.build([
+            (1, job_document('Java 后端工程师', '北京', ['熟悉 Java 和 Kafka'], '负责交易系统后端开发')),
+            (2, job_document('前端工程师', '上海', ['熟悉 React 和 TypeScript'], '负责管理后台前端开发')),
+            (3, job_document('数据工程师', '北京', ['熟悉 Kafka 和 Flink'], '负责实时数据平台')),
+        ])
+
+    def query(self, text):
+        return {term: 1.0 for term in tokenize(text)}
+
+    def test_ranks_by_relevance(self):
+        hits = self.index.search(self.query('Java Kafka 交易'), top_k=10)
+        self.assertEqual([job_id for job_id, _ in hits], [1, 3])
+        self.assertGreater(hits[0][1], hits[1][1])
+
+    def test_chinese_bigrams(self):
+        hits = self.index.search(self.query('实时数据'), top_k=10)
+        self.assertEqual(hits[0][0], 3)
+
+    def test_rare_terms_weigh_more(self):
+        # Flink 只出现在一个职位中，idf 高于出现在两个职位中的 Kafka
+        flink = self.index.score(self.query('flink'))[2]
+        kafka = self.index.score(self.query('kafka'))[2]
+        self.assertGreater(flink, kafka)
+
+    def test_top_k_and_no_match(self):
+        self.assertEqual(len(self.index.search(self.query('工程师'), top_k=2)), 2)
+        self.assertEqual(self.index.search(self.query('golang'), top_k=10), [])
+        self.assertEqual(BM25Index.build([]).search(self.query('java'), top_k=10), [])
+
+    def test_query_weights_profile_terms(self):
+        query = build_query('熟悉 Java', {'technical_analysis': {'tech_stack': ['Kafka']}}, '后端', '北京')
+        self.assertEqual(query['java'], 1.0)
+        self.assertEqual(query['kafka'], 2.0)
+        self.assertEqual(query['北京'], 2.0)
+
+class TestBM25Route(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        user = self.create_test_user()
+        user.resume_text = '五年 Java 后端开发经验，熟悉 Kafka 和分布式交易系统'
+        db.session.commit()
+        response = self.client.post('/api/auth/login', json={
+            'email': 'test@example.com',
+            'password': 'password123'
+        })
+        self.headers = self.get_auth_headers(json.loads(response.data)['token'])
+        self.backend = self.create_job('Java 后端工程师', '北京', ['熟悉 Java 和 Kafka'], '负责交易系统后端开发')
+        self.frontend = self.create_job('前端工程师', '上海', ['熟悉 React'], '负责前端开发')
+
+    def create_job(self, title, location, requirements, raw_jd_text):
+        job = Job(job_title=title, company_name='测试公司', location=location, raw_jd_text=raw_jd_text)
+        job.set_requirements(requirements)
+        job.set_responsibilities(['开发'])
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    def match(self):
+        return self.client.get('/api/user/match_jobs', headers=self.headers, query_string={
+            'desired_position': '后端工程师', 'desired_location': '北京', 'engine': 'bm25'
+        })
+
+    def test_bm25_engine_without_llm(self):
+        response = self.match()
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['engine'], 'bm25')
+        self.assertEqual([r['job_id'] for r in data['recommendations']], [self.backend.id, self.frontend.id])
+        top = data['recommendations'][0]
+        self.assertEqual(top['match_score'], 100)
+        self.assertEqual(set(top), {'job_id', 'match_score', 'match_analysis', 'advantages', 'challenges',
+                                    'suggestions', 'job_details'})
+        self.assertIn('react', data['recommendations'][1]['challenges'][0])
+        self.mcp_mock.use_tool.assert_not_called()
+
+    def test_index_rebuilt_after_job_changes(self):
+        self.match()
+        index = self.app.extensions['bm25_index']
+        self.match()
+        self.assertIs(self.app.extensions['bm25_index'], index)
+
+        new_job = self.create_job('Kafka 后端专家', '北京', ['精通 Java、Kafka 和交易系统'], '交易系统 Kafka Java 后端')
+        # 重建在后台进行，本次查询仍使用旧索引
+        data = json.loads(self.match().data)
+        self.assertNotIn(new_job.id, [r['job_id'] for r in data['recommendations']])
+
+        self.app.extensions['bm25_rebuild'].join(timeout=5)
+        data = json.loads(self.match().data)
+
+        self.assertIsNot(self.app.extensions['bm25_index'], index)
+        self.assertIn(new_job.id, [r['job_id'] for r in data['recommendations']])
+
+    def test_missing_dependencies_reported_as_not_implemented(self):
+        with patch('app.services.bm25_service.np', None):
+            response = self.match()
+        self.assertEqual(response.status_code, 501)
+
+    def test_unknown_engine(self):
+        response = self.client.get('/api/user/match_jobs', headers=self.headers, query_string={
+            'desired_position': '后端工程师', 'desired_location': '北京', 'engine': 'other'
+        })
+        self.assertEqual(response.status_code, 400)
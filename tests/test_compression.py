@@ -0,0 +1,80 @@
+import gzip
+import zlib
+from flask import Response, jsonify
+from tests.base import BaseTestCase
+from app import db
+from app.models import Job
+
+class TestCompression(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        @self.app.route('/_test/small')
+        def small():
+            return jsonify({'status': 'ok'})
+
+        @self.app.route('/_test/stream')
+        def stream():
+            def generate():
+                for i in range(3):
+                    yield f'event: chunk\ndata: {{"i": {i}}}\n\n'
+            return Response(generate(), mimetype='text/event-stream')
+
+        @self.app.route('/_test/binary')
+        def binary():
+            return Response(b'x' * 4096, mimetype='application/octet-stream')
+
+        for i in range(30):
+            job = Job(job_title=f'后端工程师 {i}', company_name='测试公司', location='北京', raw_jd_text='JD')
+            job.set_requirements(['Python'])
+            job.set_responsibilities(['开发'])
+            db.session.add(job)
+        db.session.commit()
+
+    def test_large_json_is_gzipped(self):
+        plain = self.client.get('/api/job/')
+        response = self.client.get('/api/job/', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(int(response.headers['Content-Length']), len(response.data))
+        self.assertLess(len(response.data), len(plain.data))
+        self.assertEqual(gzip.decompress(response.data), plain.data)
+        self.assertTrue(response.headers['ETag'].startswith('W/'))
+
+    def test_small_response_not_compressed(self):
+        response = self.client.get('/_test/small', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+
+    def test_mimetype_allowlist(self):
+        response = self.client.get('/_test/binary', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(len(response.data), 4096)
+
+    def test_disabled(self):
+        self.app.config['COMPRESS_ENABLED'] = False
+        response = self.client.get('/api/job/', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_not_modified_not_compressed(self):
+        etag = self.client.get('/api/job/').headers['ETag']
+        response = self.client.get('/api/job/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_stream_compressed_incrementally(self):
+        response = self.client.get('/_test/stream', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', response.headers)
+
+        # 每个事件单独 flush，逐块解压即可得到完整事件
+        decompressor = zlib.decompressobj(31)
+        chunks = iter(response.response)
+        first = decompressor.decompress(next(chunks))
+        self.assertEqual(first, b'event: chunk\ndata: {"i": 0}\n\n')
+        rest = b''.join(decompressor.decompress(chunk) for chunk in chunks)
+        self.assertEqual(rest.count(b'event: chunk'), 2)
+        self.assertTrue(decompressor.eof)
+        response.close()
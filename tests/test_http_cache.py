@@ -0,0 +1,116 @@
+import json
+import time
+from sqlalchemy import event
+from tests.base import BaseTestCase
+from app import db
+from app.models import Job
+from app.services.http_cache import get_list_cache, get_version
+from app.services.job_service import ingest_jds
+
+class TestJobHTTPCache(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.job = self.create_job('后端工程师')
+
+    def create_job(self, title):
+        job = Job(job_title=title, company_name='测试公司', location='北京', raw_jd_text=f'{title} JD')
+        job.set_requirements(['Python'])
+        job.set_responsibilities(['开发'])
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    def count_job_queries(self, func):
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            result = func()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        return result, len([s for s in statements if 'FROM job' in s])
+
+    def test_get_job_conditional(self):
+        response = self.client.get(f'/api/job/{self.job.id}')
+        etag = response.headers['ETag']
+        last_modified = response.headers['Last-Modified']
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('public', response.headers['Cache-Control'])
+        self.assertIn('max-age=', response.headers['Cache-Control'])
+
+        response = self.client.get(f'/api/job/{self.job.id}', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+
+        response = self.client.get(f'/api/job/{self.job.id}',
+                                   headers={'If-Modified-Since': last_modified})
+        self.assertEqual(response.status_code, 304)
+
+        time.sleep(0.01)
+        self.job.job_title = '高级后端工程师'
+        db.session.commit()
+        response = self.client.get(f'/api/job/{self.job.id}', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_get_missing_job(self):
+        self.assertEqual(self.client.get('/api/job/999').status_code, 404)
+
+    def test_list_conditional_and_cached(self):
+        response = self.client.get('/api/job/', query_string={'page': 1})
+        etag = response.headers['ETag']
+
+        response, queries = self.count_job_queries(lambda: self.client.get('/api/job/', query_string={'page': 1}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, 0)
+        self.assertEqual(len(json.loads(response.data)['jobs']), 1)
+
+        response = self.client.get('/api/job/', query_string={'page': 1}, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        other = self.client.get('/api/job/', query_string={'page': 1, 'location': '上海'})
+        self.assertNotEqual(other.headers['ETag'], etag)
+
+    def test_job_writes_bump_list_version(self):
+        version, _ = get_version()
+        etag = self.client.get('/api/job/').headers['ETag']
+
+        new_job = self.create_job('数据工程师')
+        self.assertEqual(get_version()[0], version + 1)
+        db.session.delete(new_job)
+        db.session.commit()
+        self.assertEqual(get_version()[0], version + 2)
+
+        response = self.client.get('/api/job/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_bulk_ingest_bumps_version(self):
+        self.mcp_mock.use_tool.return_value = {"content": json.dumps({
+            "job_title": "测试", "company_name": "公司", "location": "北京",
+            "responsibilities": [], "requirements": []
+        })}
+        version, _ = get_version()
+
+        ingest_jds(['新的 JD'])
+
+        self.assertEqual(get_version()[0], version + 1)
+
+    def test_create_job_clears_list_cache(self):
+        admin = self.create_test_user(email='admin@example.com')
+        admin.is_admin = True
+        db.session.commit()
+        response = self.client.post('/api/auth/login', json={'email': 'admin@example.com', 'password': 'password123'})
+        headers = self.get_auth_headers(json.loads(response.data)['token'])
+        self.client.get('/api/job/')
+        self.assertEqual(len(get_list_cache()), 1)
+        self.mcp_mock.use_tool.return_value = {"content": json.dumps({
+            "job_title": "测试", "company_name": "公司", "location": "北京",
+            "responsibilities": [], "requirements": []
+        })}
+
+        response = self.client.post('/api/job/admin/create_job', headers=headers, json={'raw_jd_text': '新的 JD'})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(get_list_cache()), 0)
+        self.assertEqual(len(json.loads(self.client.get('/api/job/').data)['jobs']), 2)
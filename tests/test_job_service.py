@@ -0,0 +1,92 @@
+import json
+from tests.base import BaseTestCase
+from app import db
+from app.models import User, Job
+from app.services.job_service import ingest_jds, parse_batch_payload
+from app.services.skill_index import find_job_ids
+from app.services.search_service import search_jobs
+
+def jd_response(arguments):
+    text = arguments['messages'][-1]['content']
+    if 'broken' in text:
+        return {"content": '{"job_title": "缺字段"}'}
+    return {
+        "content": json.dumps({
+            "job_title": text.split()[0],
+            "company_name": "ABC科技",
+            "location": "北京",
+            "responsibilities": ["开发服务"],
+            "requirements": ["熟悉Kafka"]
+        })
+    }
+
+class TestJobService(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.mcp_mock.use_tool.side_effect = lambda **kwargs: jd_response(kwargs['arguments'])
+
+    def test_parse_batch_payload_formats(self):
+        self.assertEqual(parse_batch_payload(b'["a", "b"]'), ['a', 'b'])
+        self.assertEqual(parse_batch_payload(b'{"raw_jd_texts": ["a"]}'), ['a'])
+        self.assertEqual(parse_batch_payload('"a"\n{"raw_jd_text": "b"}\n\n'.encode()), ['a', 'b'])
+        self.assertEqual(parse_batch_payload(b''), [])
+
+    def test_parse_batch_payload_limit(self):
+        self.app.config['JD_BATCH_MAX_ITEMS'] = 1
+        with self.assertRaises(ValueError):
+            parse_batch_payload(b'["a", "b"]')
+
+    def test_ingest_dedupes_and_reports(self):
+        self.app.config['LLM_CACHE_ENABLED'] = False
+        texts = ['后端工程师 JD', '后端工程师  JD', '数据工程师 JD', 'broken JD', '']
+
+        report = ingest_jds(texts, max_workers=4, chunk_size=1)
+
+        statuses = [r['status'] for r in report['results']]
+        self.assertEqual(statuses, ['created', 'duplicate', 'created', 'failed', 'invalid'])
+        self.assertEqual(report['results'][1]['duplicate_of'], 0)
+        self.assertEqual(report['summary'], {'total': 5, 'created': 2, 'duplicate': 1, 'failed': 1, 'invalid': 1})
+        self.assertEqual(self.mcp_mock.use_tool.call_count, 3)
+        self.assertEqual(Job.query.count(), 2)
+
+    def test_ingested_jobs_are_indexed(self):
+        report = ingest_jds(['后端工程师 JD'])
+        job_id = report['results'][0]['job_id']
+
+        self.assertEqual(find_job_ids('kafka'), {job_id})
+        self.assertEqual([job.id for job in search_jobs(Job.query, '后端工程师').all()], [job_id])
+
+    def test_existing_jobs_are_skipped(self):
+        first = ingest_jds(['后端工程师 JD'])
+        second = ingest_jds(['后端工程师 JD'])
+
+        self.assertEqual(second['results'][0]['status'], 'exists')
+        self.assertEqual(second['results'][0]['job_id'], first['results'][0]['job_id'])
+        self.assertEqual(Job.query.count(), 1)
+
+    def test_existing_jobs_match_ignoring_whitespace(self):
+        first = ingest_jds(['后端工程师\n\n负责  交易系统'])
+        second = ingest_jds(['  后端工程师 负责 交易系统\n'])
+
+        self.assertEqual(second['results'][0]['status'], 'exists')
+        self.assertEqual(second['results'][0]['job_id'], first['results'][0]['job_id'])
+        self.assertEqual(Job.query.count(), 1)
+
+    def test_batch_endpoint_ndjson(self):
+        admin = User(email='admin@example.com', name='Admin', is_admin=True)
+        admin.set_password('admin123')
+        db.session.add(admin)
+        db.session.commit()
+        response = self.client.post('/api/auth/login', json={'email': 'admin@example.com', 'password': 'admin123'})
+        token = json.loads(response.data)['token']
+
+        response = self.client.post(
+            '/api/job/admin/batch_create_jobs',
+            data='"后端工程师 JD"\n"数据工程师 JD"\n',
+            headers={'Authorization': f'Bearer {token}', 'Content-Type': 'application/x-ndjson'}
+        )
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['summary']['created'], 2)
+        self.assertEqual(Job.query.count(), 2)
@@ -0,0 +1,57 @@
+import json
+from sqlalchemy import text
+from tests.base import BaseTestCase
+from app import db
+from app.models import Job, User
+from app.services.json_filters import json_array_contains
+
+class TestJSONColumns(BaseTestCase):
+    def create_user(self, email, tech_stack):
+        user = self.create_test_user(email=email)
+        user.set_resume_parsed_data({'technical_analysis': {'tech_stack': tech_stack}})
+        db.session.commit()
+        return user
+
+    def test_parsed_data_roundtrip_without_manual_json(self):
+        job = Job(job_title='工程师', company_name='公司', location='北京', raw_jd_text='JD')
+        job.set_requirements(['熟悉Python'])
+        job.set_responsibilities(['开发'])
+        db.session.add(job)
+        db.session.commit()
+        db.session.expire_all()
+
+        job = db.session.get(Job, job.id)
+        self.assertEqual(job.get_requirements(), ['熟悉Python'])
+        self.assertIs(job.get_requirements(), job.get_requirements())
+
+    def test_legacy_json_text_is_readable(self):
+        db.session.execute(text(
+            "INSERT INTO job (job_title, company_name, location, responsibilities, requirements, raw_jd_text) "
+            "VALUES ('工程师', '公司', '北京', :resp, :req, 'JD')"
+        ), {'resp': json.dumps(['开发']), 'req': json.dumps(['熟悉Go'])})
+        db.session.commit()
+
+        self.assertEqual(Job.query.one().to_dict()['requirements'], ['熟悉Go'])
+
+    def test_json_array_contains(self):
+        python_user = self.create_user('py@example.com', ['Python', 'Kafka'])
+        self.create_user('java@example.com', ['Java'])
+        self.create_test_user(email='empty@example.com')
+
+        condition = json_array_contains(User.resume_parsed_data, ['technical_analysis', 'tech_stack'], 'Python')
+        self.assertEqual([user.id for user in User.query.filter(condition)], [python_user.id])
+
+    def test_admin_filters_users_by_tech_stack(self):
+        admin = self.create_user('admin@example.com', ['Go'])
+        admin.is_admin = True
+        db.session.commit()
+        self.create_user('py@example.com', ['Python'])
+        response = self.client.post('/api/auth/login', json={'email': 'admin@example.com', 'password': 'password123'})
+        headers = self.get_auth_headers(json.loads(response.data)['token'])
+
+        response = self.client.get('/api/admin/users', headers=headers,
+                                   query_string={'tech_stack': 'Python', 'include_total': 'true'})
+        data = json.loads(response.data)
+
+        self.assertEqual([user['email'] for user in data['users']], ['py@example.com'])
+        self.assertEqual(data['pagination']['total'], 1)
@@ -0,0 +1,42 @@
+import json
+import unittest
+from datetime import datetime
+from tests.base import BaseTestCase
+from app.json_provider import FastJSONProvider, orjson
+
+PAYLOAD = {'b': '后端工程师', 'a': datetime(2026, 1, 2, 3, 4, 5, 6000), 'c': ['Python']}
+
+class TestFastJSONProvider(BaseTestCase):
+    def provider(self, **config):
+        self.app.config.update(config)
+        return FastJSONProvider(self.app)
+
+    def check_output(self, provider):
+        text = provider.dumps(PAYLOAD)
+        self.assertIn('后端工程师', text)
+        self.assertEqual(json.loads(text), {'c': ['Python'], 'a': '2026-01-02T03:04:05.006000', 'b': '后端工程师'})
+        self.assertLess(text.index('"a"'), text.index('"b"'))
+
+    def test_stdlib_backend(self):
+        provider = self.provider(JSON_BACKEND='stdlib')
+        self.assertEqual(provider.backend, 'stdlib')
+        self.check_output(provider)
+
+    @unittest.skipIf(orjson is None, 'orjson is not installed')
+    def test_orjson_backend(self):
+        provider = self.provider(JSON_BACKEND='auto')
+        self.assertEqual(provider.backend, 'orjson')
+        self.check_output(provider)
+        self.assertEqual(provider.loads('{"a": "中文"}'), {'a': '中文'})
+
+    def test_ensure_ascii_uses_stdlib(self):
+        provider = self.provider(JSON_ENSURE_ASCII=True)
+        self.assertEqual(provider.backend, 'stdlib')
+        self.assertIn('\\u540e', provider.dumps(PAYLOAD))
+
+    def test_responses_are_unescaped_utf8(self):
+        self.create_test_user(name='测试用户')
+        response = self.client.post('/api/auth/login', json={'email': 'test@example.com', 'password': 'password123'})
+
+        self.assertIn('测试用户'.encode('utf-8'), response.data)
+        self.assertTrue(json.loads(response.data)['user']['created_at'].startswith('20'))
@@ -0,0 +1,142 @@
+import json
+import time
+from datetime import timedelta
+from unittest.mock import patch
+from sqlalchemy.exc import OperationalError
+from tests.base import BaseTestCase
+from app import db
+from app.models import LLMCacheEntry, User
+from app.services import llm_cache
+from app.services.ai_service import parse_job_description, parse_resume
+
+JD_RESPONSE = {
+    "content": json.dumps({
+        "job_title": "后端工程师",
+        "company_name": "ABC科技",
+        "location": "北京",
+        "responsibilities": ["开发后端服务"],
+        "requirements": ["熟悉Python"]
+    })
+}
+
+class TestLLMCache(BaseTestCase):
+    def test_parse_job_description_uses_cache(self):
+        self.mcp_mock.use_tool.return_value = JD_RESPONSE
+
+        first = parse_job_description("后端工程师\n熟悉Python")
+        second = parse_job_description("  后端工程师 熟悉Python ")
+
+        self.assertEqual(first, second)
+        self.mcp_mock.use_tool.assert_called_once()
+        entry = LLMCacheEntry.query.one()
+        self.assertEqual(entry.kind, 'job_description')
+        self.assertEqual(entry.hit_count, 1)
+
+    def test_parse_resume_uses_cache(self):
+        self.mcp_mock.use_tool.return_value = {"content": '{"technical_analysis": {"tech_stack": ["Go"]}}'}
+
+        parse_resume("简历内容")
+        result = parse_resume("简历内容")
+
+        self.mcp_mock.use_tool.assert_called_once()
+        self.assertEqual(result['technical_analysis']['tech_stack'], ["Go"])
+
+    def test_key_depends_on_prompt_settings(self):
+        base = llm_cache.make_key("text", "jd-v1", "model-a", 0.7)
+
+        self.assertNotEqual(base, llm_cache.make_key("text", "jd-v2", "model-a", 0.7))
+        self.assertNotEqual(base, llm_cache.make_key("text", "jd-v1", "model-b", 0.7))
+        self.assertNotEqual(base, llm_cache.make_key("text", "jd-v1", "model-a", 0.2))
+
+    def test_failed_parse_is_not_cached(self):
+        self.mcp_mock.use_tool.return_value = {"content": '{"job_title": "测试职位"}'}
+
+        with self.assertRaises(ValueError):
+            parse_job_description("测试职位描述")
+
+        self.assertEqual(LLMCacheEntry.query.count(), 0)
+
+    def test_store_overwrites_existing_entry(self):
+        llm_cache.store('k1', 'resume', {'n': 1})
+        llm_cache.store('k1', 'resume', {'n': 2})
+
+        self.assertEqual(llm_cache.lookup('k1'), {'n': 2})
+        self.assertEqual(LLMCacheEntry.query.count(), 1)
+
+    def test_cache_write_failure_keeps_parse_result(self):
+        self.mcp_mock.use_tool.return_value = JD_RESPONSE
+
+        with patch.object(llm_cache, '_store', side_effect=OperationalError('INSERT', {}, Exception('locked'))):
+            result = parse_job_description("后端工程师\n熟悉Python")
+
+        self.assertEqual(result['job_title'], '后端工程师')
+        self.assertEqual(LLMCacheEntry.query.count(), 0)
+
+    def test_cache_read_failure_is_a_miss(self):
+        self.mcp_mock.use_tool.return_value = JD_RESPONSE
+        LLMCacheEntry.__table__.drop(db.engine)
+
+        first = parse_job_description("后端工程师\n熟悉Python")
+        second = parse_job_description("后端工程师\n熟悉Python")
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.mcp_mock.use_tool.call_count, 2)
+
+    def test_writes_wait_for_open_write_transaction(self):
+        llm_cache.store('k1', 'resume', {'n': 1})
+        user = self.create_test_user()
+        user.name = 'Changed'
+        db.session.flush()
+
+        # 会话已开始写事务: 缓存写入既不能等待它持有的写锁（文件 SQLite），
+        # 也不能顺带提交它未完成的修改（内存 SQLite 共用同一连接）
+        start = time.perf_counter()
+        self.assertEqual(llm_cache.lookup('k1'), {'n': 1})
+        llm_cache.store('k2', 'resume', {'n': 2})
+        self.assertLess(time.perf_counter() - start, 1)
+
+        db.session.rollback()
+        self.assertEqual(db.session.get(User, user.id).name, 'Test User')
+        self.assertEqual(llm_cache.lookup('k2'), {'n': 2})
+        self.assertEqual(db.session.get(LLMCacheEntry, 'k1').hit_count, 1)
+
+    def test_expired_entries_are_ignored(self):
+        llm_cache.store('k1', 'resume', {'a': 1})
+        entry = db.session.get(LLMCacheEntry, 'k1')
+        entry.created_at = entry.created_at - timedelta(seconds=self.app.config['LLM_CACHE_TTL'] + 1)
+        db.session.commit()
+
+        self.assertIsNone(llm_cache.lookup('k1'))
+
+    def test_lru_eviction(self):
+        self.app.config['LLM_CACHE_MAX_ENTRIES'] = 2
+        llm_cache.store('k1', 'resume', {'n': 1})
+        llm_cache.store('k2', 'resume', {'n': 2})
+        entry = db.session.get(LLMCacheEntry, 'k2')
+        entry.last_accessed_at = entry.last_accessed_at - timedelta(hours=1)
+        db.session.commit()
+        llm_cache.store('k3', 'resume', {'n': 3})
+
+        self.assertEqual(llm_cache.lookup('k1'), {'n': 1})
+        self.assertIsNone(llm_cache.lookup('k2'))
+        self.assertEqual(llm_cache.lookup('k3'), {'n': 3})
+
+    def test_disabled_cache(self):
+        self.app.config['LLM_CACHE_ENABLED'] = False
+        self.mcp_mock.use_tool.return_value = JD_RESPONSE
+
+        parse_job_description("后端工程师")
+        parse_job_description("后端工程师")
+
+        self.assertEqual(self.mcp_mock.use_tool.call_count, 2)
+
+    def test_stats_counts_hits_and_misses(self):
+        before = llm_cache.stats()
+        llm_cache.store('k1', 'resume', {'n': 1})
+        llm_cache.lookup('k1')
+        llm_cache.lookup('missing')
+        after = llm_cache.stats()
+
+        self.assertEqual(after['hits'] - before['hits'], 1)
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['entries'], 1)
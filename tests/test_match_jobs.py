@@ -0,0 +1,136 @@
+import json
+from tests.base import BaseTestCase
+from app import db
+from app.models import Job
+
+RESUME_DATA = {
+    "technical_analysis": {"tech_stack": ["Java", "Kafka"]},
+    "experience_analysis": {"years": 4},
+    "career_analysis": {"suitable_positions": ["后端工程师"]}
+}
+
+def score_all_jobs(**kwargs):
+    payload = json.loads(kwargs['arguments']['messages'][-1]['content'])
+    return {"content": json.dumps([
+        {"job_id": job["id"], "match_score": 100 - job["id"], "match_analysis": "匹配"}
+        for job in payload["jobs"]
+    ])}
+
+class TestMatchJobsRoute(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_test_user()
+        self.user.resume_text = '简历'
+        self.user.set_resume_parsed_data(RESUME_DATA)
+        db.session.commit()
+        response = self.client.post('/api/auth/login', json={
+            'email': 'test@example.com',
+            'password': 'password123'
+        })
+        self.headers = self.get_auth_headers(json.loads(response.data)['token'])
+        self.jobs = [self.create_job(f'后端工程师{i}') for i in range(4)]
+        self.mcp_mock.use_tool.side_effect = score_all_jobs
+
+    def create_job(self, title):
+        job = Job(job_title=title, company_name='测试公司', location='北京', raw_jd_text=f'{title} JD')
+        job.set_requirements(['熟悉Java和Kafka'])
+        job.set_responsibilities(['开发后端服务'])
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    def match(self, **params):
+        query = {'desired_position': '后端工程师', 'desired_location': '北京'}
+        query.update(params)
+        return self.client.get('/api/user/match_jobs', headers=self.headers, query_string=query)
+
+    def test_chunked_mode(self):
+        self.app.config['MATCH_CHUNK_SIZE'] = 2
+
+        response = self.match(chunked='true')
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.mcp_mock.use_tool.call_count, 2)
+        self.assertEqual([r['job_id'] for r in data['recommendations']], [job.id for job in self.jobs])
+        self.assertIn('job_details', data['recommendations'][0])
+
+    def test_stream_mode(self):
+        self.app.config['MATCH_CHUNK_SIZE'] = 2
+
+        response = self.match(stream='true')
+        body = response.get_data(as_text=True)
+        events = [block.split('\n') for block in body.strip().split('\n\n')]
+
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        self.assertEqual([e[0] for e in events], ['event: chunk', 'event: chunk', 'event: done'])
+        chunk = json.loads(events[0][1][len('data: '):])
+        self.assertEqual(len(chunk['recommendations']), 2)
+        self.assertIn('job_details', chunk['recommendations'][0])
+        done = json.loads(events[-1][1][len('data: '):])
+        self.assertEqual([r['job_id'] for r in done['recommendations']], [job.id for job in self.jobs])
+
+    def sent_job_ids(self, call_index=-1):
+        kwargs = self.mcp_mock.use_tool.call_args_list[call_index].kwargs
+        payload = json.loads(kwargs['arguments']['messages'][-1]['content'])
+        return [job['id'] for job in payload['jobs']]
+
+    def test_repeat_request_reuses_saved_matches(self):
+        first = json.loads(self.match().data)
+        second = json.loads(self.match().data)
+
+        self.assertEqual(self.mcp_mock.use_tool.call_count, 1)
+        self.assertEqual(second['recommendations'], first['recommendations'])
+        self.assertEqual((second['matched_jobs'], second['reused_jobs']), (0, 4))
+
+    def test_only_updated_jobs_are_rematched(self):
+        self.match()
+        self.jobs[2].set_requirements(['熟悉Java、Kafka和Flink'])
+        db.session.commit()
+        new_job = self.create_job('后端工程师4')
+
+        data = json.loads(self.match().data)
+
+        self.assertEqual(self.mcp_mock.use_tool.call_count, 2)
+        self.assertEqual(sorted(self.sent_job_ids()), sorted([self.jobs[2].id, new_job.id]))
+        self.assertEqual(len(data['recommendations']), 5)
+        self.assertEqual(data['matched_jobs'], 2)
+
+    def test_unrecommended_jobs_are_not_resent(self):
+        self.mcp_mock.use_tool.side_effect = lambda **kwargs: {"content": json.dumps([
+            {"job_id": self.jobs[0].id, "match_score": 90, "match_analysis": "匹配"}
+        ])}
+        self.match()
+        data = json.loads(self.match().data)
+
+        self.assertEqual(self.mcp_mock.use_tool.call_count, 1)
+        self.assertEqual([r['job_id'] for r in data['recommendations']], [self.jobs[0].id])
+
+    def test_string_job_ids_are_saved(self):
+        self.mcp_mock.use_tool.side_effect = lambda **kwargs: {"content": json.dumps([
+            {"job_id": str(self.jobs[0].id), "match_score": 90, "match_analysis": "匹配"}
+        ])}
+        first = json.loads(self.match().data)
+        self.assertEqual(first['recommendations'][0]['job_id'], self.jobs[0].id)
+        self.assertIn('job_details', first['recommendations'][0])
+        data = json.loads(self.match().data)
+
+        self.assertEqual(self.mcp_mock.use_tool.call_count, 1)
+        self.assertEqual([(r['job_id'], r['match_score']) for r in data['recommendations']], [(self.jobs[0].id, 90)])
+        self.assertEqual(data['recommendations'][0]['job_details']['id'], self.jobs[0].id)
+
+    def test_resume_change_and_refresh_rematch_everything(self):
+        self.match()
+        self.match(desired_position='Java工程师')
+        self.assertEqual(self.mcp_mock.use_tool.call_count, 2)
+
+        self.match(refresh='true')
+        self.assertEqual(self.mcp_mock.use_tool.call_count, 3)
+
+        self.mcp_mock.use_tool.side_effect = None
+        self.mcp_mock.use_tool.return_value = {"content": json.dumps(RESUME_DATA)}
+        response = self.client.put('/api/user/update_resume', headers=self.headers, json={'resume_text': '新简历'})
+        self.assertEqual(response.status_code, 200)
+        self.mcp_mock.use_tool.side_effect = score_all_jobs
+        self.match()
+        self.assertEqual(len(self.sent_job_ids()), 4)
@@ -0,0 +1,277 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+from unittest.mock import patch
+import httpx
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from tests.base import BaseTestCase
+from app.mcp_client import AsyncDevMCPClient, AsyncLimiter, DevMCPClient, UpstreamError, parse_retry_after
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        server.requests.append(json.loads(body))
+        server.connections.add(self.client_address)
+        status, headers, delay = server.responses.pop(0) if server.responses else (200, {}, 0)
+        if delay:
+            time.sleep(delay)
+        payload = json.dumps({"choices": [{"message": {"content": '{"ok": true}'}}]}).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+class TestDevMCPClient(BaseTestCase):
+    read_timeout_error = requests.ReadTimeout
+    connect_error = requests.ConnectionError
+
+    def setUp(self):
+        super().setUp()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        self.server.requests = []
+        self.server.responses = []
+        self.server.connections = set()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.client = DevMCPClient(
+            base_url=f'http://127.0.0.1:{self.server.server_port}',
+            api_key='test-key',
+            read_timeout=0.5,
+            max_retries=2,
+            backoff_factor=0.01
+        )
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        super().tearDown()
+
+    def call(self):
+        return self.client.use_tool('siliconflow', 'json_mode', {'messages': []})
+
+    def test_success_reuses_connection(self):
+        for _ in range(3):
+            self.assertEqual(self.call(), {'content': '{"ok": true}'})
+
+        self.assertEqual(len(self.server.connections), 1)
+        self.assertEqual(self.server.requests[0]['model'], self.app.config['LLM_MODEL'])
+        metrics = self.client.metrics.snapshot()
+        self.assertEqual(metrics['calls'], 3)
+        self.assertEqual(metrics['errors'], 0)
+        self.assertGreater(metrics['avg_latency'], 0)
+
+    def test_retries_on_429_honouring_retry_after(self):
+        self.server.responses = [(429, {'Retry-After': '0.2'}, 0), (503, {}, 0)]
+
+        start = time.perf_counter()
+        self.assertEqual(self.call(), {'content': '{"ok": true}'})
+
+        self.assertGreaterEqual(time.perf_counter() - start, 0.2)
+        self.assertEqual(len(self.server.requests), 3)
+        metrics = self.client.metrics.snapshot()
+        self.assertEqual(metrics['retries'], 2)
+        self.assertEqual(metrics['status_codes'], {200: 1})
+
+    def test_gives_up_after_max_retries(self):
+        self.server.responses = [(500, {}, 0)] * 3
+
+        with self.assertRaises(UpstreamError) as context:
+            self.call()
+
+        self.assertEqual(context.exception.status_code, 500)
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(self.client.metrics.snapshot()['errors'], 1)
+
+    def test_records_llm_metrics(self):
+        self.server.responses = [(200, {}, 0), (400, {}, 0)]
+        self.client.use_tool('siliconflow', 'json_mode', {'messages': [{'role': 'user', 'content': '你好世界'}]})
+        with self.assertRaises(UpstreamError):
+            self.call()
+
+        model = self.app.config['LLM_MODEL']
+        registry = self.app.extensions['metrics']
+        requests_total = registry.counter('llm_requests_total', '', ('model', 'status'))
+        self.assertEqual(requests_total.value(model=model, status=200), 1)
+        self.assertEqual(requests_total.value(model=model, status=400), 1)
+        self.assertEqual(registry.histogram('llm_request_duration_seconds', '', ('model',)).count(model=model), 2)
+        # 上游未返回 usage 时按估算值计数
+        self.assertEqual(registry.counter('llm_prompt_tokens_total', '', ('model',)).value(model=model), 4)
+        self.assertEqual(registry.counter('llm_completion_tokens_total', '', ('model',)).value(model=model), 3)
+
+    def test_non_retryable_status(self):
+        self.server.responses = [(400, {}, 0)]
+
+        with self.assertRaises(UpstreamError):
+            self.call()
+
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_read_timeout_is_not_retried(self):
+        self.server.responses = [(200, {}, 1.0)]
+
+        with self.assertRaises(self.read_timeout_error):
+            self.call()
+
+        # 上游可能已经在生成结果，POST 不能重发
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.client.metrics.snapshot()['errors'], 1)
+
+    def test_connect_error_is_retried(self):
+        self.client.max_retries = 1
+        self.client.base_url = 'http://127.0.0.1:1'
+
+        with patch.object(self.client, '_backoff', return_value=0) as backoff:
+            with self.assertRaises(self.connect_error):
+                self.call()
+
+        backoff.assert_called_once()
+
+    def test_missing_api_key(self):
+        with self.assertRaises(RuntimeError):
+            type(self.client)(base_url=f'http://127.0.0.1:{self.server.server_port}', api_key=None)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('3'), 3.0)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertIsNone(parse_retry_after(None))
+
+class TestAsyncDevMCPClient(TestDevMCPClient):
+    read_timeout_error = httpx.ReadTimeout
+    connect_error = httpx.ConnectError
+
+    def setUp(self):
+        super().setUp()
+        self.client = AsyncDevMCPClient(
+            base_url=f'http://127.0.0.1:{self.server.server_port}',
+            api_key='test-key',
+            read_timeout=0.5,
+            max_retries=2,
+            backoff_factor=0.01,
+            max_concurrency=4
+        )
+
+    def call(self):
+        async def run():
+            try:
+                return await self.client.use_tool_async('siliconflow', 'json_mode', {'messages': []})
+            finally:
+                await self.client.aclose()
+        return asyncio.run(run())
+
+    def test_success_reuses_connection(self):
+        async def run():
+            try:
+                return [await self.client.use_tool_async('siliconflow', 'json_mode', {'messages': []})
+                        for _ in range(3)]
+            finally:
+                await self.client.aclose()
+
+        self.assertEqual(asyncio.run(run()), [{'content': '{"ok": true}'}] * 3)
+        self.assertEqual(len(self.server.connections), 1)
+        self.assertEqual(self.server.requests[0]['model'], self.app.config['LLM_MODEL'])
+        self.assertEqual(self.client.metrics.snapshot()['calls'], 3)
+
+    def test_records_llm_metrics(self):
+        self.server.responses = [(400, {}, 0)]
+        with self.assertRaises(UpstreamError):
+            self.call()
+        counter = self.app.extensions['metrics'].counter('llm_requests_total', '', ('model', 'status'))
+        self.assertEqual(counter.value(model=self.app.config['LLM_MODEL'], status=400), 1)
+
+    def test_concurrency_limit(self):
+        self.server.responses = [(200, {}, 0.1)] * 12
+        peak = []
+
+        async def run():
+            async def one():
+                result = await self.client.use_tool_async('siliconflow', 'json_mode', {'messages': []})
+                peak.append(self.client.limiter.in_flight)
+                return result
+            try:
+                return await asyncio.gather(*(one() for _ in range(12)))
+            finally:
+                await self.client.aclose()
+
+        start = time.perf_counter()
+        results = asyncio.run(run())
+
+        self.assertEqual(len(results), 12)
+        self.assertLessEqual(max(peak), 4)
+        # 12 个 0.1 秒的请求，最多 4 个并发，至少需要 3 轮
+        self.assertGreaterEqual(time.perf_counter() - start, 0.3)
+        self.assertEqual(self.client.limiter.in_flight, 0)
+
+class TestAsyncLimiter(unittest.TestCase):
+    def test_limit_shared_across_event_loops(self):
+        limiter = AsyncLimiter(2)
+        lock = threading.Lock()
+        state = {'active': 0, 'peak': 0}
+
+        async def work():
+            async with limiter:
+                with lock:
+                    state['active'] += 1
+                    state['peak'] = max(state['peak'], state['active'])
+                await asyncio.sleep(0.02)
+                with lock:
+                    state['active'] -= 1
+
+        async def batch():
+            await asyncio.gather(*(work() for _ in range(5)))
+
+        threads = [threading.Thread(target=asyncio.run, args=(batch(),)) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(state['peak'], 2)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_cancelled_waiter_releases_slot(self):
+        limiter = AsyncLimiter(1)
+
+        async def run():
+            await limiter.acquire()
+            waiter = asyncio.ensure_future(limiter.acquire())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            limiter.release()
+            await asyncio.sleep(0)
+            await asyncio.wait_for(limiter.acquire(), timeout=1)
+            limiter.release()
+
+        asyncio.run(run())
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_waiter_cancelled_after_handoff_releases_slot(self):
+        limiter = AsyncLimiter(1)
+
+        async def run():
+            await limiter.acquire()
+            waiter = asyncio.ensure_future(limiter.acquire())
+            await asyncio.sleep(0)
+            limiter.release()
+            # _wake 设置了 future，但等待方恢复执行前被取消
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            await asyncio.wait_for(limiter.acquire(), timeout=1)
+            limiter.release()
+
+        asyncio.run(run())
+        self.assertEqual(limiter.in_flight, 0)
@@ -0,0 +1,163 @@
+import json
+import re
+import unittest
+from tests.base import BaseTestCase
+from app import db
+from app.metrics import MetricsRegistry, record_llm_call
+from app.models import Job
+from config import Config
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_render_prometheus_text(self):
+        registry = MetricsRegistry()
+        counter = registry.counter('jobs_total', 'Jobs seen', ('kind',))
+        counter.inc(kind='a')
+        counter.inc(2, kind='a"b')
+        histogram = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+
+        text = registry.render()
+
+        self.assertIn('# TYPE jobs_total counter', text)
+        self.assertIn('jobs_total{kind="a"} 1', text)
+        self.assertIn('jobs_total{kind="a\\"b"} 2', text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{le="1"} 2', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 2', text)
+        self.assertIn('latency_seconds_count 2', text)
+        self.assertIs(registry.counter('jobs_total', 'Jobs seen', ('kind',)), counter)
+
+    def test_label_mismatch(self):
+        counter = MetricsRegistry().counter('jobs_total', 'Jobs seen', ('kind',))
+        with self.assertRaises(ValueError):
+            counter.inc(other='a')
+
+class TestRequestMetrics(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.app.config['METRICS_ENABLED'] = True
+        self.app.config['METRICS_ALLOWED_IPS'] = ['127.0.0.1']
+        self.app.config['SERVER_TIMING_ENABLED'] = True
+        job = Job(job_title='后端工程师', company_name='测试公司', location='北京', raw_jd_text='JD')
+        job.set_requirements(['Python'])
+        job.set_responsibilities(['开发'])
+        db.session.add(job)
+        db.session.commit()
+        self.job = job
+
+    def server_timing(self, response):
+        return dict(
+            (part.split(';')[0], float(re.search(r'dur=([\d.]+)', part).group(1)))
+            for part in response.headers['Server-Timing'].split(', ')
+        )
+
+    def test_server_timing_header(self):
+        response = self.client.get(f'/api/job/{self.job.id}')
+        timings = self.server_timing(response)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('app', timings)
+        self.assertIn('db', timings)
+        self.assertIn('json', timings)
+        self.assertLessEqual(timings['db'], timings['app'])
+        self.assertRegex(response.headers['Server-Timing'], r'db;dur=[\d.]+;desc="\d+ calls"')
+
+    def test_llm_time_from_chunk_workers(self):
+        user = self.create_test_user()
+        user.resume_text = '简历'
+        user.set_resume_parsed_data({'technical_analysis': {'tech_stack': ['Python']}})
+        db.session.commit()
+        for i in range(3):
+            job = Job(job_title=f'后端工程师{i}', company_name='测试公司', location='北京', raw_jd_text='JD')
+            job.set_requirements(['Python'])
+            job.set_responsibilities(['开发'])
+            db.session.add(job)
+        db.session.commit()
+        token = json.loads(self.client.post('/api/auth/login', json={
+            'email': 'test@example.com', 'password': 'password123'
+        }).data)['token']
+
+        def fake_llm(**kwargs):
+            # 模拟 DevMCPClient 在分块工作线程中记录的调用
+            record_llm_call('test-model', 0.05, 200, 10, 5)
+            payload = json.loads(kwargs['arguments']['messages'][-1]['content'])
+            return {'content': json.dumps([{'job_id': job['id'], 'match_score': 80} for job in payload['jobs']])}
+
+        self.mcp_mock.use_tool.side_effect = fake_llm
+        self.app.config['MATCH_CHUNK_SIZE'] = 2
+        response = self.client.get('/api/user/match_jobs', headers=self.get_auth_headers(token), query_string={
+            'desired_position': '后端工程师', 'desired_location': '北京', 'chunked': 'true'
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('llm;dur=100.00;desc="2 calls"', response.headers['Server-Timing'])
+
+    def test_streamed_response_recorded_after_body(self):
+        user = self.create_test_user()
+        user.resume_text = '简历'
+        user.set_resume_parsed_data({'technical_analysis': {'tech_stack': ['Python']}})
+        db.session.commit()
+        token = json.loads(self.client.post('/api/auth/login', json={
+            'email': 'test@example.com', 'password': 'password123'
+        }).data)['token']
+        self.mcp_mock.use_tool.side_effect = lambda **kwargs: {'content': json.dumps([
+            {'job_id': job['id'], 'match_score': 80}
+            for job in json.loads(kwargs['arguments']['messages'][-1]['content'])['jobs']
+        ])}
+        counter = self.app.extensions['metrics'].counter('db_queries_total', '', ('endpoint',))
+
+        response = self.client.get('/api/user/match_jobs', headers=self.get_auth_headers(token), query_string={
+            'desired_position': '后端工程师', 'desired_location': '北京', 'stream': 'true'
+        })
+        self.assertNotIn('Server-Timing', response.headers)
+        self.assertEqual(counter.value(endpoint='/api/user/match_jobs'), 0)
+
+        self.assertIn(b'event: done', response.data)
+        response.close()
+        # 流式输出期间保存匹配结果的 SQL 也计入本次请求
+        self.assertGreater(counter.value(endpoint='/api/user/match_jobs'), 0)
+
+    def test_metrics_endpoint(self):
+        self.client.get(f'/api/job/{self.job.id}')
+        self.client.get('/api/job/999')
+        self.client.get('/no-such-path')
+
+        response = self.client.get('/metrics')
+        text = response.data.decode()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        self.assertIn('http_requests_total{method="GET",endpoint="/api/job/<int:job_id>",status="200"} 1', text)
+        self.assertIn('http_requests_total{method="GET",endpoint="/api/job/<int:job_id>",status="404"} 1', text)
+        self.assertIn('http_requests_total{method="GET",endpoint="unmatched",status="404"} 1', text)
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",endpoint="/api/job/<int:job_id>",le="+Inf"} 2',
+                      text)
+        queries = re.search(r'db_queries_total\{endpoint="/api/job/<int:job_id>"\} (\d+)', text)
+        self.assertGreaterEqual(int(queries.group(1)), 2)
+
+    def test_server_timing_disabled(self):
+        self.app.config['SERVER_TIMING_ENABLED'] = False
+        response = self.client.get(f'/api/job/{self.job.id}')
+        self.assertNotIn('Server-Timing', response.headers)
+
+    def test_metrics_access_control(self):
+        self.app.config['METRICS_ALLOWED_IPS'] = []
+        self.app.config['METRICS_TOKEN'] = 'scrape-secret'
+
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code, 403)
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+        self.assertEqual(response.status_code, 200)
+
+        self.app.config['METRICS_TOKEN'] = ''
+        self.app.config['METRICS_ALLOWED_IPS'] = ['10.0.0.5']
+        self.assertEqual(self.client.get('/metrics', environ_base={'REMOTE_ADDR': '10.0.0.5'}).status_code, 200)
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    def test_disabled_by_default(self):
+        self.app.config['METRICS_ENABLED'] = Config.METRICS_ENABLED
+        self.app.config['SERVER_TIMING_ENABLED'] = Config.SERVER_TIMING_ENABLED
+
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+        self.assertNotIn('Server-Timing', self.client.get(f'/api/job/{self.job.id}').headers)
@@ -0,0 +1,105 @@
+import json
+import time
+from sqlalchemy import event
+from tests.base import BaseTestCase
+from app import db
+from app.models import BackgroundTask, User
+from app.middleware import Principal, PrincipalCache, generate_token, get_principal_cache
+
+class TestPrincipalCache(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = self.create_test_user(email='admin@example.com', name='Admin')
+        self.admin.is_admin = True
+        self.user = self.create_test_user()
+        db.session.commit()
+        self.statements = []
+        event.listen(db.engine, 'before_cursor_execute', self.record_statement)
+
+    def tearDown(self):
+        event.remove(db.engine, 'before_cursor_execute', self.record_statement)
+        super().tearDown()
+
+    def record_statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def login(self, email):
+        response = self.client.post('/api/auth/login', json={'email': email, 'password': 'password123'})
+        return self.get_auth_headers(json.loads(response.data)['token'])
+
+    def test_cached_principal_skips_user_query(self):
+        headers = self.login('admin@example.com')
+        self.client.get('/api/admin/llm_cache', headers=headers)
+        self.statements.clear()
+
+        response = self.client.get('/api/admin/llm_cache', headers=headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([s for s in self.statements if 'FROM user' in s.replace('"', '')])
+
+    def test_current_user_is_loaded_lazily(self):
+        headers = self.login('test@example.com')
+
+        response = self.client.get('/api/user/profile', headers=headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data)['user']['email'], 'test@example.com')
+
+    def test_toggle_admin_invalidates_principal(self):
+        admin_headers = self.login('admin@example.com')
+        user_headers = self.login('test@example.com')
+        self.assertEqual(self.client.get('/api/admin/llm_cache', headers=user_headers).status_code, 403)
+
+        response = self.client.post(f'/api/admin/users/{self.user.id}/toggle-admin', headers=admin_headers)
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.client.get('/api/admin/llm_cache', headers=user_headers).status_code, 200)
+
+    def test_trusted_claims_skip_database(self):
+        self.app.config['JWT_TRUST_CLAIMS'] = True
+        # 已结束的任务，不会被首个请求触发的任务恢复调度到后台线程
+        db.session.add(BackgroundTask(id='task-1', kind='parse_resume', payload='{}', status='succeeded',
+                                      user_id=self.user.id))
+        db.session.commit()
+        headers = self.get_auth_headers(generate_token(self.user.id, is_admin=False, email='test@example.com'))
+        self.statements.clear()
+
+        response = self.client.get('/api/task/task-1', headers=headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([s for s in self.statements if 'FROM user' in s.replace('"', '')])
+
+    def test_admin_claim_is_rechecked_against_database(self):
+        # 另一个 worker 撤销了管理员权限，本进程没有撤销记录，只有令牌里的旧声明
+        self.app.config['JWT_TRUST_CLAIMS'] = True
+        token = generate_token(self.admin.id, is_admin=True, email='admin@example.com')
+        headers = self.get_auth_headers(token)
+        self.admin.is_admin = False
+        db.session.commit()
+
+        self.assertEqual(self.client.get('/api/admin/llm_cache', headers=headers).status_code, 403)
+        db.session.add(BackgroundTask(id='task-2', kind='parse_resume', payload='{}', status='succeeded',
+                                      user_id=self.user.id))
+        db.session.commit()
+        self.assertEqual(self.client.get('/api/task/task-2', headers=headers).status_code, 404)
+
+    def test_claims_issued_before_invalidation_are_not_trusted(self):
+        self.app.config['JWT_TRUST_CLAIMS'] = True
+        token = generate_token(self.user.id, is_admin=True, email='test@example.com')
+        time.sleep(0.01)
+        get_principal_cache().invalidate(self.user.id)
+
+        response = self.client.get('/api/admin/llm_cache', headers=self.get_auth_headers(token))
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_lru_and_ttl(self):
+        cache = PrincipalCache(max_size=2, ttl=60)
+        for user_id in (1, 2, 3):
+            cache.set(Principal(user_id, False, f'{user_id}@example.com'))
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(cache.get(3).email, '3@example.com')
+
+        cache.ttl = -1
+        cache.set(Principal(4, False, None))
+        self.assertIsNone(cache.get(4))
@@ -0,0 +1,127 @@
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import event, update
+from tests.base import BaseTestCase
+from app import db
+from app.models import Job, User
+from app.services.pagination import decode_cursor, encode_cursor
+
+class TestCursorPagination(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        base = datetime(2026, 1, 1)
+        # 每 3 个职位共享同一个 created_at，验证按 id 打破并列
+        for i in range(10):
+            job = Job(job_title=f'工程师{i}', company_name='测试公司', location='北京',
+                      raw_jd_text=f'JD {i}', created_at=base + timedelta(minutes=i // 3))
+            job.set_responsibilities([])
+            job.set_requirements([])
+            db.session.add(job)
+        db.session.commit()
+
+    def fetch_all(self, url, key, **params):
+        ids, cursor, pages = [], '', 0
+        while True:
+            response = self.client.get(url, query_string=dict(params, cursor=cursor))
+            data = json.loads(response.data)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(item['id'] for item in data[key])
+            pages += 1
+            cursor = data['pagination']['next_cursor']
+            if not cursor:
+                return ids, pages
+
+    def test_pages_cover_all_jobs_in_order(self):
+        ids, pages = self.fetch_all('/api/job/', 'jobs', per_page=4)
+
+        expected = [job.id for job in Job.query.order_by(Job.created_at.desc(), Job.id.desc())]
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 3)
+
+    def test_deep_page_uses_no_offset_or_count(self):
+        first = json.loads(self.client.get('/api/job/', query_string={'cursor': '', 'per_page': 4}).data)
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            self.client.get('/api/job/', query_string={'cursor': first['pagination']['next_cursor'], 'per_page': 4})
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+        job_statements = [s for s in statements if 'FROM job' in s]
+        self.assertEqual(len(job_statements), 1)
+        self.assertIn('(job.created_at, job.id) <', job_statements[0])
+        self.assertNotIn('count(', job_statements[0].lower())
+
+    def test_rows_without_created_at_come_last(self):
+        for i in range(3):
+            job = Job(job_title=f'旧职位{i}', company_name='测试公司', location='北京', raw_jd_text='JD')
+            job.set_responsibilities([])
+            job.set_requirements([])
+            db.session.add(job)
+        db.session.flush()
+        db.session.execute(update(Job).where(Job.job_title.like('旧职位%')).values(created_at=None))
+        db.session.commit()
+
+        # 每页 4 条: 第 3 页以非空行开头、NULL 行补齐，第 4 页的游标落在 NULL 行上
+        ids, pages = self.fetch_all('/api/job/', 'jobs', per_page=4)
+
+        legacy = [job.id for job in Job.query.filter(Job.created_at.is_(None)).order_by(Job.id.desc())]
+        dated = [job.id for job in Job.query.filter(Job.created_at.isnot(None))
+                 .order_by(Job.created_at.desc(), Job.id.desc())]
+        self.assertEqual(ids, dated + legacy)
+        self.assertEqual(pages, 4)
+
+    def test_total_is_optional_and_cached(self):
+        response = self.client.get('/api/job/', query_string={'cursor': '', 'include_total': 'true'})
+        self.assertEqual(json.loads(response.data)['pagination']['total'], 10)
+
+        db.session.delete(Job.query.first())
+        db.session.commit()
+        response = self.client.get('/api/job/', query_string={'cursor': '', 'include_total': 'true'})
+        self.assertEqual(json.loads(response.data)['pagination']['total'], 10)
+
+        response = self.client.get('/api/job/', query_string={'cursor': ''})
+        self.assertNotIn('total', json.loads(response.data)['pagination'])
+
+    def test_invalid_cursor(self):
+        for cursor in ('not-a-cursor', encode_cursor({'k': ['x']}), encode_cursor({'k': ['bad-date', 1]})):
+            response = self.client.get('/api/job/', query_string={'cursor': cursor})
+            self.assertEqual(response.status_code, 400)
+
+    def test_cursor_roundtrip(self):
+        self.assertEqual(decode_cursor(encode_cursor({'o': 20})), {'o': 20})
+
+    def test_page_number_mode_is_unchanged(self):
+        data = json.loads(self.client.get('/api/job/', query_string={'page': 2, 'per_page': 4}).data)
+
+        self.assertEqual(data['pagination']['total'], 10)
+        self.assertEqual(data['pagination']['pages'], 3)
+        self.assertEqual(len(data['jobs']), 4)
+
+    def test_admin_user_listing_is_paginated_and_slim(self):
+        admin = self.create_test_user(email='admin@example.com')
+        admin.is_admin = True
+        admin.resume_text = '简历'
+        for i in range(4):
+            self.create_test_user(email=f'user{i}@example.com')
+        db.session.commit()
+        response = self.client.post('/api/auth/login', json={'email': 'admin@example.com', 'password': 'password123'})
+        headers = self.get_auth_headers(json.loads(response.data)['token'])
+
+        response = self.client.get('/api/admin/users', headers=headers, query_string={'per_page': 2})
+        data = json.loads(response.data)
+
+        self.assertEqual(len(data['users']), 2)
+        self.assertNotIn('resume_text', data['users'][0])
+        self.assertTrue(data['pagination']['has_next'])
+
+        users, cursor = {}, ''
+        while cursor is not None:
+            data = json.loads(self.client.get('/api/admin/users', headers=headers,
+                                              query_string={'per_page': 2, 'cursor': cursor}).data)
+            users.update((user['email'], user) for user in data['users'])
+            cursor = data['pagination']['next_cursor']
+        self.assertEqual(len(users), 5)
+        self.assertTrue(users['admin@example.com']['has_resume'])
+        self.assertFalse(users['user0@example.com']['has_resume'])
@@ -0,0 +1,58 @@
+import json
+from unittest.mock import patch
+import bcrypt
+from tests.base import BaseTestCase
+from app import db
+from app.models import User
+from app.services import password_service
+
+class TestPasswordService(BaseTestCase):
+    def test_configured_rounds_are_used(self):
+        password_hash = password_service.hash_password('password123')
+
+        self.assertEqual(password_service.hash_rounds(password_hash), 4)
+        self.assertTrue(password_service.verify_password('password123', password_hash))
+        self.assertFalse(password_service.verify_password('wrong', password_hash))
+        self.assertFalse(password_service.needs_rehash(password_hash))
+
+    def test_calibration_respects_bounds(self):
+        self.assertEqual(password_service.calibrate_rounds(0, min_rounds=10), 10)
+        self.assertEqual(password_service.calibrate_rounds(10 ** 9, min_rounds=4), password_service.MAX_ROUNDS)
+
+    def test_calibration_is_lazy(self):
+        with patch.dict(self.app.extensions, {'bcrypt_rounds_pinned': False}), \
+                patch.object(password_service, 'calibrate_rounds', return_value=12) as calibrate:
+            del self.app.extensions['bcrypt_rounds']
+            self.assertEqual(password_service.get_rounds(), 12)
+            self.assertEqual(password_service.get_rounds(), 12)
+
+        calibrate.assert_called_once_with(self.app.config['BCRYPT_TARGET_MS'], self.app.config['BCRYPT_MIN_ROUNDS'])
+
+    def test_login_rehashes_outdated_cost(self):
+        user = User(email='test@example.com', name='Test')
+        user.password_hash = bcrypt.hashpw(b'password123', bcrypt.gensalt(rounds=5)).decode('utf-8')
+        db.session.add(user)
+        db.session.commit()
+
+        response = self.client.post('/api/auth/login', json={'email': 'test@example.com', 'password': 'password123'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(password_service.hash_rounds(db.session.get(User, user.id).password_hash), 4)
+
+    def test_calibrated_cost_only_upgrades(self):
+        lower = bcrypt.hashpw(b'password123', bcrypt.gensalt(rounds=4)).decode('utf-8')
+        higher = bcrypt.hashpw(b'password123', bcrypt.gensalt(rounds=6)).decode('utf-8')
+
+        with patch.dict(self.app.extensions, {'bcrypt_rounds': 5, 'bcrypt_rounds_pinned': False}):
+            self.assertTrue(password_service.needs_rehash(lower))
+            self.assertFalse(password_service.needs_rehash(higher))
+
+    def test_login_returns_503_when_hasher_is_busy(self):
+        self.create_test_user()
+        busy = password_service.PasswordHasherBusy('Password hashing queue is full')
+
+        with patch.object(password_service, 'verify_password', side_effect=busy):
+            response = self.client.post('/api/auth/login', json={'email': 'test@example.com', 'password': 'password123'})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(json.loads(response.data)['status'], 'error')
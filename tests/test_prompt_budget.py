@@ -0,0 +1,70 @@
+import json
+from tests.base import BaseTestCase
+from app import db
+from app.models import Job
+from app.services.ai_service import match_jobs
+from app.services.prompt_budget import compact_resume_data, estimate_tokens, fit_jobs_to_budget
+
+class TestPromptBudget(BaseTestCase):
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens('后端工程师'), 5)
+        self.assertEqual(estimate_tokens('abcdefgh'), 2)
+        self.assertGreater(estimate_tokens({'a': ['后端', 'java']}), 2)
+
+    def test_compact_resume_data(self):
+        resume = {
+            "technical_analysis": {"tech_stack": ["Go"], "learning_ability": "很长的评价" * 50},
+            "career_analysis": {"suitable_positions": ["后端工程师"], "development_suggestions": "建议" * 50},
+            "education_analysis": {"note": "无法从简历中提取相关信息"}
+        }
+
+        compact = compact_resume_data(resume)
+
+        self.assertEqual(compact, {
+            "technical_analysis": {"tech_stack": ["Go"]},
+            "career_analysis": {"suitable_positions": ["后端工程师"]}
+        })
+        self.assertEqual(compact_resume_data({"free_text": "x"}), {"free_text": "x"})
+
+    def test_fit_jobs_to_budget_truncates_then_drops(self):
+        jobs = [{"id": i, "requirements": ["要求" * 100] * 10} for i in range(5)]
+
+        fitted, total = fit_jobs_to_budget(100, jobs, 10 ** 6)
+        self.assertEqual(fitted, jobs)
+
+        fitted, total = fit_jobs_to_budget(100, jobs, 1500)
+        self.assertEqual(len(fitted), 5)
+        self.assertLessEqual(len(fitted[0]["requirements"]), 5)
+        self.assertLessEqual(total, 1500)
+
+        fitted, total = fit_jobs_to_budget(100, jobs, 400)
+        self.assertEqual([job["id"] for job in fitted], [0, 1])
+        self.assertLessEqual(total, 400)
+
+        fitted, _ = fit_jobs_to_budget(100, jobs, 10)
+        self.assertEqual(len(fitted), 1)
+
+    def test_job_prompt_dict_excludes_raw_text(self):
+        job = Job(job_title='后端工程师', company_name='ABC', location='北京', raw_jd_text='很长的原文')
+        job.set_requirements(['熟悉Go'])
+        job.set_responsibilities(['开发'])
+        db.session.add(job)
+        db.session.commit()
+
+        prompt = job.to_prompt_dict()
+
+        self.assertNotIn('raw_jd_text', prompt)
+        self.assertNotIn('created_at', prompt)
+        self.assertEqual(prompt['requirements'], ['熟悉Go'])
+
+    def test_match_jobs_enforces_budget(self):
+        self.app.config['MATCH_PROMPT_TOKEN_BUDGET'] = 1000
+        self.mcp_mock.use_tool.return_value = {"content": "[]"}
+        jobs = [{"id": i, "requirements": ["要求" * 100] * 10} for i in range(20)]
+
+        match_jobs({"technical_analysis": {"tech_stack": ["Go"]}}, "后端", "北京", jobs)
+
+        messages = self.mcp_mock.use_tool.call_args[1]['arguments']['messages']
+        self.assertLessEqual(estimate_tokens(messages[0]['content']) + estimate_tokens(messages[1]['content']), 1100)
+        payload = json.loads(messages[1]['content'])
+        self.assertLess(len(payload['jobs']), 20)
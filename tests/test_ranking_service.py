@@ -0,0 +1,91 @@
+import json
+from tests.base import BaseTestCase
+from app import db
+from app.models import User, Job
+from app.services.ranking_service import rank_jobs, to_recommendations
+
+RESUME_DATA = {
+    "technical_analysis": {"tech_stack": ["Java", "Spring Boot", "Kafka"]},
+    "experience_analysis": {"years": 4},
+    "core_competencies": {"key_skills": ["微服务"]},
+    "career_analysis": {"suitable_positions": ["后端工程师"]}
+}
+
+class TestRankingService(BaseTestCase):
+    def create_job(self, title, location, requirements, responsibilities=None):
+        job = Job(
+            job_title=title,
+            company_name='测试公司',
+            location=location,
+            raw_jd_text=f'{title} {location}'
+        )
+        job.set_requirements(requirements)
+        job.set_responsibilities(responsibilities or [])
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    def test_rank_jobs_orders_by_score(self):
+        good = self.create_job('高级后端工程师', '北京', ['3年以上Java开发经验', '熟悉Spring Boot和Kafka'], ['设计微服务'])
+        weak = self.create_job('前端工程师', '上海', ['熟悉React', '熟悉TypeScript'])
+
+        ranked = rank_jobs(RESUME_DATA, '后端工程师', '北京', [weak, good])
+
+        self.assertEqual(ranked[0].job.id, good.id)
+        self.assertGreater(ranked[0].score, ranked[-1].score)
+        self.assertIn('Kafka', ranked[0].matched_skills)
+
+    def test_rank_jobs_top_k_and_weights(self):
+        beijing = self.create_job('产品经理', '北京', ['熟悉Axure'])
+        shanghai = self.create_job('产品经理', '上海', ['熟悉Axure'])
+
+        ranked = rank_jobs(RESUME_DATA, '产品经理', '上海', [beijing, shanghai],
+                           weights={'location': 1.0, 'skills': 0, 'title': 0, 'experience': 0},
+                           top_k=1)
+
+        self.assertEqual(len(ranked), 1)
+        self.assertEqual(ranked[0].job.id, shanghai.id)
+
+    def test_experience_requirement_lowers_score(self):
+        job = self.create_job('后端工程师', '北京', ['8年以上Java开发经验'])
+
+        ranked = rank_jobs(RESUME_DATA, '后端工程师', '北京', [job])
+
+        self.assertAlmostEqual(ranked[0].breakdown['experience'], 0.5)
+
+    def test_to_recommendations_shape(self):
+        job = self.create_job('后端工程师', '北京', ['熟悉Java和Go'])
+
+        recommendations = to_recommendations(rank_jobs(RESUME_DATA, '后端工程师', '北京', [job]))
+
+        self.assertEqual(recommendations[0]['job_id'], job.id)
+        self.assertTrue(0 < recommendations[0]['match_score'] <= 100)
+        for key in ('match_analysis', 'advantages', 'challenges', 'suggestions'):
+            self.assertIn(key, recommendations[0])
+        self.assertIn('缺少 go 相关经验', recommendations[0]['challenges'])
+
+    def test_match_jobs_local_mode_skips_llm(self):
+        self.create_test_user()
+        response = self.client.post('/api/auth/login', json={
+            'email': 'test@example.com',
+            'password': 'password123'
+        })
+        headers = self.get_auth_headers(json.loads(response.data)['token'])
+
+        user = User.query.filter_by(email='test@example.com').first()
+        user.resume_text = '简历'
+        user.set_resume_parsed_data(RESUME_DATA)
+        db.session.commit()
+        job = self.create_job('后端工程师', '北京', ['熟悉Java'])
+
+        response = self.client.get('/api/user/match_jobs', headers=headers, query_string={
+            'desired_position': '后端工程师',
+            'desired_location': '北京',
+            'mode': 'local'
+        })
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['recommendations'][0]['job_id'], job.id)
+        self.assertEqual(data['recommendations'][0]['job_details']['job_title'], '后端工程师')
+        self.mcp_mock.use_tool.assert_not_called()
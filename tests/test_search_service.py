@@ -0,0 +1,73 @@
+import json
+from sqlalchemy.dialects import postgresql
+from tests.base import BaseTestCase
+from app import db
+from app.models import Job
+from app.services.search_service import PostgresBackend, search_jobs
+
+class TestSearchService(BaseTestCase):
+    def create_job(self, title, company, requirements, raw_jd_text=''):
+        job = Job(
+            job_title=title,
+            company_name=company,
+            location='北京',
+            raw_jd_text=raw_jd_text or title
+        )
+        job.set_requirements(requirements)
+        job.set_responsibilities([])
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    def search(self, q):
+        return [job.id for job in search_jobs(Job.query, q).all()]
+
+    def test_search_ranks_title_matches_first(self):
+        in_body = self.create_job('数据工程师', 'ABC科技', ['熟悉Spark'], '团队使用Kafka做实时计算')
+        in_title = self.create_job('Kafka平台工程师', 'DEF科技', ['熟悉Kafka'])
+        self.create_job('前端工程师', 'GHI科技', ['熟悉React'])
+
+        self.assertEqual(self.search('kafka'), [in_title.id, in_body.id])
+
+    def test_search_chinese_and_raw_jd_text(self):
+        job = self.create_job('后端工程师', 'ABC科技', ['熟悉Java'], '负责分布式存储系统研发')
+        self.create_job('后端工程师', 'DEF科技', ['熟悉Go'])
+
+        self.assertEqual(self.search('分布式存储'), [job.id])
+        self.assertEqual(self.search('ABC科技'), [job.id])
+
+    def test_index_follows_updates_and_deletes(self):
+        job = self.create_job('后端工程师', 'ABC科技', ['熟悉Java'])
+        job.set_requirements(['熟悉Rust'])
+        db.session.commit()
+
+        self.assertEqual(self.search('java'), [])
+        self.assertEqual(self.search('rust'), [job.id])
+
+        db.session.delete(job)
+        db.session.commit()
+        self.assertEqual(self.search('rust'), [])
+
+    def test_like_backend(self):
+        self.app.config['SEARCH_BACKEND'] = 'like'
+        job = self.create_job('后端工程师', 'ABC科技', ['熟悉Kafka'])
+
+        self.assertEqual(self.search('Kafka'), [job.id])
+
+    def test_postgres_query_compiles(self):
+        query = PostgresBackend().apply(Job.query, '后端 Kafka')
+        sql = str(query.statement.compile(dialect=postgresql.dialect()))
+
+        self.assertIn('job.search_vector @@ plainto_tsquery', sql)
+        self.assertIn('ts_rank(job.search_vector', sql)
+
+    def test_list_jobs_q_parameter(self):
+        job = self.create_job('Kafka平台工程师', 'ABC科技', ['熟悉Kafka'])
+        self.create_job('前端工程师', 'DEF科技', ['熟悉React'])
+
+        response = self.client.get('/api/job/?q=kafka')
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in data['jobs']], [job.id])
+        self.assertEqual(data['pagination']['total'], 1)
@@ -0,0 +1,46 @@
+import json
+from sqlalchemy import event
+from tests.base import BaseTestCase
+from app import db
+from app.models import Job
+from app.serializers import DEFER_RAW_JD_TEXT, job_details
+
+class TestSerializers(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(3):
+            job = Job(job_title=f'工程师{i}', company_name='测试公司', location='北京', raw_jd_text=f'完整 JD {i}')
+            job.set_responsibilities(['开发'])
+            job.set_requirements(['Python'])
+            db.session.add(job)
+        db.session.commit()
+        db.session.expunge_all()
+        self.statements = []
+        event.listen(db.engine, 'before_cursor_execute', self.record_statement)
+
+    def tearDown(self):
+        event.remove(db.engine, 'before_cursor_execute', self.record_statement)
+        super().tearDown()
+
+    def record_statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def test_job_list_selects_only_rendered_columns(self):
+        for params in ({}, {'cursor': ''}, {'q': '工程师', 'cursor': ''}):
+            response = self.client.get('/api/job/', query_string=params)
+            self.assertEqual(len(json.loads(response.data)['jobs']), 3)
+
+        selects = [s for s in self.statements if s.startswith('SELECT')]
+        self.assertTrue(selects)
+        for column in ('raw_jd_text', 'responsibilities', 'requirements'):
+            self.assertFalse([s for s in selects if f'job.{column}' in s])
+
+    def test_job_details_loads_raw_text_in_one_query(self):
+        jobs = Job.query.options(DEFER_RAW_JD_TEXT).all()
+        self.statements.clear()
+
+        details = job_details(jobs)
+
+        self.assertEqual(len(self.statements), 1)
+        self.assertEqual(details[jobs[0].id]['raw_jd_text'], '完整 JD 0')
+        self.assertEqual(details[jobs[0].id]['requirements'], ['Python'])
@@ -0,0 +1,158 @@
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+import unittest
+from tests.base import BaseTestCase
+from app.services import single_flight
+from app.services.single_flight import FileSingleFlight, SingleFlight
+
+def run_concurrently(target, count, delay=0.0):
+    results = [None] * count
+    errors = [None] * count
+
+    def run(index):
+        try:
+            results[index] = target()
+        except Exception as e:
+            errors[index] = e
+
+    threads = []
+    for i in range(count):
+        threads.append(threading.Thread(target=run, args=(i,)))
+        threads[-1].start()
+        time.sleep(delay)
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            time.sleep(0.1)
+            return {'content': 'ok'}
+
+        results, errors = run_concurrently(lambda: flight.do('key', fn), 5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([result[0] for result in results], [{'content': 'ok'}] * 5)
+        self.assertEqual(sum(shared for _, shared in results), 4)
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_error_shared_with_followers(self):
+        flight = SingleFlight()
+
+        def fn():
+            time.sleep(0.1)
+            raise RuntimeError('upstream down')
+
+        _, errors = run_concurrently(lambda: flight.do('key', fn), 3)
+
+        self.assertTrue(all(isinstance(e, RuntimeError) for e in errors))
+        # 失败后不保留状态，下一次调用重新执行
+        self.assertEqual(flight.do('key', lambda: 'retry'), ('retry', False))
+
+    def test_sequential_calls_not_coalesced(self):
+        flight = SingleFlight()
+        self.assertEqual(flight.do('key', lambda: 1), (1, False))
+        self.assertEqual(flight.do('key', lambda: 2), (2, False))
+
+    def test_file_lock_across_workers(self):
+        # 两个实例各自打开锁文件，flock 与两个进程间的行为相同
+        with tempfile.TemporaryDirectory() as directory:
+            workers = [FileSingleFlight(directory), FileSingleFlight(directory)]
+            calls = []
+
+            def fn():
+                calls.append(1)
+                time.sleep(0.2)
+                return {'content': 'ok'}
+
+            index = iter(range(2))
+            results, errors = run_concurrently(lambda: workers[next(index)].do('key', fn, timeout=5), 2, delay=0.05)
+
+            self.assertEqual(errors, [None, None])
+            self.assertEqual(len(calls), 1)
+            self.assertEqual([result for result in results], [({'content': 'ok'}, False), ({'content': 'ok'}, True)])
+
+            # 锁空闲时的新调用不复用旧结果
+            self.assertEqual(workers[1].do('key', lambda: {'content': 'new'}, timeout=5), ({'content': 'new'}, False))
+
+    def test_file_results_are_private_and_removed_after_read(self):
+        with tempfile.TemporaryDirectory() as parent:
+            directory = os.path.join(parent, 'flight')
+            workers = [FileSingleFlight(directory), FileSingleFlight(directory)]
+            written = []
+            write_result = workers[0]._write_result
+
+            def record_write(key, result):
+                write_result(key, result)
+                written.append(stat.S_IMODE(os.stat(os.path.join(directory, f'{key}.json')).st_mode))
+
+            workers[0]._write_result = record_write
+
+            def fn():
+                time.sleep(0.2)
+                return {'content': '简历'}
+
+            index = iter(range(2))
+            _, errors = run_concurrently(lambda: workers[next(index)].do('key', fn, timeout=5), 2, delay=0.05)
+
+            self.assertEqual(errors, [None, None])
+            self.assertEqual(stat.S_IMODE(os.stat(directory).st_mode), 0o700)
+            self.assertEqual(written, [0o600])
+            # 等待者读取后删除结果
+            self.assertFalse(os.path.exists(os.path.join(directory, 'key.json')))
+
+            # 没有等待者时不写出结果
+            workers[0].do('other', lambda: {'content': '简历'}, timeout=5)
+            self.assertEqual(written, [0o600])
+            self.assertFalse(os.path.exists(os.path.join(directory, 'other.json')))
+
+class TestSingleFlightUseTool(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.calls = []
+
+        def slow_llm(**kwargs):
+            self.calls.append(kwargs['arguments'])
+            time.sleep(0.1)
+            return {'content': json.dumps({'ok': True})}
+
+        self.mcp_mock.use_tool.side_effect = slow_llm
+
+    def call(self, content='简历'):
+        with self.app.app_context():
+            return single_flight.use_tool(self.mcp_mock, 'siliconflow', 'json_mode',
+                                          {'messages': [{'role': 'user', 'content': content}]})
+
+    def test_identical_requests_coalesced(self):
+        results, errors = run_concurrently(self.call, 4)
+
+        self.assertEqual(errors, [None] * 4)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(results, [{'content': '{"ok": true}'}] * 4)
+        counter = self.app.extensions['metrics'].counter('llm_coalesced_calls_total', '', ('scope',))
+        self.assertEqual(counter.value(scope='thread'), 3)
+
+    def test_different_requests_not_coalesced(self):
+        contents = iter(['简历A', '简历B'])
+        run_concurrently(lambda: self.call(next(contents)), 2)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_off(self):
+        self.app.config['LLM_SINGLE_FLIGHT'] = 'off'
+        run_concurrently(self.call, 3)
+        self.assertEqual(len(self.calls), 3)
+
+    def test_fingerprint_includes_model(self):
+        arguments = {'messages': [{'role': 'user', 'content': '简历'}]}
+        key = single_flight.fingerprint('siliconflow', 'json_mode', arguments)
+        self.app.config['LLM_MODEL'] = 'other-model'
+        self.assertNotEqual(single_flight.fingerprint('siliconflow', 'json_mode', arguments), key)
@@ -0,0 +1,113 @@
+import json
+from tests.base import BaseTestCase
+from app import db
+from app.models import User, Job, JobTerm
+from app.routes.user import candidate_jobs
+from app.services.skill_index import index_job, find_job_ids, rebuild_index, query_terms, selective_terms
+
+class TestSkillIndex(BaseTestCase):
+    def create_job(self, title, requirements, responsibilities=None, index=True):
+        job = Job(
+            job_title=title,
+            company_name='测试公司',
+            location='北京',
+            raw_jd_text=title
+        )
+        job.set_requirements(requirements)
+        job.set_responsibilities(responsibilities or [])
+        db.session.add(job)
+        db.session.flush()
+        if index:
+            index_job(job)
+        db.session.commit()
+        return job
+
+    def test_find_job_ids_any_and_all(self):
+        kafka = self.create_job('后端工程师', ['熟悉Kafka和Redis'])
+        redis = self.create_job('运维工程师', ['熟悉Redis'], ['维护微服务集群'])
+
+        self.assertEqual(find_job_ids('kafka'), {kafka.id})
+        self.assertEqual(find_job_ids(['Kafka', 'Redis']), {kafka.id, redis.id})
+        self.assertEqual(find_job_ids(['Kafka', 'Redis'], match_all=True), {kafka.id})
+        self.assertEqual(find_job_ids('微服务'), {redis.id})
+        self.assertEqual(find_job_ids(''), set())
+
+    def test_reindex_replaces_terms(self):
+        job = self.create_job('后端工程师', ['熟悉Kafka'])
+        job.set_requirements(['熟悉RabbitMQ'])
+        index_job(job)
+        db.session.commit()
+
+        self.assertEqual(find_job_ids('kafka'), set())
+        self.assertEqual(find_job_ids('rabbitmq'), {job.id})
+
+    def test_rebuild_index(self):
+        job = self.create_job('后端工程师', ['熟悉Kafka'], index=False)
+        self.assertEqual(find_job_ids('kafka'), set())
+
+        self.assertEqual(rebuild_index(), 1)
+        self.assertEqual(find_job_ids('kafka'), {job.id})
+
+    def test_common_terms_are_not_selective(self):
+        jobs = [self.create_job(f'{name}工程师', [f'熟悉{skill}'])
+                for name, skill in [('后端', 'Kafka'), ('前端', 'React'), ('测试', 'Selenium'), ('数据', 'Spark')]]
+
+        self.assertEqual(selective_terms(query_terms(['后端工程师', 'Kafka', 'Go']), 0.5), {'后端', '端工', 'kafka'})
+        self.assertEqual(find_job_ids('工程师'), {job.id for job in jobs})
+
+    def test_candidate_jobs_require_selective_hits(self):
+        backend = self.create_job('后端工程师', ['熟悉Java和Kafka'])
+        self.create_job('前端工程师', ['熟悉React'])
+        self.create_job('测试工程师', ['熟悉Selenium和Java'])
+        self.create_job('算法工程师', ['熟悉PyTorch'])
+        resume_data = {'technical_analysis': {'tech_stack': ['Java', 'Kafka']}}
+
+        # 所有职位都在北京，换一个地点只看词元召回；“工程”“程师”不参与召回，只命中 java 的职位不够
+        candidates = candidate_jobs(resume_data, '后端工程师', '上海')
+
+        self.assertEqual([job.id for job in candidates], [backend.id])
+
+    def test_deleting_job_removes_terms(self):
+        job = self.create_job('后端工程师', ['熟悉Kafka'])
+        db.session.delete(job)
+        db.session.commit()
+
+        self.assertEqual(JobTerm.query.count(), 0)
+
+    def test_list_jobs_skill_filter(self):
+        kafka = self.create_job('后端工程师', ['熟悉Kafka和Redis'])
+        self.create_job('前端工程师', ['熟悉React'])
+
+        response = self.client.get('/api/job/?skill=Kafka,Redis')
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([job['id'] for job in data['jobs']], [kafka.id])
+
+    def test_create_job_indexes_terms(self):
+        admin = User(email='admin@example.com', name='Admin', is_admin=True)
+        admin.set_password('admin123')
+        db.session.add(admin)
+        db.session.commit()
+        response = self.client.post('/api/auth/login', json={
+            'email': 'admin@example.com',
+            'password': 'admin123'
+        })
+        headers = self.get_auth_headers(json.loads(response.data)['token'])
+        self.mcp_mock.use_tool.return_value = {
+            "content": json.dumps({
+                "job_title": "数据工程师",
+                "company_name": "ABC科技",
+                "location": "上海",
+                "responsibilities": ["搭建数据管道"],
+                "requirements": ["熟悉Kafka"]
+            })
+        }
+
+        response = self.client.post('/api/job/admin/create_job', headers=headers,
+                                    json={'raw_jd_text': '数据工程师 JD'})
+        job_id = json.loads(response.data)['job_id']
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(find_job_ids('kafka'), {job_id})
+        self.assertGreater(JobTerm.query.filter_by(job_id=job_id).count(), 1)
@@ -0,0 +1,143 @@
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, UTC
+from unittest.mock import patch
+from sqlalchemy import select
+from tests.base import BaseTestCase
+from app import db
+from app.models import User, Job, BackgroundTask
+from app.services import task_queue as task_queue_module
+from app.services.task_queue import task_queue
+
+RESUME_RESPONSE = {"content": '{"technical_analysis": {"tech_stack": ["Python"]}}'}
+JD_RESPONSE = {
+    "content": json.dumps({
+        "job_title": "后端工程师",
+        "company_name": "ABC科技",
+        "location": "北京",
+        "responsibilities": ["开发后端服务"],
+        "requirements": ["熟悉Python"]
+    })
+}
+
+class TestTaskQueue(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.app.config['TASK_QUEUE_EAGER'] = True
+        self.user = self.create_test_user()
+        self.headers = self.login('test@example.com', 'password123')
+
+    def login(self, email, password):
+        response = self.client.post('/api/auth/login', json={'email': email, 'password': password})
+        return self.get_auth_headers(json.loads(response.data)['token'])
+
+    def test_update_resume_async(self):
+        self.mcp_mock.use_tool.return_value = RESUME_RESPONSE
+
+        response = self.client.put('/api/user/update_resume?async=true', headers=self.headers,
+                                   json={'resume_text': '我的简历'})
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 202)
+        task_id = data['task']['id']
+
+        response = self.client.get(f'/api/task/{task_id}', headers=self.headers)
+        task = json.loads(response.data)['task']
+        self.assertEqual(task['status'], 'succeeded')
+        self.assertEqual(task['result']['parsed_data']['technical_analysis']['tech_stack'], ['Python'])
+
+        user = db.session.get(User, self.user.id)
+        self.assertEqual(user.resume_text, '我的简历')
+        self.assertEqual(user.get_resume_parsed_data()['technical_analysis']['tech_stack'], ['Python'])
+
+    def test_create_job_async(self):
+        admin = User(email='admin@example.com', name='Admin', is_admin=True)
+        admin.set_password('admin123')
+        db.session.add(admin)
+        db.session.commit()
+        headers = self.login('admin@example.com', 'admin123')
+        self.mcp_mock.use_tool.return_value = JD_RESPONSE
+
+        response = self.client.post('/api/job/admin/create_job?async=1', headers=headers,
+                                    json={'raw_jd_text': '后端工程师 JD'})
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(data['task']['status'], 'succeeded')
+        job = db.session.get(Job, data['task']['result']['job_id'])
+        self.assertEqual(job.job_title, '后端工程师')
+
+    def test_failed_task_records_error(self):
+        self.mcp_mock.use_tool.side_effect = Exception('upstream down')
+
+        task = task_queue.enqueue('parse_resume', {'user_id': self.user.id, 'resume_text': '简历'},
+                                  user_id=self.user.id)
+
+        self.assertEqual(task.status, 'failed')
+        self.assertIn('upstream down', task.error)
+        self.assertEqual(task.attempts, 1)
+
+    def test_threaded_execution(self):
+        self.app.config['TASK_QUEUE_EAGER'] = False
+        self.mcp_mock.use_tool.return_value = RESUME_RESPONSE
+
+        task = task_queue.enqueue('parse_resume', {'user_id': self.user.id, 'resume_text': '简历'},
+                                  user_id=self.user.id)
+        task_queue.wait(task.id, timeout=10)
+        db.session.expire_all()
+
+        self.assertEqual(db.session.get(BackgroundTask, task.id).status, 'succeeded')
+
+    def test_running_task_heartbeat_prevents_recovery(self):
+        self.app.config['TASK_QUEUE_HEARTBEAT'] = 0.05
+        self.app.config['TASK_QUEUE_STALE_AFTER'] = 0.2
+        recovered = []
+
+        def slow_task(payload):
+            # 执行时间超过 STALE_AFTER，期间另一个进程启动并恢复任务
+            time.sleep(0.4)
+            with self.app.app_context():
+                recovered.append(task_queue.recover())
+            updated_at = db.session.execute(
+                select(BackgroundTask.updated_at).where(BackgroundTask.status == 'running')
+            ).scalar()
+            return {'updated_at': updated_at.isoformat()}
+
+        started = datetime.now(UTC).replace(tzinfo=None)
+        with patch.dict(task_queue_module._handlers, {'slow': slow_task}):
+            task = task_queue.enqueue('slow', {}, user_id=self.user.id)
+
+        self.assertEqual(task.status, 'succeeded')
+        self.assertEqual(recovered, [0])
+        self.assertGreater(datetime.fromisoformat(task.get_result()['updated_at']), started + timedelta(seconds=0.2))
+
+    def test_recover_runs_pending_tasks(self):
+        self.mcp_mock.use_tool.return_value = RESUME_RESPONSE
+        task_id = str(uuid.uuid4())
+        db.session.add(BackgroundTask(
+            id=task_id,
+            kind='parse_resume',
+            status='pending',
+            payload=json.dumps({'user_id': self.user.id, 'resume_text': '简历'}),
+            user_id=self.user.id
+        ))
+        db.session.commit()
+
+        self.assertEqual(task_queue.recover(), 1)
+        self.assertEqual(db.session.get(BackgroundTask, task_id).status, 'succeeded')
+
+    def test_task_not_visible_to_other_users(self):
+        self.mcp_mock.use_tool.return_value = RESUME_RESPONSE
+        task = task_queue.enqueue('parse_resume', {'user_id': self.user.id, 'resume_text': '简历'},
+                                  user_id=self.user.id)
+        self.create_test_user(email='other@example.com')
+        headers = self.login('other@example.com', 'password123')
+
+        response = self.client.get(f'/api/task/{task.id}', headers=headers)
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_unknown_task_kind(self):
+        with self.assertRaises(ValueError):
+            task_queue.enqueue('unknown', {})
@@ -0,0 +1,241 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import ThreadingHTTPServer
+from tests.base import BaseTestCase
+from tests.test_mcp_client import StubHandler
+from app import db
+from app.mcp_client import AsyncDevMCPClient, DevMCPClient, UpstreamError
+from app.services.upstream_guard import (AIMDController, CircuitBreaker, FileTokenBucket, TokenBucket,
+                                         UpstreamGuard, UpstreamUnavailable)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+class TestTokenBucket(unittest.TestCase):
+    def test_requests_per_minute(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rpm=2, clock=clock)
+
+        self.assertEqual(bucket.try_acquire(0), 0)
+        self.assertEqual(bucket.try_acquire(0), 0)
+        self.assertAlmostEqual(bucket.try_acquire(0), 30)
+
+        clock.advance(30)
+        self.assertEqual(bucket.try_acquire(0), 0)
+
+    def test_tokens_per_minute_and_settle(self):
+        clock = FakeClock()
+        bucket = TokenBucket(tpm=600, clock=clock)
+
+        self.assertEqual(bucket.try_acquire(500), 0)
+        # 还剩 100，需要 400 个，按每秒 10 个补充
+        self.assertAlmostEqual(bucket.try_acquire(500), 40)
+        # 实际只用了 200，退还 300
+        bucket.adjust(-300)
+        self.assertEqual(bucket.try_acquire(400), 0)
+        # 超过容量的请求按容量计
+        clock.advance(60)
+        self.assertEqual(bucket.try_acquire(10000), 0)
+
+    def test_disabled(self):
+        self.assertEqual(TokenBucket().try_acquire(10 ** 6), 0)
+
+    def test_file_bucket_shared_between_workers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bucket.json')
+            workers = [FileTokenBucket(3, 0, path), FileTokenBucket(3, 0, path)]
+
+            self.assertEqual(workers[0].try_acquire(0), 0)
+            self.assertEqual(workers[1].try_acquire(0), 0)
+            self.assertEqual(workers[0].try_acquire(0), 0)
+            self.assertGreater(workers[1].try_acquire(0), 0)
+
+class TestAIMDController(unittest.TestCase):
+    def test_additive_increase_multiplicative_decrease(self):
+        clock = FakeClock()
+        aimd = AIMDController(initial=8, minimum=1, maximum=8, latency_threshold=5, clock=clock)
+
+        self.assertTrue(aimd.on_result(0.1, 429))
+        self.assertEqual(aimd.current_limit(), 4)
+        # 冷却期内的其他失败不再降低
+        self.assertFalse(aimd.on_result(0.1, 429))
+        self.assertEqual(aimd.current_limit(), 4)
+
+        clock.advance(2)
+        self.assertTrue(aimd.on_result(6.0, 200))
+        self.assertEqual(aimd.current_limit(), 2)
+
+        for _ in range(3):
+            aimd.on_result(0.1, 200)
+        self.assertEqual(aimd.current_limit(), 3)
+
+    def test_acquire_waits_for_slot(self):
+        aimd = AIMDController(initial=1, maximum=1)
+        aimd.acquire(timeout=1)
+        with self.assertRaises(UpstreamUnavailable):
+            aimd.acquire(timeout=0.05)
+
+        threading.Timer(0.05, aimd.release).start()
+        aimd.acquire(timeout=1)
+        self.assertEqual(aimd.in_flight, 1)
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_open_half_open_close(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+
+        self.assertFalse(breaker.record_failure())
+        self.assertTrue(breaker.record_failure())
+        with self.assertRaises(UpstreamUnavailable) as context:
+            breaker.check()
+        self.assertEqual(context.exception.retry_after, 10)
+
+        clock.advance(10)
+        breaker.check(reserve_probe=False)
+        breaker.check()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        # 探测请求在途时其他请求仍被拒绝
+        with self.assertRaises(UpstreamUnavailable):
+            breaker.check()
+
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        breaker.check()
+
+    def test_failed_probe_reopens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        clock.advance(10)
+        breaker.check()
+
+        self.assertTrue(breaker.record_failure())
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+class TestGuardedClient(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        self.server.requests = []
+        self.server.responses = []
+        self.server.connections = set()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.guard = UpstreamGuard(
+            TokenBucket(),
+            AIMDController(initial=4, maximum=4),
+            CircuitBreaker(failure_threshold=3, reset_timeout=30),
+            max_wait=0.5
+        )
+        self.llm = DevMCPClient(
+            base_url=f'http://127.0.0.1:{self.server.server_port}',
+            api_key='test-key',
+            read_timeout=0.5,
+            max_retries=2,
+            backoff_factor=0.01,
+            guard=self.guard
+        )
+        self.app.mcp = self.llm
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        super().tearDown()
+
+    def call(self):
+        return self.llm.use_tool('siliconflow', 'json_mode', {'messages': [{'role': 'user', 'content': '简历'}]})
+
+    def counter(self, name):
+        return self.app.extensions['metrics'].counter(name, '').value()
+
+    def test_breaker_opens_on_5xx_and_fails_fast(self):
+        self.server.responses = [(500, {}, 0)] * 3
+
+        with self.assertRaises(UpstreamError):
+            self.call()
+        self.assertEqual(self.guard.breaker.state, CircuitBreaker.OPEN)
+
+        start = time.perf_counter()
+        with self.assertRaises(UpstreamUnavailable):
+            self.call()
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(self.counter('llm_circuit_opened_total'), 1)
+        self.assertEqual(self.counter('llm_circuit_rejected_total'), 1)
+        self.assertEqual(self.guard.concurrency.in_flight, 0)
+
+    def test_429_reduces_concurrency_without_opening(self):
+        self.server.responses = [(429, {}, 0)]
+
+        self.assertEqual(self.call(), {'content': '{"ok": true}'})
+
+        self.assertEqual(self.guard.concurrency.current_limit(), 2)
+        self.assertEqual(self.guard.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.counter('llm_concurrency_decreases_total'), 1)
+        gauge = self.app.extensions['metrics'].gauge('llm_concurrency_limit', '')
+        self.assertEqual(gauge.value(), 2)
+
+    def test_rate_limit_rejects_after_max_wait(self):
+        self.guard.bucket = TokenBucket(rpm=1)
+
+        self.call()
+        with self.assertRaises(UpstreamUnavailable) as context:
+            self.call()
+
+        self.assertGreater(context.exception.retry_after, 50)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.counter('llm_rate_limit_rejected_total'), 1)
+
+    def test_cancelled_probe_is_released(self):
+        client = AsyncDevMCPClient(
+            base_url=f'http://127.0.0.1:{self.server.server_port}',
+            api_key='test-key',
+            read_timeout=2,
+            max_retries=0,
+            max_concurrency=4,
+            guard=self.guard
+        )
+        self.guard.breaker.state = CircuitBreaker.HALF_OPEN
+        self.server.responses = [(200, {}, 0.5)]
+
+        async def run():
+            try:
+                with self.assertRaises(asyncio.TimeoutError):
+                    # 探测请求在等待响应时被取消
+                    await asyncio.wait_for(client.use_tool_async('siliconflow', 'json_mode', {'messages': []}), 0.1)
+                return await client.use_tool_async('siliconflow', 'json_mode', {'messages': []})
+            finally:
+                await client.aclose()
+
+        self.assertEqual(asyncio.run(run()), {'content': '{"ok": true}'})
+        self.assertEqual(self.guard.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.guard.breaker.failures, 0)
+
+    def test_route_returns_503_with_retry_after(self):
+        user = self.create_test_user()
+        user.resume_text = '简历'
+        db.session.commit()
+        token = json.loads(self.client.post('/api/auth/login', json={
+            'email': 'test@example.com', 'password': 'password123'
+        }).data)['token']
+        for _ in range(3):
+            self.guard.breaker.record_failure()
+
+        response = self.client.post('/api/user/parse_resume', headers=self.get_auth_headers(token))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '30')
+        self.assertEqual(json.loads(response.data)['status'], 'error')
+        self.assertEqual(self.server.requests, [])
@@ -0,0 +1,165 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from tests.base import BaseTestCase
+from tests.test_job_service import jd_response
+from app import db
+from app.models import Job
+from app.services import vector_index
+from app.services.job_service import create_job_from_text, ingest_jds
+from app.services.vector_index import HashingEmbedder, VectorIndex
+
+class TestHashingEmbedder(unittest.TestCase):
+    def test_deterministic_and_similar_texts_closer(self):
+        embedder = HashingEmbedder(128)
+        vectors = embedder.embed(['Java 后端开发 Kafka', 'Java 后端开发 Kafka 微服务', '前端 React 设计'])
+
+        np.testing.assert_array_equal(vectors, HashingEmbedder(128).embed(['Java 后端开发 Kafka',
+                                                                            'Java 后端开发 Kafka 微服务',
+                                                                            '前端 React 设计']))
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.assertGreater(normalized[0] @ normalized[1], normalized[0] @ normalized[2])
+
+class TestVectorIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.index = VectorIndex(self.directory.name, dim=4, block_rows=2)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_append_and_search(self):
+        self.index.append([1, 2, 3], [[1, 0, 0, 0], [0, 1, 0, 0], [1, 1, 0, 0]])
+
+        hits = self.index.search([1, 0, 0, 0], top_k=2)[0]
+
+        self.assertEqual([job_id for job_id, _ in hits], [1, 3])
+        self.assertAlmostEqual(hits[0][1], 1.0, places=5)
+        self.assertAlmostEqual(hits[1][1], 2 ** -0.5, places=5)
+
+    def test_batched_queries(self):
+        self.index.append([1, 2, 3], [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0]])
+        results = self.index.search([[0, 1, 0, 0], [0, 0, 1, 0]], top_k=1)
+        self.assertEqual([[job_id for job_id, _ in hits] for hits in results], [[2], [3]])
+
+    def test_shared_between_workers(self):
+        # 另一个实例（另一个 worker）追加的行在文件变化后可见
+        other = VectorIndex(self.directory.name, dim=4)
+        self.assertEqual(self.index.search([1, 0, 0, 0], top_k=5), [[]])
+
+        other.append([7], [[1, 0, 0, 0]])
+
+        self.assertEqual(self.index.search([1, 0, 0, 0], top_k=5)[0][0][0], 7)
+
+    def test_latest_row_wins(self):
+        self.index.append([1, 2], [[1, 0, 0, 0], [0, 1, 0, 0]])
+        self.index.append([1], [[0, 0, 1, 0]])
+
+        hits = self.index.search([1, 0, 0, 0], top_k=5)[0]
+
+        self.assertNotIn(1, [job_id for job_id, score in hits if score > 0.5])
+        self.assertEqual(len(self.index), 2)
+
+    def test_partial_write_truncated_on_next_append(self):
+        self.index.append([1], [[1, 0, 0, 0]])
+        # 模拟中断: 向量写入了，ID 没写入
+        with open(os.path.join(self.directory.name, 'vectors.f32'), 'ab') as f:
+            f.write(np.ones(4, dtype='<f4').tobytes())
+        self.assertEqual(len(self.index), 1)
+
+        self.index.append([2], [[0, 1, 0, 0]])
+
+        self.assertEqual(self.index.search([0, 1, 0, 0], top_k=1)[0][0][0], 2)
+        self.assertEqual(os.path.getsize(os.path.join(self.directory.name, 'vectors.f32')), 2 * 4 * 4)
+
+    def test_replace(self):
+        self.index.append([1], [[1, 0, 0, 0]])
+        self.assertEqual(self.index.replace([([5, 6], [[1, 0, 0, 0], [0, 1, 0, 0]])]), 2)
+        self.assertEqual(self.index.search([1, 0, 0, 0], top_k=1)[0][0][0], 5)
+
+    def test_dimension_mismatch_requires_rebuild(self):
+        with self.assertRaises(RuntimeError):
+            VectorIndex(self.directory.name, dim=8)
+
+    def test_replace_after_dimension_change(self):
+        self.index.append([1], [[1, 0, 0, 0]])
+        rebuilt = VectorIndex(self.directory.name, dim=8, check_meta=False)
+
+        rebuilt.replace([([2], [[0] * 7 + [1]])])
+
+        self.assertEqual(VectorIndex(self.directory.name, dim=8).search([0] * 7 + [1], top_k=1)[0][0][0], 2)
+
+class TestVectorRetrieval(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.app.config['VECTOR_INDEX_ENABLED'] = True
+        self.app.config['VECTOR_INDEX_DIR'] = self.directory.name
+        self.mcp_mock.use_tool.side_effect = lambda **kwargs: jd_response(kwargs['arguments'])
+
+    def tearDown(self):
+        super().tearDown()
+        self.directory.cleanup()
+
+    def login(self):
+        user = self.create_test_user()
+        user.resume_text = '三年 Kafka 后端开发经验'
+        user.set_resume_parsed_data({'technical_analysis': {'tech_stack': ['Kafka']}})
+        db.session.commit()
+        response = self.client.post('/api/auth/login', json={
+            'email': 'test@example.com',
+            'password': 'password123'
+        })
+        return self.get_auth_headers(json.loads(response.data)['token'])
+
+    def test_create_job_appends_vector(self):
+        job = create_job_from_text('后端工程师 负责 Kafka 消息平台')
+        ingest_jds(['数据工程师 负责实时数仓'])
+
+        self.assertEqual(len(vector_index.get_index()), 2)
+        self.assertEqual(vector_index.search_jobs('Kafka 消息平台 后端', top_k=1)[0][0], job.id)
+
+    def test_rebuild_index(self):
+        job = Job(job_title='后端工程师', company_name='ABC科技', location='北京', raw_jd_text='Kafka')
+        job.set_requirements(['熟悉Kafka'])
+        job.set_responsibilities(['开发服务'])
+        db.session.add(job)
+        db.session.commit()
+        self.assertEqual(len(vector_index.get_index()), 0)
+
+        self.assertEqual(vector_index.rebuild_index(), 1)
+        self.assertEqual(vector_index.search_jobs('Kafka', top_k=5)[0][0], job.id)
+
+    def test_rebuild_after_embedder_change(self):
+        job = create_job_from_text('后端工程师 负责 Kafka 消息平台')
+        VectorIndex(self.directory.name, dim=self.app.config['VECTOR_DIM'] * 2, check_meta=False).replace([])
+        self.app.extensions.pop('vector_index', None)
+        with self.assertRaises(RuntimeError):
+            vector_index.get_index()
+
+        result = self.app.test_cli_runner().invoke(args=['rebuild-vector-index'])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(vector_index.search_jobs('Kafka', top_k=5)[0][0], job.id)
+
+    def test_match_jobs_vector_retrieval(self):
+        headers = self.login()
+        job = create_job_from_text('后端工程师 负责 Kafka 消息平台')
+
+        response = self.client.get('/api/user/match_jobs', headers=headers, query_string={
+            'desired_position': '后端工程师', 'desired_location': '上海', 'mode': 'local', 'retrieval': 'vector'
+        })
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['job_id'] for r in data['recommendations']], [job.id])
+
+    def test_vector_retrieval_disabled(self):
+        headers = self.login()
+        self.app.config['VECTOR_INDEX_ENABLED'] = False
+        response = self.client.get('/api/user/match_jobs', headers=headers, query_string={
+            'desired_position': '后端工程师', 'desired_location': '北京', 'retrieval': 'vector'
+        })
+        self.assertEqual(response.status_code, 501)